@@ -1,9 +1,20 @@
 import os
+import csv
+import sys
+import json
+import time
+import argparse
+import threading
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from dotenv import load_dotenv, find_dotenv
 
+DEFAULT_URL = "https://api.zerogpt.com/api/detect/detectText"
+
 # Load environment variables
 def load_environment_variables():
     load_dotenv(find_dotenv())
@@ -28,28 +39,40 @@ def create_headers(cookie):
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
     }
 
-# Create a retry-enabled session
-def create_retry_session(total_retries=3, backoff_factor=1, status_forcelist=None, allowed_methods=None):
+# Create a retry-enabled session; pool_size connections are kept alive for reuse
+def create_retry_session(total_retries=3, backoff_factor=1, status_forcelist=None, allowed_methods=None,
+                         pool_size=10):
     if status_forcelist is None:
         status_forcelist = [429, 500, 502, 503, 504]
     if allowed_methods is None:
         allowed_methods = ["HEAD", "GET", "OPTIONS", "POST"]
-    
+
     retry_strategy = Retry(
         total=total_retries,
         status_forcelist=status_forcelist,
         allowed_methods=allowed_methods,
         backoff_factor=backoff_factor
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=pool_size, pool_maxsize=pool_size)
     session = requests.Session()
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
 
+_session = None
+_session_lock = threading.Lock()
+
+# Return the shared session, so repeated requests reuse its connections
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_retry_session()
+        return _session
+
 # Perform a POST request with retry
-def post_request(url, headers, body, timeout=10):
-    session = create_retry_session()
+def post_request(url, headers, body, timeout=10, session=None):
+    session = session or get_session()
     try:
         response = session.post(url, headers=headers, json=body, timeout=timeout)
         response.raise_for_status()
@@ -58,18 +81,177 @@ def post_request(url, headers, body, timeout=10):
         print(f"An error occurred during the POST request: {e}")
         return None
 
-# Main function to execute the POST request
-def main():
+# Read (id, text) pairs from a JSONL or CSV file ('-' reads JSONL from stdin).
+# Records without an id field are numbered by their position in the input.
+def read_texts(path, text_field="text", id_field="id"):
+    if path == "-":
+        yield from _read_jsonl(sys.stdin, text_field, id_field)
+        return
+    with open(path, newline="", encoding="utf-8") as input_file:
+        if path.lower().endswith(".csv"):
+            for index, row in enumerate(csv.DictReader(input_file)):
+                yield str(row.get(id_field) or index), row[text_field]
+        else:
+            yield from _read_jsonl(input_file, text_field, id_field)
+
+def _read_jsonl(lines, text_field, id_field):
+    index = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        yield str(record.get(id_field, index)), record[text_field]
+        index += 1
+
+# Ids already screened successfully in an output file, so an interrupted run can resume
+def load_checkpoint(path):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short when the previous run was killed
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+def _ends_with_newline(path):
+    with open(path, "rb") as output_file:
+        output_file.seek(-1, os.SEEK_END)
+        return output_file.read(1) == b"\n"
+
+# Spaces requests rate per second apart across all workers, and holds every worker
+# back after a 429 until the server's Retry-After has passed
+class RateLimiter:
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._next = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._paused_until, self._next if self.rate else now)
+            if self.rate:
+                self._next = start + 1.0 / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+# Seconds to wait as told by a Retry-After header (seconds or an HTTP date)
+def retry_after_seconds(response, default):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+# Screen one text, retrying 429s after the wait the server asks for.
+# Other retryable errors are retried by the session's adapter.
+def detect_text(session, url, headers, text, limiter, timeout=10, max_attempts=5, backoff=1.0):
+    throttled = 0
+    for attempt in range(max_attempts):
+        limiter.acquire()
+        response = session.post(url, headers=headers, json={"input_text": text}, timeout=timeout)
+        if response.status_code == 429:
+            throttled += 1
+            limiter.pause(retry_after_seconds(response, backoff * 2 ** attempt))
+            continue
+        response.raise_for_status()
+        return response.json(), throttled
+    raise requests.exceptions.HTTPError(f"Still rate limited after {max_attempts} attempts")
+
+# Screen many texts with bounded concurrency over one pooled session.
+# Results are appended to output_file as JSON lines as soon as each text is done.
+def detect_batch(items, url, headers, output_file, concurrency=8, rate=None, timeout=10, max_attempts=5,
+                 done=None, session=None):
+    done = done or set()
+    # 429s are handled by detect_text so that every worker backs off together
+    session = session or create_retry_session(status_forcelist=[500, 502, 503, 504], pool_size=concurrency)
+    limiter = RateLimiter(rate)
+    stats = {"ok": 0, "failed": 0, "skipped": 0, "throttled": 0}
+
+    def screen(item_id, text):
+        try:
+            result, throttled = detect_text(session, url, headers, text, limiter, timeout, max_attempts)
+            return {"id": item_id, "status": "ok", "result": result}, throttled
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return {"id": item_id, "status": "error", "error": str(e)}, 0
+
+    def write(future):
+        record, throttled = future.result()
+        output_file.write(json.dumps(record) + "\n")
+        output_file.flush()
+        stats["ok" if record["status"] == "ok" else "failed"] += 1
+        stats["throttled"] += throttled
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = set()
+        for item_id, text in items:
+            if item_id in done:
+                stats["skipped"] += 1
+                continue
+            # Only a window of texts is in flight, so huge inputs are streamed rather than loaded
+            if len(pending) >= concurrency * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future)
+            pending.add(executor.submit(screen, item_id, text))
+        for future in pending:
+            write(future)
+    return stats
+
+# Parse command line arguments
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Screen texts with the ZeroGPT AI content detector.")
+    parser.add_argument("--text", help="a single text to screen")
+    parser.add_argument("--input", help="JSONL or CSV file of texts to screen, '-' for JSONL on stdin")
+    parser.add_argument("--output", help="JSONL results file; texts already screened in it are skipped")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, help="most requests per second")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--url", default=DEFAULT_URL)
+    return parser.parse_args(argv)
+
+# Main function to screen a single text or a batch
+def main(argv=None):
+    args = parse_args(argv)
     try:
         cookie = load_environment_variables()
         if not cookie:
             raise ValueError("COOKIE environment variable not set.")
-        
+
         headers = create_headers(cookie)
-        data = ""  # Replace with your actual data
-        body = {"input_text": data}
+        if args.input:
+            if not args.output:
+                raise ValueError("--output is required with --input.")
+            done = load_checkpoint(args.output)
+            with open(args.output, "a", encoding="utf-8") as output_file:
+                if output_file.tell() and not _ends_with_newline(args.output):
+                    output_file.write("\n")  # keep new results off a line cut short by a killed run
+                stats = detect_batch(read_texts(args.input, args.text_field, args.id_field), args.url, headers,
+                                     output_file, args.concurrency, args.rate, args.timeout, done=done)
+            print(f"Screened {stats['ok']} texts, {stats['failed']} failed, {stats['skipped']} already done, "
+                  f"{stats['throttled']} rate-limited responses")
+            return
 
-        response = post_request(URL, headers, body)
+        body = {"input_text": args.text or ""}
+        response = post_request(args.url, headers, body, args.timeout)
         if response:
             print(f"Status Code: {response.status_code}")
             print(f"Response: {response.json()}")
@@ -79,5 +261,4 @@ def main():
         print(f"An error occurred in main: {e}")
 
 if __name__ == "__main__":
-    URL = "https://api.zerogpt.com/api/detect/detectText"
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,36 @@
+import logging
+import argparse
+
+from backend.voice_assistant.config import Config, get_settings
+from backend.voice_assistant.batch_transcription import iter_audio_files, load_done_hashes, transcribe_batch
+
+
+def main():
+    from backend.voice_assistant.providers import get_providers, prewarm_providers
+
+    parser = argparse.ArgumentParser(description="Transcribe a directory or manifest of recorded sessions to JSONL.")
+    parser.add_argument("source", help="directory of WAV files, or a manifest (JSONL with 'path', or one path per line)")
+    parser.add_argument("--output", required=True, help="JSONL output; recordings already in it are skipped")
+    parser.add_argument("--concurrency", type=int, default=4, help="most segment requests in flight")
+    parser.add_argument("--max-segment", type=float, default=30.0, help="longest segment in seconds")
+    parser.add_argument("--codec", choices=['flac', 'wav'], default=Config.STT_UPLOAD_CODEC)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format="[%(asctime)s] %(lineno)d - %(filename)s - %(name)s - %(levelname)s - %(funcName)s - %(message)s")
+
+    settings = get_settings()
+    # The router takes prepared uploads and fails over between the configured transcription models
+    transcribe = get_providers(settings).routers['stt'].call
+    if settings.PREWARM_PROVIDERS:
+        prewarm_providers(settings=settings)
+    done = load_done_hashes(args.output)
+    with open(args.output, "a", encoding="utf-8") as output_file:
+        stats = transcribe_batch(iter_audio_files(args.source), transcribe, output_file, args.concurrency,
+                                 args.max_segment, args.codec, done)
+    logging.info(f"Transcribed {stats['ok']} recordings ({stats['audio_seconds'] / 60:.1f} min of audio in "
+                 f"{stats['segments']} segments), {stats['failed']} failed, {stats['skipped']} already done")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,25 @@
-import cv2
 import time
 import logging
-import threading  # type: ignore
+import threading
+from contextlib import nullcontext
 
 from colorama import Fore, init
-from backend.voice_assistant.config import Config
-from backend.voice_assistant.utils import delete_file
-from backend.voice_assistant.text_to_speech import text_to_speech
-from backend.voice_assistant.audio import play_audio, record_audio
-from backend.voice_assistant.transcription import transcribe_audio
-from backend.voice_assistant.response_generation import generate_response
-from backend.voice_assistant.api_key_manager import get_transcription_api_key, get_response_api_key, get_tts_api_key
+from backend.voice_assistant.config import get_settings
+from backend.voice_assistant.camera import CameraCapture
+from backend.voice_assistant.duplex import DuplexListener, MicrophoneSource
+from backend.voice_assistant.clients import close_clients
+from backend.voice_assistant.pipeline import StreamingPipeline
+from backend.voice_assistant.speculation import SPECULATION_LEVELS, SpeculativeResponder
+from backend.voice_assistant.context import ChatContext, llm_summarizer
+from backend.voice_assistant.vision import build_user_message, supports_vision
+from backend.voice_assistant.audio import play_audio_bytes, record_audio_bytes, record_audio_vad
+from backend.voice_assistant.streaming_transcription import create_streaming_transcriber
+from backend.voice_assistant.metrics import get_metrics
+from backend.voice_assistant.playback import close_player, get_player
+from backend.voice_assistant.providers import get_providers, prewarm_providers
+from backend.voice_assistant.tts_cache import get_tts_cache
+from backend.voice_assistant.response_cache import get_response_cache
+from backend.voice_assistant.session_replay import get_session_recorder
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
@@ -20,113 +29,341 @@ logging.basicConfig(level=logging.INFO,
 init(autoreset=True)
 
 
-def capture_frame_on_speech():
-    cap = cv2.VideoCapture(0)
+def stream_response_to_speech(chat_history, trace=None, cancel=None, tokens=None):
+    """
+    Generate a response with the streaming pipeline, speaking each sentence as soon as it is ready.
 
-    if not cap.isOpened():
-        logging.error("Error: Could not open webcam.")
-        return
+    Args:
+    chat_history (list): The chat history as a list of messages.
+    trace (TurnTrace): Optional trace for the turn's timings.
+    cancel (threading.Event): Set to stop generating and speaking, e.g. on barge-in.
+    tokens (iterable): An already started response stream (e.g. from SpeculativeResponder) to speak
+        instead of making a new request.
 
-    stop_event = threading.Event()
+    Returns:
+    str: The response text, cut short if the turn was cancelled.
+    """
+    providers = get_providers()
 
-    def capture_frame():
-        while not stop_event.is_set():
-            ret, frame = cap.read()
-            if not ret:
-                logging.error("Error: Failed to capture frame.")
-                break
+    def stream_fn(history):
+        if tokens is not None:
+            return tokens
+        return providers.stream_response(history)
+
+    player = get_player()
+    # A sentence synthesized after a barge-in is tagged with the cancelled generation and dropped
+    generation = player.generation
+
+    def play_fn(audio_bytes):
+        # Queue rather than block, so each sentence follows the previous one without a gap
+        player.enqueue(audio_bytes, providers.audio_format, generation)
+
+    pipeline = StreamingPipeline(stream_fn, providers.synthesize, play_fn)
+    response_text = pipeline.run(chat_history, trace, cancel)
+    player.wait()
+    if 'first_audio' in pipeline.last_timings:
+        logging.info(
+            f"Time to first audio: {pipeline.last_timings['first_audio']:.3f}s")
+    return response_text
+
+
+def record_utterance(on_audio=None):
+    """
+    Record one utterance using the configured endpointing.
+
+    Args:
+    on_audio (callable): Optional on_audio(pcm_bytes) fed while recording (VAD endpointing only).
+
+    Returns:
+    bytes: The utterance as WAV data, or None if nothing was recorded.
+    """
+    settings = get_settings()
+    if settings.AUDIO_ENDPOINTING == 'vad':
+        return record_audio_vad(
+            sample_rate=settings.VAD_SAMPLE_RATE,
+            hangover_ms=settings.VAD_HANGOVER_MS,
+            threshold_db=settings.VAD_THRESHOLD_DB,
+            min_speech_ms=settings.VAD_MIN_SPEECH_MS,
+            on_audio=on_audio
+        )
+    return record_audio_bytes()
+
+
+def create_transcriber():
+    """
+    Create a streaming transcriber for one utterance from settings.
+
+    Returns:
+    StreamingTranscriber: The transcriber.
+    """
+    settings = get_settings()
+    return create_streaming_transcriber(
+        settings.TRANSCRIPTION_MODEL, settings.api_key(settings.TRANSCRIPTION_MODEL), settings.VAD_SAMPLE_RATE,
+        settings.LOCAL_MODEL_PATH,
+        segment_ms=settings.STT_SEGMENT_MS, overlap_ms=settings.STT_OVERLAP_MS, transcribe=get_providers().transcribe)
+
+
+def create_listener():
+    """
+    Start a full-duplex microphone listener for barge-in, configured from settings.
+
+    Returns:
+    DuplexListener: The running listener.
+    """
+    settings = get_settings()
+    return DuplexListener(
+        MicrophoneSource(settings.VAD_SAMPLE_RATE),
+        hangover_ms=settings.VAD_HANGOVER_MS,
+        threshold_db=settings.VAD_THRESHOLD_DB,
+        min_speech_ms=settings.VAD_MIN_SPEECH_MS,
+        barge_in_ms=settings.BARGE_IN_MIN_SPEECH_MS,
+        transcriber_factory=create_transcriber if settings.STREAMING_TRANSCRIPTION else None
+    ).start()
+
+
+def create_speculation(context, camera):
+    """
+    Create a SpeculativeResponder for one turn, configured from settings.
+
+    Speculative requests carry the webcam frame from the moment they are made.
 
-            cv2.imshow('Webcam', frame)
+    Args:
+    context (ChatContext): The chat history the turn continues.
+    camera (CameraCapture): The webcam, for vision-capable models.
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                stop_event.set()
-                break
+    Returns:
+    SpeculativeResponder: The responder.
+    """
+    settings = get_settings()
 
-    # Start the webcam thread
-    webcam_thread = threading.Thread(target=capture_frame)
-    webcam_thread.start()
+    def build_history(partial):
+        snapshot = None
+        if settings.VISION_ENABLED and supports_vision(settings.RESPONSE_MODEL):
+            snapshot = camera.snapshot_jpeg(
+                time.monotonic(), settings.SNAPSHOT_JPEG_QUALITY, settings.SNAPSHOT_MAX_WIDTH)
+        return context.messages() + [build_user_message(partial, snapshot, settings.VISION_DETAIL)]
 
-    chat_history = [
-        {"role": "system", "content": "You are a helpful Assistant. Keep your answers short and concise."}
-    ]
+    return SpeculativeResponder(get_providers().stream_response, build_history,
+                                **SPECULATION_LEVELS[settings.SPECULATION])
 
+
+def record_and_transcribe(trace=None, listener=None, on_transcriber=None):
+    """
+    Record one utterance and transcribe it, streaming audio to the transcriber while the user speaks
+    when STREAMING_TRANSCRIPTION is enabled.
+
+    Args:
+    trace (TurnTrace): Optional trace that receives the 'record' and 'stt' spans and the 'vad_end' mark.
+    listener (DuplexListener): Take the utterance from an always-on listener instead of recording one.
+    on_transcriber (callable): Optional on_transcriber(transcriber), called with the streaming
+        transcriber before recording starts (not used with a listener).
+
+    Returns:
+    tuple: (WAV bytes, transcript, time.monotonic() at the end of speech), or (None, None, None)
+        if nothing was recorded.
+    """
+    settings = get_settings()
+    if listener is not None:
+        # Return regularly so the caller can notice it is asked to stop
+        utterance = listener.next_utterance(timeout=1.0)
+        if utterance is None:
+            return None, None, None
+        audio_bytes, speech_end, transcriber = utterance.wav, utterance.ended_at, utterance.transcriber
+        streaming = transcriber is not None
+    else:
+        streaming = settings.STREAMING_TRANSCRIPTION and settings.AUDIO_ENDPOINTING == 'vad'
+        transcriber = create_transcriber() if streaming else None
+        if transcriber is not None and on_transcriber is not None:
+            on_transcriber(transcriber)
+        record_start = time.perf_counter()
+        audio_bytes = record_utterance(on_audio=transcriber.feed if streaming else None)
+        speech_end = time.monotonic()
+        if audio_bytes is None:
+            if transcriber is not None:
+                transcriber.close()
+            return None, None, None
+        if trace is not None:
+            trace.add_span('record', record_start, response_bytes=len(audio_bytes))
+    if trace is not None:
+        trace.mark('vad_end')
+
+    stt_start = time.perf_counter()
+    if streaming:
+        # Most of the audio was uploaded while the user spoke; this waits for the tail
+        transcript = transcriber.finish()
+    else:
+        transcript = get_providers().transcribe(audio_bytes)
+    if trace is not None:
+        trace.add_span('stt', stt_start, request_bytes=len(audio_bytes), response_chars=len(transcript or ""),
+                       streaming=streaming)
+    return audio_bytes, transcript, speech_end
+
+
+def capture_frame_on_speech():
+    # Built and validated once, before anything starts; every turn reads the same settings
+    settings = get_settings()
+
+    # Import the configured backends, create their clients and load local models
+    # while the camera opens, rather than in the first turn
+    prewarm = None
+    if settings.PREWARM_PROVIDERS:
+        prewarm = threading.Thread(target=prewarm_providers, name='prewarm', daemon=True)
+        prewarm.start()
+
+    camera = CameraCapture(
+        device=settings.CAMERA_DEVICE,
+        fps=settings.CAMERA_FPS,
+        buffer_size=settings.CAMERA_BUFFER_SIZE,
+        headless=settings.CAMERA_HEADLESS
+    )
+    if not camera.start():
+        return
+    stop_event = camera.stop_event
+    if prewarm is not None:
+        prewarm.join()
+
+    providers = get_providers()
+    summarizer = None
+    if settings.CONTEXT_SUMMARIZE:
+        summarizer = llm_summarizer(providers.generate)
+    context = ChatContext(
+        settings.SYSTEM_PROMPT,
+        max_tokens=settings.CONTEXT_MAX_TOKENS,
+        keep_recent=settings.CONTEXT_KEEP_RECENT,
+        summarizer=summarizer
+    )
+
+    # With barge-in the microphone stays open, so the user can interrupt the answer
+    listener = create_listener() if settings.BARGE_IN else None
+
+    metrics = get_metrics()
+    recorder = get_session_recorder()
     try:
         while not stop_event.is_set():
             try:
-                # Record audio from the microphone and save it as 'test.wav'
-                record_audio('test.wav')
+                trace = metrics.start_turn(providers.names)
+                if recorder is not None:
+                    recorder.start_turn()
 
-                # Get the API key for transcription
-                transcription_api_key = get_transcription_api_key()
+                # Start answering from the partial transcript while the user is still speaking
+                speculation = None
+                on_transcriber = None
+                if (settings.SPECULATION != 'off' and listener is None and settings.PIPELINE_MODE == 'streaming'
+                        and settings.STREAMING_TRANSCRIPTION and settings.AUDIO_ENDPOINTING == 'vad'):
+                    speculation = create_speculation(context, camera)
 
-                # Transcribe the audio file
-                user_input = transcribe_audio(
-                    Config.TRANSCRIPTION_MODEL, transcription_api_key, 'test.wav', Config.LOCAL_MODEL_PATH)
+                    def on_transcriber(transcriber):
+                        speculation.watch(transcriber.partial)
+
+                # Record audio from the microphone into memory and transcribe it
+                audio_bytes, user_input, speech_end = record_and_transcribe(trace, listener, on_transcriber)
+                if audio_bytes is None:
+                    if speculation is not None:
+                        speculation.abandon()
+                    continue
+                stt_seconds = time.monotonic() - speech_end
                 logging.info(f"{Fore.GREEN}You said: {user_input}")
 
-                # Capture a frame from the webcam
-                ret, frame = cap.read()
-                if ret:
-                    cv2.imwrite('snapshot.jpg', frame)
-                    logging.info(
-                        f"{Fore.GREEN}Snapshot taken and saved as 'snapshot.jpg'")
+                # Take the webcam frame nearest to the moment speech ended
+                snapshot = None
+                send_snapshot = settings.VISION_ENABLED and supports_vision(settings.RESPONSE_MODEL)
+                if send_snapshot or recorder is not None:
+                    snapshot = camera.snapshot_jpeg(
+                        speech_end, settings.SNAPSHOT_JPEG_QUALITY, settings.SNAPSHOT_MAX_WIDTH)
+                    if snapshot is not None and send_snapshot:
+                        logging.info(
+                            f"{Fore.GREEN}Snapshot taken ({len(snapshot)} bytes)")
+                if recorder is not None:
+                    recorder.record_turn(audio_bytes, user_input, snapshot, send_snapshot, stt_seconds)
+                if not send_snapshot:
+                    snapshot = None
+
+                # Append the user's input, with the snapshot attached, to the chat history
+                context.append(build_user_message(
+                    user_input, snapshot, settings.VISION_DETAIL))
+                # Older snapshots are replaced by a placeholder to keep requests small
+                context.evict_images(settings.VISION_KEEP_IMAGES)
+                chat_history = context.messages()
 
+                cancel = threading.Event()
 
-                # TODO: add snapshot to chat history
-                # Append the user's input to the chat history
-                chat_history.append({"role": "user", "content": user_input})
+                def barge_in():
+                    # Stop generating, synthesizing and playing; the interruption becomes the next turn
+                    cancel.set()
+                    get_player().cancel()
+                    trace.mark('barge_in')
 
-                # Get the API key for response generation
-                response_api_key = get_response_api_key()
+                def speaking():
+                    return listener.speaking(barge_in) if listener is not None else nullcontext()
+
+                if settings.PIPELINE_MODE == 'streaming':
+                    tokens = None
+                    if speculation is not None:
+                        tokens = speculation.commit(user_input, chat_history)
+                        trace.attrs['speculation'] = speculation.result
+                        logging.info(f"Speculation: {speculation.result}")
+
+                    # Stream the response and speak it sentence by sentence
+                    with speaking():
+                        response_text = stream_response_to_speech(chat_history, trace, cancel, tokens)
+                    if cancel.is_set():
+                        logging.info(f"{Fore.YELLOW}Interrupted by the user")
+                    logging.info(f"{Fore.CYAN}Response: {response_text}")
+
+                    # Append the assistant's response to the chat history
+                    context.append(
+                        {"role": "assistant", "content": response_text})
+                    trace.finish()
+                    continue
 
                 # Generate a response
-                response_text = generate_response(
-                    Config.RESPONSE_MODEL, response_api_key, chat_history, Config.LOCAL_MODEL_PATH)
+                with trace.span('llm') as span:
+                    response_text = "".join(providers.stream_response(chat_history))
+                    span['response_chars'] = len(response_text)
                 logging.info(f"{Fore.CYAN}Response: {response_text}")
 
                 # Append the assistant's response to the chat history
-                chat_history.append(
+                context.append(
                     {"role": "assistant", "content": response_text})
 
-                # TODO: remove this line, if you wna tot use openai tts model as default set to openai
-                Config.TTS_MODEL = 'deepgram'
-                
-                # Determine the output file format based on the TTS model
-                output_file = 'output.mp3' if Config.TTS_MODEL == 'openai' else 'output.wav'
-                # Get the API key for TTS
-                tts_api_key = get_tts_api_key()
-
-                # Convert the response text to speech and save it to the appropriate file
-                response = text_to_speech(Config.TTS_MODEL, tts_api_key,
-                                          response_text, output_file, Config.LOCAL_MODEL_PATH)
-
-                # Ensure the response is correctly handled
-                if Config.TTS_MODEL == 'openai':
-                    with open(output_file, 'wb') as f:
-                        f.write(response.content)
-                else:
-                    # Handle other TTS models if necessary
-                    pass
+                # Convert the response text to speech in memory
+                with trace.span('tts', request_chars=len(response_text)) as span:
+                    speech_audio = providers.synthesize(response_text)
+                    span['response_bytes'] = len(speech_audio) if speech_audio else 0
 
                 # Play the generated speech audio
-                play_audio(output_file)
+                if speech_audio is not None:
+                    trace.mark('playback_start')
+                    with speaking():
+                        play_audio_bytes(speech_audio, providers.audio_format)
+                trace.finish()
 
             except Exception as e:
                 logging.error(
                     f"{Fore.RED}An error occurred during processing: {e}")
                 time.sleep(1)  # Wait before retrying
 
-            finally:
-                # Clean up audio files
-                delete_file('test.wav')
-                if 'output_file' in locals():
-                    delete_file(output_file)
-
     finally:
-        stop_event.set()
-        webcam_thread.join()
-        cap.release()
-        cv2.destroyAllWindows()
+        camera.stop()
+        if listener is not None:
+            listener.stop()
+        close_player()
+        close_clients()
+        if recorder is not None:
+            recorder.close()
+            logging.info(f"Session recorded to {recorder.directory}")
+        for stage, stats in metrics.summary().items():
+            logging.info(f"{stage}: n={stats['count']} p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s")
+        for stage, router in providers.routers.items():
+            logging.info(f"{stage} providers: {router.stats()}")
+        for model, controller in providers.quality.items():
+            logging.info(f"{model} TTS quality: {controller.stats()}")
+        response_cache = get_response_cache()
+        if response_cache is not None:
+            logging.info(f"Response cache: {response_cache.stats()}")
+        tts_cache = get_tts_cache()
+        if tts_cache is not None:
+            logging.info(f"TTS cache: {tts_cache.stats()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,429 @@
+import json
+import time
+import struct
+import asyncio
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from backend.voice_assistant.config import Config, get_settings
+from backend.voice_assistant.metrics import Metrics, get_metrics
+from backend.voice_assistant.context import ChatContext
+from backend.voice_assistant.pipeline import split_sentences
+
+# Wire protocol: every frame is a one-byte type, a four-byte big-endian payload
+# length and the payload. A client sends AUDIO frames, each holding one complete
+# utterance as WAV data; for every utterance the server answers with a TRANSCRIPT
+# frame, one AUDIO frame per spoken sentence, a RESPONSE frame with the full text
+# and an END frame. ERROR frames carry a message and do not end the session.
+# A client may also send a SETTINGS frame, a JSON object of settings from
+# SESSION_SETTINGS, e.g. {"TTS_MODEL": "openai"}, which apply to the utterances
+# after it; the server answers with a SETTINGS frame naming the session's
+# providers per stage, or an ERROR frame if the settings are rejected.
+AUDIO = b'A'
+TRANSCRIPT = b'T'
+RESPONSE = b'R'
+END = b'E'
+ERROR = b'X'
+SETTINGS = b'S'
+
+# Settings a client may change for its own session; API keys and server limits stay the server's.
+# Models are limited to the server's own and those in SESSION_*_MODELS, see session_models().
+SESSION_SETTINGS = (
+    'TRANSCRIPTION_MODEL', 'RESPONSE_MODEL', 'TTS_MODEL',
+    'TRANSCRIPTION_FALLBACKS', 'RESPONSE_FALLBACKS', 'TTS_FALLBACKS',
+    'SYSTEM_PROMPT', 'CONTEXT_MAX_TOKENS',
+    'TTS_ADAPTIVE_QUALITY', 'TTS_QUALITY_MIN', 'TTS_QUALITY_MAX',
+)
+
+# The model settings of each stage, checked against the models the server allows sessions
+_SESSION_MODEL_SETTINGS = {
+    'stt': ('TRANSCRIPTION_MODEL', 'TRANSCRIPTION_FALLBACKS'),
+    'llm': ('RESPONSE_MODEL', 'RESPONSE_FALLBACKS'),
+    'tts': ('TTS_MODEL', 'TTS_FALLBACKS'),
+}
+
+_HEADER = struct.Struct('!cI')
+# Sentences the LLM stream may run ahead of TTS and the client before it waits
+SENTENCE_QUEUE_SIZE = 2
+
+
+async def read_frame(reader, max_bytes=None):
+    """
+    Read one frame from a stream.
+
+    Args:
+    reader (asyncio.StreamReader): The stream to read from.
+    max_bytes (int): Reject frames with a larger payload.
+
+    Returns:
+    tuple: (frame type, payload bytes).
+
+    Raises:
+    asyncio.IncompleteReadError: If the stream ends mid-frame or before a frame.
+    ValueError: If the payload is larger than max_bytes.
+    """
+    kind, length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if max_bytes is not None and length > max_bytes:
+        raise ValueError(f"Frame of {length} bytes exceeds the {max_bytes} byte limit")
+    return kind, await reader.readexactly(length)
+
+
+def session_models(settings):
+    """
+    Return the models sessions may choose per stage: the server's own models and
+    fallbacks, and those added in SESSION_TRANSCRIPTION_MODELS, SESSION_RESPONSE_MODELS
+    and SESSION_TTS_MODELS.
+
+    Args:
+    settings (Settings): The server's settings.
+
+    Returns:
+    dict: Set of model names per stage ('stt', 'llm', 'tts').
+    """
+    return {
+        'stt': {settings.TRANSCRIPTION_MODEL, *settings.TRANSCRIPTION_FALLBACKS, *settings.SESSION_TRANSCRIPTION_MODELS},
+        'llm': {settings.RESPONSE_MODEL, *settings.RESPONSE_FALLBACKS, *settings.SESSION_RESPONSE_MODELS},
+        'tts': {settings.TTS_MODEL, *settings.TTS_FALLBACKS, *settings.SESSION_TTS_MODELS},
+    }
+
+
+def write_frame(writer, kind, payload=b''):
+    """
+    Write one frame to a stream; callers should await writer.drain() afterwards.
+
+    Args:
+    writer (asyncio.StreamWriter): The stream to write to.
+    kind (bytes): The one-byte frame type.
+    payload (bytes): The frame payload.
+    """
+    writer.write(_HEADER.pack(kind, len(payload)) + payload)
+
+
+class Session:
+    """
+    One client connection with its own bounded chat history, settings and providers.
+
+    Utterances are read into a bounded inbox; when it is full the session stops
+    reading from the socket, so a client that sends faster than it is served is
+    slowed down by TCP flow control instead of growing server memory. Replies are
+    written with drain(), which applies the same backpressure in the other direction.
+
+    Args:
+    server (AssistantServer): The owning server.
+    reader (asyncio.StreamReader): The connection's read side.
+    writer (asyncio.StreamWriter): The connection's write side.
+    """
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.settings = server.settings
+        self.providers = server.providers
+        self.context = ChatContext(server.system_prompt, max_tokens=server.context_max_tokens)
+        self.inbox = asyncio.Queue(maxsize=server.session_queue_size)
+        self.peer = writer.get_extra_info('peername')
+        # Set once the client is gone, so provider threads stop working for it
+        self.closed = threading.Event()
+
+    async def run(self):
+        reader_task = asyncio.create_task(self._read_loop())
+        try:
+            while True:
+                frame = await self.inbox.get()
+                if frame is None:
+                    break
+                kind, payload = frame
+                try:
+                    if kind == SETTINGS:
+                        await self._configure(payload)
+                    else:
+                        await self._turn(payload)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except Exception as e:
+                    logging.error(f"Turn failed for {self.peer}: {e}")
+                    await self._send(ERROR, str(e).encode())
+        finally:
+            reader_task.cancel()
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _read_loop(self):
+        try:
+            while True:
+                kind, payload = await read_frame(self.reader, self.server.max_frame_bytes)
+                if kind in (AUDIO, SETTINGS):
+                    # Queued with the utterances, so settings apply from the next one on
+                    await self.inbox.put((kind, payload))
+                else:
+                    logging.warning(f"Ignoring frame of type {kind!r} from {self.peer}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            logging.warning(f"Closing session {self.peer}: {e}")
+        finally:
+            self.closed.set()
+            await self.inbox.put(None)
+
+    async def _send(self, kind, payload=b''):
+        write_frame(self.writer, kind, payload)
+        await self.writer.drain()
+
+    async def _configure(self, payload):
+        if self.settings is None:
+            raise ValueError("This server does not accept session settings")
+        overrides = json.loads(payload)
+        if not isinstance(overrides, dict):
+            raise ValueError("SETTINGS must be a JSON object")
+        rejected = sorted(set(overrides) - set(SESSION_SETTINGS))
+        if rejected:
+            raise ValueError(f"Settings that cannot be changed per session: {rejected}")
+        # Validated as a whole; the server's settings and other sessions are unaffected
+        settings = self.settings.replace(**overrides)
+        for stage, names in _SESSION_MODEL_SETTINGS.items():
+            model, fallbacks = (getattr(settings, name) for name in names)
+            refused = sorted({model, *fallbacks} - self.server.session_models[stage])
+            if refused:
+                raise ValueError(f"{stage} models not allowed on this server: {refused}")
+        self.providers = await self.server.run_blocking(self.server.session_providers, settings)
+        if (settings.SYSTEM_PROMPT, settings.CONTEXT_MAX_TOKENS) != (self.settings.SYSTEM_PROMPT,
+                                                                    self.settings.CONTEXT_MAX_TOKENS):
+            # A new system prompt starts a new conversation
+            self.context = ChatContext(settings.SYSTEM_PROMPT, max_tokens=settings.CONTEXT_MAX_TOKENS)
+        self.settings = settings
+        logging.info(f"Session {self.peer} uses {self.providers.names}")
+        await self._send(SETTINGS, json.dumps(self.providers.names).encode())
+
+    async def _turn(self, audio_bytes):
+        providers = self.providers
+        # The client sends an utterance once it has endpointed it, so the turn starts at the end of speech
+        trace = self.server.metrics.start_turn(providers.names, session=str(self.peer))
+        trace.mark('vad_end')
+
+        with trace.span('stt', request_bytes=len(audio_bytes)) as span:
+            user_input = await self.server.run_blocking(providers.transcribe, audio_bytes)
+            span['response_chars'] = len(user_input)
+        await self._send(TRANSCRIPT, user_input.encode())
+        # Kept out of the context until the turn succeeds, so a failed turn leaves no unanswered message
+        user_message = {"role": "user", "content": user_input}
+
+        parts = []
+        first = True
+        async for sentence in self._stream_sentences(providers, self.context.messages() + [user_message], parts,
+                                                     trace):
+            tts_start = time.perf_counter()
+            speech_audio = await self.server.run_blocking(providers.synthesize, sentence)
+            size = len(speech_audio) if speech_audio else 0
+            if first:
+                trace.add_span('tts_ttfb', tts_start, request_chars=len(sentence), response_bytes=size)
+                first = False
+            trace.add_span('tts', tts_start, request_chars=len(sentence), response_bytes=size)
+            if speech_audio:
+                trace.mark('playback_start')
+                await self._send(AUDIO, speech_audio)
+
+        response_text = "".join(parts)
+        self.context.append(user_message)
+        self.context.append({"role": "assistant", "content": response_text})
+        await self._send(RESPONSE, response_text.encode())
+        await self._send(END)
+        trace.finish()
+
+    async def _stream_sentences(self, providers, chat_history, parts, trace):
+        # The LLM stream is a blocking iterator, so it is consumed on the stream executor and
+        # its sentences are handed back to the event loop as they complete. The queue is
+        # bounded, so a slow client holds the stream back instead of growing a backlog,
+        # and the stream is closed as soon as the turn ends or the client disconnects.
+        loop = asyncio.get_running_loop()
+        sentences = asyncio.Queue(maxsize=SENTENCE_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def stopped():
+            return stop.is_set() or self.closed.is_set()
+
+        def tokens():
+            llm_start = time.perf_counter()
+            stream = providers.stream_response(chat_history)
+            try:
+                for token in stream:
+                    if stopped():
+                        return
+                    if not parts:
+                        trace.add_span('llm_ttft', llm_start)
+                    parts.append(token)
+                    yield token
+            finally:
+                if hasattr(stream, 'close'):
+                    stream.close()
+            trace.add_span('llm', llm_start, response_chars=sum(len(part) for part in parts))
+
+        def put(item):
+            future = asyncio.run_coroutine_threadsafe(sentences.put(item), loop)
+            while True:
+                try:
+                    return future.result(timeout=0.1)
+                except FutureTimeoutError:
+                    if stopped():
+                        future.cancel()
+                        return
+
+        def produce():
+            try:
+                for sentence in split_sentences(tokens()):
+                    put(sentence)
+                    if stopped():
+                        return
+            finally:
+                put(None)
+
+        # Not on the provider pool: a producer waiting for TTS to take its sentences must not
+        # hold a worker that TTS needs
+        producer = asyncio.get_running_loop().run_in_executor(self.server.stream_executor, produce)
+        try:
+            while True:
+                sentence = await sentences.get()
+                if sentence is None:
+                    break
+                yield sentence
+            await producer
+        finally:
+            stop.set()
+
+
+class AssistantServer:
+    """
+    Asyncio server that runs an independent voice-assistant session per connection.
+
+    Blocking provider calls run on one bounded thread pool shared by all sessions,
+    so the number of in-flight STT and TTS requests is capped at max_workers. LLM
+    streams, which are consumed for as long as their sentences are being spoken,
+    run on a second pool of the same size, so they can never take every worker
+    the TTS calls they wait on need.
+
+    Args:
+    providers (Providers): The provider calls used for every session that does not send settings.
+    host (str): Address to listen on.
+    port (int): Port to listen on; 0 picks a free port.
+    max_workers (int): Size of the provider thread pool, and of the LLM stream pool.
+    session_queue_size (int): Utterances a session may queue before reads pause.
+    max_frame_bytes (int): Largest frame a client may send.
+    system_prompt (str): The system message each session starts with.
+    context_max_tokens (int): Token budget of each session's chat history.
+    metrics (Metrics): Receives a timing trace for every turn of every session.
+    settings (Settings): The settings providers was built from. Sessions may send SETTINGS frames
+        to override some of them only if this is given, and may only choose the models of
+        session_models(settings).
+    session_providers (callable): session_providers(settings) -> Providers for a session's
+        settings; defaults to get_providers, which shares them between sessions whose
+        settings differ only in their conversation, e.g. the system prompt.
+    """
+
+    def __init__(self, providers, host='127.0.0.1', port=8765, max_workers=32, session_queue_size=2,
+                 max_frame_bytes=10 * 1024 * 1024, system_prompt=None, context_max_tokens=None, metrics=None,
+                 settings=None, session_providers=None):
+        from backend.voice_assistant.providers import get_providers
+
+        self.providers = providers
+        self.settings = settings
+        self.session_models = session_models(settings) if settings is not None else {}
+        self.session_providers = session_providers or get_providers
+        self.host = host
+        self.port = port
+        self.session_queue_size = session_queue_size
+        self.max_frame_bytes = max_frame_bytes
+        defaults = settings or Config
+        self.system_prompt = system_prompt or defaults.SYSTEM_PROMPT
+        self.context_max_tokens = context_max_tokens or defaults.CONTEXT_MAX_TOKENS
+        self.metrics = metrics or Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='provider')
+        self.stream_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-stream')
+        self.sessions = {}
+        self._server = None
+
+    def run_blocking(self, fn, *args):
+        """
+        Run a blocking call on the provider thread pool.
+
+        Returns:
+        asyncio.Future: Resolves to the call's result.
+        """
+        return asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def _handle(self, reader, writer):
+        session = Session(self, reader, writer)
+        self.sessions[session] = asyncio.current_task()
+        logging.info(f"Session opened: {session.peer}")
+        try:
+            await session.run()
+        finally:
+            self.sessions.pop(session, None)
+            logging.info(f"Session closed: {session.peer}")
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Assistant server listening on {self.host}:{self.port}")
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        # Closing the sockets ends each session's read loop, letting its handler finish
+        tasks = list(self.sessions.values())
+        for session in list(self.sessions):
+            session.writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.stream_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    from backend.voice_assistant.providers import get_providers, prewarm_providers
+
+    # Built and validated once at startup, before the server accepts sessions
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description="Serve the voice assistant to many concurrent clients.")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--max-workers", type=int, default=settings.SERVER_MAX_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format="[%(asctime)s] %(lineno)d - %(filename)s - %(name)s - %(levelname)s - %(funcName)s - %(message)s")
+
+    if settings.PREWARM_PROVIDERS:
+        # Before listening, so the first sessions do not wait for SDK imports and client setup
+        prewarm_providers(settings=settings)
+    server = AssistantServer(
+        get_providers(settings),
+        host=args.host,
+        port=args.port,
+        max_workers=args.max_workers,
+        session_queue_size=settings.SERVER_SESSION_QUEUE_SIZE,
+        max_frame_bytes=settings.SERVER_MAX_FRAME_BYTES,
+        metrics=get_metrics(),
+        settings=settings
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
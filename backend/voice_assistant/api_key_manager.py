@@ -1,45 +1,57 @@
-from voice_assistant.config import Config
+from backend.voice_assistant.config import get_settings
 
 
-def get_transcription_api_key():
+def get_transcription_api_key(settings=None):
     """
     Select the correct API key for transcription based on the configured model.
 
+    Args:
+    settings (Settings): The settings to read; defaults to get_settings().
+
     Returns:
     str: The API key for the transcription service.
     """
-    if Config.TRANSCRIPTION_MODEL == 'openai':
-        return Config.OPENAI_API_KEY
-    elif Config.TRANSCRIPTION_MODEL == 'groq':
-        return Config.GROQ_API_KEY
-    elif Config.TRANSCRIPTION_MODEL == 'deepgram':
-        return Config.DEEPGRAM_API_KEY
-    return None
+    settings = settings or get_settings()
+    return settings.api_key(settings.TRANSCRIPTION_MODEL)
 
 
-def get_response_api_key():
+def get_response_api_key(settings=None):
     """
     Select the correct API key for response generation based on the configured model.
 
+    Args:
+    settings (Settings): The settings to read; defaults to get_settings().
+
     Returns:
     str: The API key for the response generation service.
     """
-    if Config.RESPONSE_MODEL == 'openai':
-        return Config.OPENAI_API_KEY
-    elif Config.RESPONSE_MODEL == 'groq':
-        return Config.GROQ_API_KEY
-    return None
+    settings = settings or get_settings()
+    return settings.api_key(settings.RESPONSE_MODEL)
 
 
-def get_tts_api_key():
+def get_tts_api_key(settings=None):
     """
     Select the correct API key for text-to-speech based on the configured model.
 
+    Args:
+    settings (Settings): The settings to read; defaults to get_settings().
+
     Returns:
     str: The API key for the TTS service.
     """
-    if Config.TTS_MODEL == 'openai':
-        return Config.OPENAI_API_KEY
-    elif Config.TTS_MODEL == 'deepgram':
-        return Config.DEEPGRAM_API_KEY
-    return None
+    settings = settings or get_settings()
+    return settings.api_key(settings.TTS_MODEL)
+
+
+def get_api_key(provider, settings=None):
+    """
+    Return the API key for a provider, e.g. one in a fallback list.
+
+    Args:
+    provider (str): The provider name ('openai', 'groq', 'deepgram', 'local').
+    settings (Settings): The settings to read; defaults to get_settings().
+
+    Returns:
+    str: The API key, or None for providers that need none.
+    """
+    return (settings or get_settings()).api_key(provider)
@@ -1,19 +1,25 @@
+import os
 import time  # type: ignore
-import pygame
 import logging
-import speech_recognition as sr
 
+from backend.voice_assistant.playback import get_player
+from backend.voice_assistant.vad import EnergyVAD, Endpointer
 
-def record_audio(file_path, timeout=100, phrase_time_limit=50, retries=3):
+
+def capture_audio(timeout=100, phrase_time_limit=50, retries=3):
     """
-    Record audio from the microphone and save it as a WAV file.
+    Record a phrase from the microphone.
 
     Args:
-    file_path (str): The path to save the recorded audio file.
     timeout (int): Maximum time to wait for a phrase to start (in seconds).
     phrase_time_limit (int): Maximum time for the phrase to be recorded (in seconds).
     retries (int): Number of retries if recording fails.
+
+    Returns:
+    sr.AudioData: The recorded audio, or None if recording failed.
     """
+    import speech_recognition as sr
+
     recognizer = sr.Recognizer()
     for attempt in range(retries):
         try:
@@ -23,10 +29,7 @@ def record_audio(file_path, timeout=100, phrase_time_limit=50, retries=3):
                 audio_data = recognizer.listen(
                     source, timeout=timeout, phrase_time_limit=phrase_time_limit)
                 logging.info("Recording complete")
-                # Save the recorded audio data to a WAV file
-                with open(file_path, "wb") as audio_file:
-                    audio_file.write(audio_data.get_wav_data())
-                return
+                return audio_data
         except sr.WaitTimeoutError:
             logging.warning(
                 f"Listening timed out, retrying... ({attempt + 1}/{retries})")
@@ -35,25 +38,114 @@ def record_audio(file_path, timeout=100, phrase_time_limit=50, retries=3):
             break
     else:
         logging.error("Recording failed after all retries")
+    return None
+
+
+def record_audio_bytes(timeout=100, phrase_time_limit=50, retries=3):
+    """
+    Record audio from the microphone and return it as in-memory WAV data.
+
+    Args:
+    timeout (int): Maximum time to wait for a phrase to start (in seconds).
+    phrase_time_limit (int): Maximum time for the phrase to be recorded (in seconds).
+    retries (int): Number of retries if recording fails.
+
+    Returns:
+    bytes: The recorded audio as WAV data, or None if recording failed.
+    """
+    audio_data = capture_audio(timeout, phrase_time_limit, retries)
+    if audio_data is None:
+        return None
+    return audio_data.get_wav_data()
+
+
+def record_audio_vad(sample_rate=16000, chunk_ms=20, timeout=100, hangover_ms=300, threshold_db=12.0,
+                     min_speech_ms=120, on_audio=None):
+    """
+    Record one utterance from the microphone, ending it as soon as the speaker stops.
+
+    Unlike record_audio_bytes, which waits for the recognizer's pause threshold,
+    the utterance is returned once hangover_ms of non-speech follows it.
+
+    Args:
+    sample_rate (int): Microphone sample rate.
+    chunk_ms (int): Size of each microphone read in milliseconds.
+    timeout (int): Maximum time to wait for speech to start (in seconds).
+    hangover_ms (int): Trailing non-speech that ends the utterance.
+    threshold_db (float): Margin above the noise floor for a speech frame.
+    min_speech_ms (int): Consecutive speech needed to start the utterance.
+    on_audio (callable): Optional on_audio(pcm_bytes), called with utterance audio while it is recorded.
+
+    Returns:
+    bytes: The utterance as WAV data, or None if nothing was recorded.
+    """
+    import speech_recognition as sr
+
+    vad = EnergyVAD(sample_rate, threshold_db=threshold_db)
+    endpointer = Endpointer(vad, hangover_ms=hangover_ms, min_speech_ms=min_speech_ms, on_audio=on_audio)
+    chunk_size = sample_rate * chunk_ms // 1000
+    try:
+        with sr.Microphone(sample_rate=sample_rate, chunk_size=chunk_size) as source:
+            logging.info("Recording started")
+            deadline = time.monotonic() + timeout
+            while True:
+                if not endpointer.in_speech and time.monotonic() > deadline:
+                    logging.warning("Listening timed out")
+                    return None
+                utterances = endpointer.feed(source.stream.read(chunk_size))
+                if utterances:
+                    logging.info("Recording complete")
+                    return sr.AudioData(utterances[0], sample_rate, source.SAMPLE_WIDTH).get_wav_data()
+    except Exception as e:
+        logging.error(f"Failed to record audio: {e}")
+        return None
+
+
+def record_audio(file_path, timeout=100, phrase_time_limit=50, retries=3):
+    """
+    Record audio from the microphone and save it as a WAV file.
+
+    Args:
+    file_path (str): The path to save the recorded audio file.
+    timeout (int): Maximum time to wait for a phrase to start (in seconds).
+    phrase_time_limit (int): Maximum time for the phrase to be recorded (in seconds).
+    retries (int): Number of retries if recording fails.
+    """
+    wav_data = record_audio_bytes(timeout, phrase_time_limit, retries)
+    if wav_data is not None:
+        # Save the recorded audio data to a WAV file
+        with open(file_path, "wb") as audio_file:
+            audio_file.write(wav_data)
 
 
 def play_audio(file_path, sleep_duration=1, check_interval=0.1):
     """
-    Play an audio file using pygame.
+    Play an audio file through the shared playback engine, blocking until it has played.
 
     Args:
     file_path (str): The path to the audio file to play.
-    sleep_duration (float): Duration to sleep between checks if the audio is still playing.
-    check_interval (float): Interval to check if the audio is still playing.
+    sleep_duration (float): Unused; kept for backward compatibility.
+    check_interval (float): Unused; completion is signalled by the engine instead of polled.
     """
     try:
-        pygame.mixer.init()
-        pygame.mixer.music.load(file_path)
-        pygame.mixer.music.play()
-        while pygame.mixer.music.get_busy():
-            time.sleep(check_interval)
-        pygame.mixer.quit()
-    except pygame.error as e:
+        with open(file_path, "rb") as audio_file:
+            audio_bytes = audio_file.read()
+    except OSError as e:
         logging.error(f"Failed to play audio: {e}")
+        return
+    play_audio_bytes(audio_bytes, os.path.splitext(file_path)[1].lstrip(".").lower() or None)
+
+
+def play_audio_bytes(audio_bytes, audio_format=None):
+    """
+    Play in-memory audio data through the shared playback engine, blocking until it has played
+    or playback was cancelled.
+
+    Args:
+    audio_bytes (bytes): The encoded audio (e.g. WAV or MP3 data).
+    audio_format (str): Optional format hint for the decoder ('wav', 'mp3').
+    """
+    try:
+        get_player().play(audio_bytes, audio_format)
     except Exception as e:
         logging.error(f"An unexpected error occurred while playing audio: {e}")
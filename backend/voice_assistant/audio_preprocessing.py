@@ -0,0 +1,195 @@
+import io
+import math
+import wave
+import logging
+
+import numpy as np
+
+from backend.voice_assistant.utils import pcm_to_wav
+from backend.voice_assistant.vad import frame_features, pcm_to_float
+
+# Sample rate Whisper and the other STT models work at; anything above it is resampled away server-side
+STT_SAMPLE_RATE = 16000
+
+
+def decode_wav(wav_bytes):
+    """
+    Decode WAV data into float samples.
+
+    Args:
+    wav_bytes (bytes): WAV data with 8, 16 or 32-bit PCM samples.
+
+    Returns:
+    tuple: (float32 array of shape (frames, channels) in [-1, 1], sample rate).
+    """
+    with wave.open(io.BytesIO(wav_bytes), "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        sample_rate = wav_file.getframerate()
+        pcm = wav_file.readframes(wav_file.getnframes())
+    return pcm_to_float(pcm, sample_width).reshape(-1, channels), sample_rate
+
+
+def downmix(samples):
+    """
+    Average the channels of (frames, channels) samples into mono.
+    """
+    if samples.ndim == 1:
+        return samples
+    # A matrix product is several times faster than mean(axis=1) over a short axis
+    return samples @ np.full(samples.shape[1], 1.0 / samples.shape[1], dtype=samples.dtype)
+
+
+def _fast_length(n):
+    # Smallest 2^a * 3^b * 5^c that is at least n; FFTs of such lengths are fast
+    best = 1 << max(0, (n - 1).bit_length())
+    power3 = 1
+    while power3 < best:
+        power35 = power3
+        while power35 < best:
+            length = power35
+            while length < n:
+                length *= 2
+            best = min(best, length)
+            power35 *= 5
+        power3 *= 3
+    return best
+
+
+def resample(samples, from_rate, to_rate):
+    """
+    Resample mono audio by truncating or zero-padding its spectrum.
+
+    The FFT method is band-limited, so downsampling needs no separate
+    anti-aliasing filter, and it works for any rate ratio (44.1 kHz to 16 kHz).
+    The input is zero-padded to a length whose FFT is fast and that maps to a
+    whole number of output samples, then the padding is cut from the result.
+
+    Args:
+    samples (np.ndarray): Mono float samples.
+    from_rate (int): Their sample rate.
+    to_rate (int): The wanted sample rate.
+
+    Returns:
+    np.ndarray: The resampled float32 samples.
+    """
+    if from_rate == to_rate or not len(samples):
+        return samples.astype(np.float32)
+    divisor = math.gcd(from_rate, to_rate)
+    step_in, step_out = from_rate // divisor, to_rate // divisor
+    blocks = _fast_length(-(-len(samples) // step_in))
+    padded, count = blocks * step_in, blocks * step_out
+    spectrum = np.fft.rfft(samples, padded)
+    bins = count // 2 + 1
+    if bins <= len(spectrum):
+        spectrum = spectrum[:bins]
+    else:
+        spectrum = np.concatenate([spectrum, np.zeros(bins - len(spectrum), dtype=spectrum.dtype)])
+    resampled = np.fft.irfft(spectrum, count) * (count / padded)
+    return resampled[:int(round(len(samples) * to_rate / from_rate))].astype(np.float32)
+
+
+def trim_silence(samples, sample_rate, frame_ms=20, floor_db=-50.0, range_db=35.0, pad_ms=200):
+    """
+    Cut leading and trailing silence, keeping pad_ms around the audible part.
+
+    A frame is audible when its energy is above floor_db and within range_db of
+    the loudest frame, so quiet room tone is cut however loud the speaker is.
+
+    Args:
+    samples (np.ndarray): Mono float samples.
+    sample_rate (int): Their sample rate.
+    frame_ms (int): Analysis frame length.
+    floor_db (float): Energy (dBFS) below which a frame is always silence.
+    range_db (float): How far below the loudest frame a frame may be and still count.
+    pad_ms (int): Audio kept before the first and after the last audible frame.
+
+    Returns:
+    np.ndarray: The trimmed samples; unchanged if nothing is audible.
+    """
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    if len(samples) < frame_length:
+        return samples
+    energy_db, _ = frame_features(samples, frame_length)
+    audible = np.flatnonzero(energy_db > max(floor_db, energy_db.max() - range_db))
+    if not len(audible):
+        return samples
+    pad = sample_rate * pad_ms // 1000
+    start = max(0, audible[0] * frame_length - pad)
+    end = min(len(samples), (audible[-1] + 1) * frame_length + pad)
+    return samples[start:end]
+
+
+def to_pcm16(samples):
+    """
+    Convert float samples to 16-bit little-endian PCM bytes.
+    """
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+
+
+def encode_flac(pcm_bytes, sample_rate):
+    """
+    Encode 16-bit mono PCM as FLAC with the encoder bundled with SpeechRecognition.
+
+    Args:
+    pcm_bytes (bytes): 16-bit mono PCM.
+    sample_rate (int): Its sample rate.
+
+    Returns:
+    bytes: The FLAC data.
+    """
+    import speech_recognition as sr
+
+    return sr.AudioData(pcm_bytes, sample_rate, 2).get_flac_data()
+
+
+def encode_upload(samples, sample_rate, codec='wav'):
+    """
+    Encode mono float samples for upload.
+
+    Args:
+    samples (np.ndarray): Mono float samples.
+    sample_rate (int): Their sample rate.
+    codec (str): 'wav' or 'flac'; FLAC falls back to WAV if the encoder is unavailable.
+
+    Returns:
+    tuple: (upload bytes, file name whose extension tells the service the format).
+    """
+    pcm = to_pcm16(samples)
+    if codec == 'flac':
+        try:
+            return encode_flac(pcm, sample_rate), "audio.flac"
+        except Exception as e:
+            logging.warning(f"FLAC encoding failed, uploading WAV: {e}")
+    elif codec != 'wav':
+        raise ValueError(f"Unsupported upload codec: {codec}")
+    return pcm_to_wav(pcm, sample_rate), "audio.wav"
+
+
+def prepare_upload(wav_bytes, sample_rate=STT_SAMPLE_RATE, trim=True, codec='wav'):
+    """
+    Shrink an utterance before it is uploaded for transcription.
+
+    The audio is downmixed to mono, resampled to sample_rate, optionally trimmed
+    of leading and trailing silence, and encoded as 16-bit WAV or lossless FLAC.
+    All processing is done on in-memory numpy buffers. If the audio cannot be
+    decoded it is returned unchanged.
+
+    Args:
+    wav_bytes (bytes): The utterance as WAV data.
+    sample_rate (int): Sample rate of the upload.
+    trim (bool): Cut leading and trailing silence.
+    codec (str): 'wav' or 'flac'; FLAC falls back to WAV if the encoder is unavailable.
+
+    Returns:
+    tuple: (upload bytes, file name whose extension tells the service the format).
+    """
+    try:
+        samples, rate = decode_wav(wav_bytes)
+    except (wave.Error, EOFError, KeyError, ValueError) as e:
+        logging.warning(f"Uploading audio unprocessed: {e}")
+        return wav_bytes, "audio.wav"
+    mono = resample(downmix(samples), rate, sample_rate)
+    if trim:
+        mono = trim_silence(mono, sample_rate)
+    return encode_upload(mono, sample_rate, codec)
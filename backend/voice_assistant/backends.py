@@ -0,0 +1,274 @@
+import time
+import logging
+import importlib
+import threading
+
+ENTRY_POINT_GROUP = 'voice_assistant.backends'
+STAGES = ('stt', 'llm', 'tts')
+
+
+class Backend:
+    """
+    A provider backend for one stage, described without importing it.
+
+    Backends are called as
+        stt: function(api_key, audio_bytes, local_model_path, file_name) -> str
+        llm: function(api_key, chat_history, local_model_path) -> iterable of text fragments
+        tts: function(api_key, text, local_model_path) -> bytes
+    and raise on failure. TTS backends with quality tiers (text_to_speech.TTS_QUALITY_TIERS)
+    also take the tier's request options as a fourth argument.
+
+    Args:
+    target (str or callable): The function, or its "module:function" path, imported on first use.
+    client (str): Provider whose shared SDK client the backend uses ('openai', 'groq', 'deepgram');
+        pre-warming creates it.
+    audio_format (str): For TTS backends, the format of the audio returned ('mp3', 'wav'); None if
+        it varies.
+    warm (str or callable): Optional warm(stage, api_key, local_model_path), or its path, run when
+        the backend is pre-warmed, e.g. to load a model.
+    """
+
+    def __init__(self, target, client=None, audio_format=None, warm=None):
+        self.target = target
+        self.client = client
+        self.audio_format = audio_format
+        self.warm = warm
+
+
+def _warm_local(stage, api_key, local_model_path):
+    from backend.voice_assistant.local_models import get_local_models
+    get_local_models(local_model_path).warm_up([stage])
+
+
+BUILTIN_BACKENDS = {
+    'stt': {
+        'openai': Backend('backend.voice_assistant.transcription:_transcribe_openai', client='openai'),
+        'groq': Backend('backend.voice_assistant.transcription:_transcribe_groq', client='groq'),
+        'deepgram': Backend('backend.voice_assistant.transcription:_transcribe_deepgram', client='deepgram'),
+        'local': Backend('backend.voice_assistant.transcription:_transcribe_local', warm=_warm_local),
+    },
+    'llm': {
+        'openai': Backend('backend.voice_assistant.response_generation:_stream_openai', client='openai'),
+        'groq': Backend('backend.voice_assistant.response_generation:_stream_groq', client='groq'),
+        'local': Backend('backend.voice_assistant.response_generation:_stream_local', warm=_warm_local),
+    },
+    'tts': {
+        'openai': Backend('backend.voice_assistant.text_to_speech:_synthesize_openai', client='openai',
+                          audio_format='mp3'),
+        'deepgram': Backend('backend.voice_assistant.text_to_speech:_synthesize_deepgram', client='deepgram',
+                            audio_format='wav'),
+        'local': Backend('backend.voice_assistant.text_to_speech:_synthesize_local', audio_format='wav',
+                         warm=_warm_local),
+    },
+}
+
+
+def _resolve(target):
+    if callable(target):
+        return target
+    module_name, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class BackendRegistry:
+    """
+    The provider backends available per stage, imported only when first used.
+
+    Selecting a backend costs nothing at startup: its module, and the SDK it
+    needs, are imported on the first call or when it is pre-warmed. Besides the
+    built-in backends, others can be added with register() or by an installed
+    package through an entry point in the 'voice_assistant.backends' group named
+    "<stage>.<name>", e.g. "tts.azure = my_package.tts:synthesize". Entry points
+    are only looked up when a name is not already registered.
+
+    Args:
+    backends (dict): Backend per name per stage; defaults to the built-in backends.
+    entry_point_group (str): Entry point group searched for more backends; None searches none.
+    """
+
+    def __init__(self, backends=None, entry_point_group=ENTRY_POINT_GROUP):
+        backends = BUILTIN_BACKENDS if backends is None else backends
+        self._backends = {stage: dict(backends.get(stage, {})) for stage in STAGES}
+        self._functions = {}
+        self._entry_point_group = entry_point_group
+        self._entry_points_loaded = entry_point_group is None
+        self._lock = threading.Lock()
+
+    def register(self, stage, name, target, client=None, audio_format=None, warm=None):
+        """
+        Add or replace a backend.
+
+        Args:
+        stage (str): The stage ('stt', 'llm', 'tts').
+        name (str): The name it is selected by in Config.
+        target (str or callable): The function, or its "module:function" path.
+        client (str): Provider whose shared SDK client it uses, if any.
+        audio_format (str): For TTS backends, the format of the audio returned.
+        warm (str or callable): Optional warm-up, see Backend.
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage!r}. Must be one of {list(STAGES)}")
+        with self._lock:
+            self._backends[stage][name] = Backend(target, client, audio_format, warm)
+            self._functions.pop((stage, name), None)
+
+    def _load_entry_points(self):
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+            self._entry_points_loaded = True
+            from importlib.metadata import entry_points
+            for entry_point in entry_points(group=self._entry_point_group):
+                stage, _, name = entry_point.name.partition('.')
+                if stage in STAGES and name and name not in self._backends[stage]:
+                    self._backends[stage][name] = Backend(entry_point.value)
+
+    def has(self, stage, name):
+        """
+        Tell whether a backend is available, without importing it.
+
+        Args:
+        stage (str): The stage ('stt', 'llm', 'tts').
+        name (str): The backend name.
+
+        Returns:
+        bool: True if it is registered or provided by an entry point.
+        """
+        if name not in self._backends.get(stage, {}):
+            self._load_entry_points()
+        return name in self._backends.get(stage, {})
+
+    def names(self, stage):
+        """
+        Return the names of the backends available for a stage.
+
+        Args:
+        stage (str): The stage ('stt', 'llm', 'tts').
+
+        Returns:
+        list: The backend names, built-in ones first.
+        """
+        self._load_entry_points()
+        return list(self._backends.get(stage, {}))
+
+    def spec(self, stage, name):
+        """
+        Return the description of a backend.
+
+        Args:
+        stage (str): The stage ('stt', 'llm', 'tts').
+        name (str): The backend name.
+
+        Returns:
+        Backend: The backend.
+
+        Raises:
+        ValueError: If no such backend is available.
+        """
+        if not self.has(stage, name):
+            raise ValueError(f"Unsupported {stage} backend: {name}")
+        return self._backends[stage][name]
+
+    def get(self, stage, name):
+        """
+        Return a backend's function, importing its module on first use.
+
+        Args:
+        stage (str): The stage ('stt', 'llm', 'tts').
+        name (str): The backend name.
+
+        Returns:
+        callable: The backend function.
+        """
+        function = self._functions.get((stage, name))
+        if function is None:
+            function = _resolve(self.spec(stage, name).target)
+            self._functions[(stage, name)] = function
+        return function
+
+    def prewarm(self, stage, name, api_key=None, local_model_path=None):
+        """
+        Import a backend and create what it needs before its first call: its SDK client,
+        with its connection pool, or its local model.
+
+        Args:
+        stage (str): The stage ('stt', 'llm', 'tts').
+        name (str): The backend name.
+        api_key (str): The API key for the backend's provider.
+        local_model_path (str): The path to the local models (if applicable).
+        """
+        backend = self.spec(stage, name)
+        self.get(stage, name)
+        if backend.client is not None:
+            from backend.voice_assistant.clients import get_client
+            get_client(backend.client, api_key)
+        if backend.warm is not None:
+            _resolve(backend.warm)(stage, api_key, local_model_path)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_backend_registry():
+    """
+    Return the process-wide backend registry.
+
+    Returns:
+    BackendRegistry: The shared registry.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = BackendRegistry()
+    return _registry
+
+
+def get_backend(stage, name):
+    """
+    Return the function of a backend from the shared registry, importing it on first use.
+
+    Args:
+    stage (str): The stage ('stt', 'llm', 'tts').
+    name (str): The backend name.
+
+    Returns:
+    callable: The backend function.
+    """
+    return get_backend_registry().get(stage, name)
+
+
+def register_backend(stage, name, target, client=None, audio_format=None, warm=None):
+    """
+    Add a backend to the shared registry, see BackendRegistry.register.
+    """
+    get_backend_registry().register(stage, name, target, client, audio_format, warm)
+
+
+def prewarm_backends(selected, api_keys=None, local_model_path=None):
+    """
+    Pre-warm backends from the shared registry, logging rather than raising failures,
+    since a backend that cannot be warmed may still be skipped by failover.
+
+    Args:
+    selected (dict): Backend names per stage.
+    api_keys (dict): API key per backend name.
+    local_model_path (str): The path to the local models (if applicable).
+
+    Returns:
+    dict: Seconds spent per "stage:name" warmed successfully.
+    """
+    registry = get_backend_registry()
+    api_keys = api_keys or {}
+    timings = {}
+    for stage, names in selected.items():
+        for name in names:
+            start = time.perf_counter()
+            try:
+                registry.prewarm(stage, name, api_keys.get(name), local_model_path)
+            except Exception as e:
+                logging.warning(f"Failed to pre-warm the {name} {stage} backend: {e}")
+                continue
+            timings[f"{stage}:{name}"] = time.perf_counter() - start
+    return timings
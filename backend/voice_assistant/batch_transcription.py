@@ -0,0 +1,222 @@
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from backend.voice_assistant.vad import frame_features
+from backend.voice_assistant.audio_preprocessing import (
+    STT_SAMPLE_RATE, decode_wav, downmix, encode_upload, resample
+)
+
+AUDIO_EXTENSIONS = ('.wav',)
+
+
+def split_at_silence(samples, sample_rate, max_segment_s=30.0, frame_ms=20, window_ms=300, floor_db=-50.0,
+                     range_db=35.0):
+    """
+    Split a recording into segments no longer than max_segment_s, cutting in pauses.
+
+    Each cut is placed at the quietest point, by energy averaged over window_ms,
+    in the second half of the allowed length, so words are not cut in two and
+    segments stay long enough to give the model context. Segments with nothing
+    audible in them (see audio_preprocessing.trim_silence) are left out.
+
+    Args:
+    samples (np.ndarray): Mono float samples.
+    sample_rate (int): Their sample rate.
+    max_segment_s (float): Longest segment.
+    frame_ms (int): Analysis frame length.
+    window_ms (int): Length over which energy is averaged to find a pause.
+    floor_db (float): Energy (dBFS) below which a frame is always silence.
+    range_db (float): How far below the loudest frame a frame may be and still be audible.
+
+    Returns:
+    list: (start, end) sample indices of the segments, in order.
+    """
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    energy_db, _ = frame_features(samples, frame_length)
+    frames = len(energy_db)
+    if not frames:
+        return [(0, len(samples))] if len(samples) else []
+    width = max(1, window_ms // frame_ms)
+    smoothed = np.convolve(energy_db, np.ones(width) / width, mode='same')
+    max_frames = max(2, int(max_segment_s * 1000 / frame_ms))
+
+    cuts = [0]
+    while frames - cuts[-1] > max_frames:
+        low = cuts[-1] + max_frames // 2
+        cuts.append(low + int(np.argmin(smoothed[low:cuts[-1] + max_frames])))
+    cuts.append(frames)
+
+    audible = energy_db > max(floor_db, energy_db.max() - range_db)
+    segments = []
+    for start, end in zip(cuts, cuts[1:]):
+        if audible[start:end].any():
+            # The last segment also takes the trailing partial frame
+            segments.append((start * frame_length, len(samples) if end == frames else end * frame_length))
+    return segments
+
+
+def transcribe_recording(audio_bytes, transcribe, executor, max_segment_s=30.0, codec='flac'):
+    """
+    Transcribe one recording, sending its segments concurrently.
+
+    Args:
+    audio_bytes (bytes): The recording as WAV data.
+    transcribe (callable): transcribe(upload_bytes, file_name) -> str; must raise on failure.
+    executor (Executor): Pool the segment requests run on.
+    max_segment_s (float): Longest segment sent in one request.
+    codec (str): Upload encoding ('flac', 'wav').
+
+    Returns:
+    dict: 'duration' in seconds, the stitched 'text', and 'segments' with 'start' and 'end'
+        seconds and 'text' each.
+    """
+    samples, rate = decode_wav(audio_bytes)
+    mono = resample(downmix(samples), rate, STT_SAMPLE_RATE)
+    spans = split_at_silence(mono, STT_SAMPLE_RATE, max_segment_s)
+
+    def send(start, end):
+        return transcribe(*encode_upload(mono[start:end], STT_SAMPLE_RATE, codec))
+
+    futures = [executor.submit(send, start, end) for start, end in spans]
+    segments = [
+        {"start": round(start / STT_SAMPLE_RATE, 2), "end": round(end / STT_SAMPLE_RATE, 2),
+         "text": (future.result() or "").strip()}
+        for (start, end), future in zip(spans, futures)
+    ]
+    return {
+        "duration": round(len(mono) / STT_SAMPLE_RATE, 2),
+        "text": " ".join(segment["text"] for segment in segments if segment["text"]),
+        "segments": segments,
+    }
+
+
+def iter_audio_files(source):
+    """
+    List the recordings to transcribe.
+
+    Args:
+    source (str): A directory, searched recursively for WAV files, or a manifest: a JSONL file
+        with a 'path' per line or a text file with one path per line. Relative paths in a
+        manifest are relative to the manifest.
+
+    Yields:
+    str: Paths of the recordings.
+    """
+    if os.path.isdir(source):
+        for directory, subdirectories, files in os.walk(source):
+            subdirectories.sort()
+            for name in sorted(files):
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    yield os.path.join(directory, name)
+        return
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line:
+                continue
+            path = json.loads(line)["path"] if source.lower().endswith(".jsonl") else line
+            yield path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def load_done_hashes(path):
+    """
+    Read the content hashes of recordings already transcribed into an output file.
+
+    Args:
+    path (str): The JSONL output of an earlier run; it need not exist.
+
+    Returns:
+    set: sha256 hex digests of the recordings transcribed successfully.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short when an earlier run was killed
+            if record.get("status") == "ok":
+                done.add(record["sha256"])
+    return done
+
+
+def transcribe_batch(paths, transcribe, output_file, concurrency=4, max_segment_s=30.0, codec='flac', done=None):
+    """
+    Transcribe many recordings, writing one JSON line per recording as each is finished.
+
+    Up to concurrency segment requests are in flight at a time, across recordings,
+    so a long recording and many short ones keep the provider equally busy.
+    Recordings whose content hash is in done, or that repeat one seen earlier in
+    the run, are skipped. A recording that cannot be read or transcribed gets an
+    'error' record and the batch carries on.
+
+    Args:
+    paths (iterable): Paths of the recordings.
+    transcribe (callable): transcribe(upload_bytes, file_name) -> str; must raise on failure.
+    output_file (file): Text file the JSON lines are written to.
+    concurrency (int): Most segment requests in flight.
+    max_segment_s (float): Longest segment sent in one request.
+    codec (str): Upload encoding ('flac', 'wav').
+    done (set): Content hashes to skip, e.g. from load_done_hashes().
+
+    Returns:
+    dict: Counts of 'ok', 'failed' and 'skipped' recordings, 'segments' sent and 'audio_seconds'.
+    """
+    seen = set(done or ())
+    stats = {"ok": 0, "failed": 0, "skipped": 0, "segments": 0, "audio_seconds": 0.0}
+
+    def process(path, audio_bytes, digest):
+        record = {"file": path, "sha256": digest}
+        try:
+            record.update(transcribe_recording(audio_bytes, transcribe, segment_executor, max_segment_s, codec))
+            record["status"] = "ok"
+        except Exception as e:
+            logging.error(f"Failed to transcribe {path}: {e}")
+            record.update(status="error", error=str(e))
+        return record
+
+    def write(record):
+        output_file.write(json.dumps(record) + "\n")
+        output_file.flush()
+        if record["status"] == "ok":
+            stats["ok"] += 1
+            stats["segments"] += len(record["segments"])
+            stats["audio_seconds"] += record["duration"]
+        else:
+            stats["failed"] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='stt-segment') as segment_executor, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='stt-file') as file_executor:
+        pending = set()
+        for path in paths:
+            try:
+                with open(path, "rb") as audio_file:
+                    audio_bytes = audio_file.read()
+            except OSError as e:
+                # Recorded like a failed transcription, so the rest of the batch carries on
+                logging.error(f"Failed to read {path}: {e}")
+                write({"file": path, "sha256": None, "status": "error", "error": str(e)})
+                continue
+            digest = hashlib.sha256(audio_bytes).hexdigest()
+            if digest in seen:
+                stats["skipped"] += 1
+                continue
+            seen.add(digest)
+            # Only a window of recordings is held in memory at a time
+            if len(pending) >= concurrency * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future.result())
+            pending.add(file_executor.submit(process, path, audio_bytes, digest))
+        for future in pending:
+            write(future.result())
+    return stats
+
@@ -0,0 +1,220 @@
+import time
+import logging
+import threading
+import numpy as np
+
+
+def encode_jpeg(frame, quality=85, max_width=None):
+    """
+    JPEG-encode a frame in memory, optionally downscaling it first.
+
+    Args:
+    frame (np.ndarray): The BGR frame to encode.
+    quality (int): JPEG quality (0-100).
+    max_width (int): Downscale frames wider than this, keeping the aspect ratio.
+
+    Returns:
+    bytes: The JPEG data, or None if encoding failed.
+    """
+    import cv2
+
+    height, width = frame.shape[:2]
+    if max_width and width > max_width:
+        size = (max_width, max(1, round(height * max_width / width)))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        logging.error("Failed to encode snapshot")
+        return None
+    return encoded.tobytes()
+
+
+class FrameRingBuffer:
+    """
+    Thread-safe ring buffer holding the latest frames and their capture times.
+
+    Storage is allocated once, on the first frame, and frames are copied into it
+    in place, so steady-state capture does not allocate.
+
+    Args:
+    capacity (int): Number of frames kept.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._frames = None
+        self._timestamps = np.full(capacity, -np.inf)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def push(self, frame, timestamp):
+        """
+        Store a frame, overwriting the oldest one when the buffer is full.
+
+        Args:
+        frame (np.ndarray): The frame to store.
+        timestamp (float): The capture time, on the time.monotonic() clock.
+        """
+        with self._lock:
+            if self._frames is None or self._frames.shape[1:] != frame.shape or self._frames.dtype != frame.dtype:
+                # First frame, or the camera changed resolution
+                self._frames = np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+                self._timestamps.fill(-np.inf)
+                self._next = 0
+                self._count = 0
+            np.copyto(self._frames[self._next], frame)
+            self._timestamps[self._next] = timestamp
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def latest(self):
+        """
+        Return a copy of the most recent frame.
+
+        Returns:
+        tuple: (frame, timestamp), or (None, None) if the buffer is empty.
+        """
+        with self._lock:
+            if not self._count:
+                return None, None
+            index = (self._next - 1) % self.capacity
+            return self._frames[index].copy(), float(self._timestamps[index])
+
+    def nearest(self, timestamp):
+        """
+        Return a copy of the frame captured closest to a given time.
+
+        Args:
+        timestamp (float): The time of interest, on the time.monotonic() clock.
+
+        Returns:
+        tuple: (frame, timestamp), or (None, None) if the buffer is empty.
+        """
+        with self._lock:
+            if not self._count:
+                return None, None
+            index = int(np.argmin(np.abs(self._timestamps - timestamp)))
+            return self._frames[index].copy(), float(self._timestamps[index])
+
+
+class CameraCapture:
+    """
+    Background webcam capture into a FrameRingBuffer at a fixed frame rate.
+
+    Args:
+    device (int): The OpenCV camera index.
+    fps (float): Frames captured per second.
+    buffer_size (int): Number of recent frames kept.
+    headless (bool): Skip the preview window.
+    window_name (str): Title of the preview window.
+    """
+
+    def __init__(self, device=0, fps=10, buffer_size=30, headless=False, window_name='Webcam'):
+        self.device = device
+        self.fps = fps
+        self.headless = headless
+        self.window_name = window_name
+        self.frames = FrameRingBuffer(buffer_size)
+        self.stop_event = threading.Event()
+        self._cap = None
+        self._thread = None
+
+    def start(self):
+        """
+        Open the camera and start the capture thread.
+
+        Returns:
+        bool: True if the camera could be opened.
+        """
+        import cv2
+
+        self._cap = cv2.VideoCapture(self.device)
+        if not self._cap.isOpened():
+            logging.error("Error: Could not open webcam.")
+            return False
+        self._cap.set(cv2.CAP_PROP_FPS, self.fps)
+        # Keep the driver from queueing frames, so each read returns a fresh one
+        self._cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        import cv2
+
+        interval = 1.0 / self.fps
+        next_frame = time.monotonic()
+        while not self.stop_event.is_set():
+            ret, frame = self._cap.read()
+            if not ret:
+                logging.error("Error: Failed to capture frame.")
+                self.stop_event.set()
+                break
+            self.frames.push(frame, time.monotonic())
+
+            if not self.headless:
+                cv2.imshow(self.window_name, frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.stop_event.set()
+                    break
+
+            next_frame += interval
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                self.stop_event.wait(delay)
+            else:
+                # Fell behind (slow camera or preview); don't try to catch up
+                next_frame = time.monotonic()
+
+    def snapshot(self, timestamp=None):
+        """
+        Return the frame captured closest to a given time.
+
+        Args:
+        timestamp (float): The time of interest on the time.monotonic() clock; latest frame if None.
+
+        Returns:
+        np.ndarray: A copy of the frame, or None if nothing has been captured.
+        """
+        if timestamp is None:
+            frame, _ = self.frames.latest()
+        else:
+            frame, _ = self.frames.nearest(timestamp)
+        return frame
+
+    def snapshot_jpeg(self, timestamp=None, quality=85, max_width=None):
+        """
+        Return the frame captured closest to a given time, JPEG-encoded in memory.
+
+        Args:
+        timestamp (float): The time of interest on the time.monotonic() clock; latest frame if None.
+        quality (int): JPEG quality (0-100).
+        max_width (int): Downscale frames wider than this, keeping the aspect ratio.
+
+        Returns:
+        bytes: The JPEG data, or None if nothing has been captured.
+        """
+        frame = self.snapshot(timestamp)
+        if frame is None:
+            return None
+        return encode_jpeg(frame, quality, max_width)
+
+    def stop(self):
+        """
+        Stop the capture thread and release the camera.
+        """
+        self.stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        if not self.headless:
+            import cv2
+            cv2.destroyAllWindows()
@@ -0,0 +1,146 @@
+import atexit
+import logging
+import threading
+
+from backend.voice_assistant.config import get_settings
+
+
+class ClientRegistry:
+    """
+    Long-lived provider clients keyed by (provider, api_key, base_url).
+
+    Every OpenAI and Groq client is given its own keep-alive httpx connection pool, so
+    repeated turns reuse an open TLS connection instead of handshaking on every call.
+    Deepgram clients are cached as well; the Deepgram SDK manages its own connections.
+
+    Args:
+    max_connections (int): Maximum open connections per client.
+    max_keepalive_connections (int): Maximum idle keep-alive connections per client.
+    keepalive_expiry (float): Seconds an idle connection is kept open.
+    timeout (float): Request timeout in seconds.
+    """
+
+    PROVIDERS = ('openai', 'groq', 'deepgram')
+
+    def __init__(self, max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0, timeout=60.0):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self._clients = {}
+        self._http_clients = []
+        self._lock = threading.Lock()
+
+    def get(self, provider, api_key, base_url=None):
+        """
+        Return the client for a provider, creating it on first use.
+
+        Args:
+        provider (str): The provider name ('openai', 'groq', 'deepgram').
+        api_key (str): The API key for the provider.
+        base_url (str): Optional endpoint override, e.g. a local stub server.
+
+        Returns:
+        object: The provider SDK client.
+        """
+        key = (provider, api_key, base_url)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._create(provider, api_key, base_url)
+                self._clients[key] = client
+                logging.info(f"Created {provider} client")
+            return client
+
+    def _create_http_client(self):
+        import httpx
+
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            timeout=self.timeout
+        )
+        self._http_clients.append(http_client)
+        return http_client
+
+    def _create(self, provider, api_key, base_url):
+        if provider == 'openai':
+            from openai import OpenAI
+            return OpenAI(api_key=api_key, base_url=base_url, http_client=self._create_http_client())
+        elif provider == 'groq':
+            from groq import Groq
+            return Groq(api_key=api_key, base_url=base_url, http_client=self._create_http_client())
+        elif provider == 'deepgram':
+            from deepgram import DeepgramClient, DeepgramClientOptions
+            if base_url:
+                return DeepgramClient(api_key, DeepgramClientOptions(url=base_url))
+            return DeepgramClient(api_key)
+        raise ValueError(f"Unsupported provider: {provider}")
+
+    def close(self):
+        """
+        Close all connection pools and forget the cached clients.
+        """
+        with self._lock:
+            for http_client in self._http_clients:
+                try:
+                    http_client.close()
+                except Exception as e:
+                    logging.warning(f"Failed to close HTTP client: {e}")
+            self._http_clients = []
+            self._clients = {}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    Return the process-wide client registry, configured from get_settings().
+
+    Returns:
+    ClientRegistry: The shared registry.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                settings = get_settings()
+                _registry = ClientRegistry(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+                    timeout=settings.HTTP_TIMEOUT
+                )
+                atexit.register(_registry.close)
+    return _registry
+
+
+def get_client(provider, api_key, base_url=None):
+    """
+    Return the shared client for a provider and API key.
+
+    Args:
+    provider (str): The provider name ('openai', 'groq', 'deepgram').
+    api_key (str): The API key for the provider.
+    base_url (str): Optional endpoint override.
+
+    Returns:
+    object: The provider SDK client.
+    """
+    return get_registry().get(provider, api_key, base_url)
+
+
+def close_clients():
+    """
+    Close the shared registry's connection pools.
+    """
+    if _registry is not None:
+        _registry.close()
@@ -1,10 +1,36 @@
 # voice_assistant/config.py
 
 import os
-from dotenv import load_dotenv, find_dotenv
+import threading
 
-# Load environment variables from the .env file
-load_dotenv(find_dotenv())
+from backend.voice_assistant.backends import get_backend_registry
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def find_env_file():
+    """
+    Locate the .env file to load: DOTENV_PATH if set, otherwise a .env in the
+    working directory or the repository root. Only these paths are checked,
+    rather than every directory up the tree.
+
+    Returns:
+    str: The path of the .env file, or None if there is none.
+    """
+    if os.environ.get("DOTENV_PATH"):
+        return os.environ["DOTENV_PATH"]
+    for directory in (os.getcwd(), REPO_ROOT):
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+# Load environment variables from the .env file; python-dotenv is only imported if there is one
+_env_file = find_env_file()
+if _env_file:
+    from dotenv import load_dotenv
+    load_dotenv(_env_file)
 
 
 class Config:
@@ -12,24 +38,232 @@ class Config:
     Configuration class to hold the model selection and API keys.
 
     Attributes:
-    TRANSCRIPTION_MODEL (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'local').
-    RESPONSE_MODEL (str): The model to use for response generation ('openai', 'groq', 'local').
-    TTS_MODEL (str): The model to use for text-to-speech ('openai', 'deepgram', 'local').
+    TRANSCRIPTION_MODEL (str): The transcription backend ('openai', 'groq', 'deepgram', 'local', or a plugin).
+    RESPONSE_MODEL (str): The response backend ('openai', 'groq', 'local', or a plugin).
+    TTS_MODEL (str): The text-to-speech backend ('openai', 'deepgram', 'local', or a plugin).
+    TRANSCRIPTION_FALLBACKS (list): Transcription models tried, in order, when TRANSCRIPTION_MODEL fails.
+    RESPONSE_FALLBACKS (list): Response models tried, in order, when RESPONSE_MODEL fails.
+    TTS_FALLBACKS (list): TTS models tried, in order, when TTS_MODEL fails.
+    STT_TIMEOUT (float): Seconds a transcription provider gets before the next one is tried.
+    LLM_TIMEOUT (float): Seconds a response provider gets to produce its first token.
+    TTS_TIMEOUT (float): Seconds a TTS provider gets before the next one is tried.
+    HEDGE_REQUESTS (bool): Also send a request to the next provider when one is slower than its recent p95.
+    CIRCUIT_WINDOW (int): Recent calls per provider that its circuit breaker looks at.
+    CIRCUIT_ERROR_RATE (float): Error rate over the window that stops calls to a provider.
+    CIRCUIT_SLOW_SECONDS (float): Calls this slow count towards CIRCUIT_SLOW_RATE; unset ignores latency.
+    CIRCUIT_SLOW_RATE (float): Share of slow calls over the window that stops calls to a provider.
+    CIRCUIT_COOLDOWN (float): Seconds a stopped provider is skipped before it is tried again.
+    PREWARM_PROVIDERS (bool): Import the configured backends, create their clients and load local models
+        at startup rather than in the first turn.
     OPENAI_API_KEY (str): API key for OpenAI services.
     GROQ_API_KEY (str): API key for Groq services.
     DEEPGRAM_API_KEY (str): API key for Deepgram services.
-    LOCAL_MODEL_PATH (str): Path to the local model.
+    LOCAL_MODEL_PATH (str): Path to the directory holding the local models.
+    LOCAL_STT_MODEL (str): Explicit local Whisper model (directory or size name), overriding LOCAL_MODEL_PATH.
+    LOCAL_LLM_MODEL (str): Explicit local GGUF model file, overriding LOCAL_MODEL_PATH.
+    LOCAL_TTS_MODEL (str): Explicit local Piper voice file, overriding LOCAL_MODEL_PATH.
+    LOCAL_NUM_THREADS (int): CPU threads per local model; unset lets each library decide.
+    PIPELINE_MODE (str): How a turn is run ('sequential', 'streaming').
+    HTTP_MAX_CONNECTIONS (int): Maximum open connections per provider client.
+    HTTP_MAX_KEEPALIVE_CONNECTIONS (int): Maximum idle keep-alive connections per provider client.
+    HTTP_KEEPALIVE_EXPIRY (float): Seconds an idle connection is kept open.
+    HTTP_TIMEOUT (float): Request timeout for provider calls, in seconds.
+    SYSTEM_PROMPT (str): The system message every conversation starts with.
+    SERVER_HOST (str): Address the async server listens on.
+    SERVER_PORT (int): Port the async server listens on.
+    SERVER_MAX_WORKERS (int): Threads available for blocking provider calls, shared by all sessions.
+    SERVER_SESSION_QUEUE_SIZE (int): Utterances a session may queue before the server stops reading from it.
+    SERVER_MAX_FRAME_BYTES (int): Largest frame a client may send.
+    SESSION_TRANSCRIPTION_MODELS (list): Transcription models a server session may choose besides
+        TRANSCRIPTION_MODEL and its fallbacks.
+    SESSION_RESPONSE_MODELS (list): Response models a server session may choose besides RESPONSE_MODEL
+        and its fallbacks.
+    SESSION_TTS_MODELS (list): TTS models a server session may choose besides TTS_MODEL and its fallbacks.
+    CAMERA_DEVICE (int): OpenCV index of the webcam.
+    CAMERA_FPS (float): Frames captured per second.
+    CAMERA_BUFFER_SIZE (int): Number of recent frames kept in memory.
+    CAMERA_HEADLESS (bool): Run without the webcam preview window.
+    SNAPSHOT_JPEG_QUALITY (int): JPEG quality of the per-turn snapshot.
+    SNAPSHOT_MAX_WIDTH (int): Snapshots wider than this are downscaled before upload.
+    VISION_ENABLED (bool): Attach the snapshot to the user message for vision-capable models.
+    VISION_DETAIL (str): Image detail level requested from the model ('low', 'high', 'auto').
+    VISION_KEEP_IMAGES (int): Number of recent turns whose images stay in the chat history.
+    AUDIO_ENDPOINTING (str): How the end of an utterance is detected ('vad', 'recognizer').
+    VAD_SAMPLE_RATE (int): Microphone sample rate used with VAD endpointing.
+    VAD_HANGOVER_MS (int): Trailing silence that ends an utterance.
+    VAD_THRESHOLD_DB (float): Energy margin above the noise floor for speech.
+    VAD_MIN_SPEECH_MS (int): Consecutive speech needed to start an utterance.
+    BARGE_IN (bool): Keep listening while the assistant speaks and stop it when the user talks (requires
+        VAD endpointing; use headphones or an echo-cancelling microphone).
+    BARGE_IN_MIN_SPEECH_MS (int): Speech needed to interrupt the assistant.
+    SPECULATION (str): Start the LLM request from stable partial transcripts ('off', 'conservative',
+        'balanced', 'aggressive'); needs streaming transcription and the streaming pipeline.
+    STREAMING_TRANSCRIPTION (bool): Transcribe while the user is speaking (requires VAD endpointing).
+    STT_PREPROCESS (bool): Downmix and resample audio to 16 kHz mono before uploading it for transcription.
+    STT_TRIM_SILENCE (bool): Also cut leading and trailing silence before uploading.
+    STT_UPLOAD_CODEC (str): Encoding of transcription uploads ('flac', or 'wav' to skip the encoder).
+    STT_SEGMENT_MS (int): Segment length for chunked streaming transcription.
+    STT_OVERLAP_MS (int): Overlap between consecutive segments.
+    PLAYBACK_SINK (str): Where speech is played ('device', 'null', 'file').
+    PLAYBACK_FILE (str): WAV file written by the 'file' playback sink.
+    TTS_CACHE_ENABLED (bool): Reuse synthesized audio for phrases that were spoken before.
+    TTS_CACHE_MAX_BYTES (int): Memory budget of the TTS cache.
+    TTS_CACHE_DIR (str): Directory for the on-disk TTS cache tier; unset keeps the cache in memory only.
+    TTS_CACHE_DISK_MAX_BYTES (int): Disk budget of the TTS cache.
+    TTS_ADAPTIVE_QUALITY (bool): Pick each TTS request's quality tier from measured latency and bandwidth.
+    TTS_QUALITY_MIN (str): Lowest TTS quality tier adaptive quality may use ('low', 'medium', 'high').
+    TTS_QUALITY_MAX (str): Highest TTS quality tier adaptive quality may use.
+    TTS_TARGET_SECONDS (float): Time a TTS request should take at most; adaptive quality picks the best
+        tier predicted to meet it.
+    TTS_QUALITY_WINDOW (int): Recent TTS requests the latency and bandwidth estimates are made from.
+    RESPONSE_CACHE_ENABLED (bool): Answer repeated questions from a cache instead of the LLM. With vision,
+        questions that may be about the webcam image are not cached.
+    RESPONSE_CACHE_MAX_ENTRIES (int): Most answers the response cache keeps.
+    RESPONSE_CACHE_TTL (float): Seconds a cached answer stays valid.
+    RESPONSE_CACHE_SIMILARITY (str): How near-duplicate questions are matched ('exact', 'ngram', 'embedding').
+    RESPONSE_CACHE_THRESHOLD (float): Similarity a near-duplicate question needs to reuse an answer.
+    RESPONSE_CACHE_CONTEXT_MESSAGES (int): Preceding messages that must also match for a cached answer to be used.
+    METRICS_TRACE_FILE (str): JSONL file that receives a timing trace per turn; unset disables it.
+    METRICS_PROMETHEUS_FILE (str): File rewritten with Prometheus metrics after every turn; unset disables it.
+    SESSION_RECORD_DIR (str): Directory under which each session's audio, frames and provider calls are
+        recorded for offline replay; unset disables recording.
+    CONTEXT_MAX_TOKENS (int): Approximate token budget for the chat history sent each turn.
+    CONTEXT_KEEP_RECENT (int): Number of recent messages that are never trimmed.
+    CONTEXT_SUMMARIZE (bool): Summarize trimmed turns instead of dropping them.
     """
     # Model selection
     TRANSCRIPTION_MODEL = 'openai'  # possible values: openai, groq
     RESPONSE_MODEL = 'openai'       # possible values: openai, groq
     TTS_MODEL = 'deepgram'        # possible values: openai, deepgram
 
+    # Provider fallbacks, e.g. RESPONSE_FALLBACKS=groq,local
+    TRANSCRIPTION_FALLBACKS = [name.strip() for name in os.environ.get(
+        "TRANSCRIPTION_FALLBACKS", "").split(",") if name.strip()]
+    RESPONSE_FALLBACKS = [name.strip() for name in os.environ.get(
+        "RESPONSE_FALLBACKS", "").split(",") if name.strip()]
+    TTS_FALLBACKS = [name.strip() for name in os.environ.get(
+        "TTS_FALLBACKS", "").split(",") if name.strip()]
+
+    # Provider routing
+    STT_TIMEOUT = float(os.environ.get("STT_TIMEOUT", 15))
+    LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 10))
+    TTS_TIMEOUT = float(os.environ.get("TTS_TIMEOUT", 10))
+    HEDGE_REQUESTS = os.environ.get("HEDGE_REQUESTS", "false").lower() == "true"
+    CIRCUIT_WINDOW = int(os.environ.get("CIRCUIT_WINDOW", 20))
+    CIRCUIT_ERROR_RATE = float(os.environ.get("CIRCUIT_ERROR_RATE", 0.5))
+    CIRCUIT_SLOW_SECONDS = float(os.environ["CIRCUIT_SLOW_SECONDS"]) if os.environ.get(
+        "CIRCUIT_SLOW_SECONDS") else None
+    CIRCUIT_SLOW_RATE = float(os.environ.get("CIRCUIT_SLOW_RATE", 0.5))
+    CIRCUIT_COOLDOWN = float(os.environ.get("CIRCUIT_COOLDOWN", 30))
+    PREWARM_PROVIDERS = os.environ.get("PREWARM_PROVIDERS", "true").lower() == "true"
+
+    # Turn pipeline
+    PIPELINE_MODE = 'streaming'     # possible values: sequential, streaming
+    SYSTEM_PROMPT = "You are a helpful Assistant. Keep your answers short and concise."
+
     # API keys and paths
     OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
     GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
     DEEPGRAM_API_KEY = os.environ.get("DEEPGRAM_API_KEY")
     LOCAL_MODEL_PATH = os.environ.get("LOCAL_MODEL_PATH")
+    LOCAL_STT_MODEL = os.environ.get("LOCAL_STT_MODEL")
+    LOCAL_LLM_MODEL = os.environ.get("LOCAL_LLM_MODEL")
+    LOCAL_TTS_MODEL = os.environ.get("LOCAL_TTS_MODEL")
+    LOCAL_NUM_THREADS = int(os.environ["LOCAL_NUM_THREADS"]) if os.environ.get("LOCAL_NUM_THREADS") else None
+
+    # Provider HTTP connection pools
+    HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 20))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+        os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", 10))
+    HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", 60))
+    HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 60))
+
+    # Webcam
+    CAMERA_DEVICE = int(os.environ.get("CAMERA_DEVICE", 0))
+    CAMERA_FPS = float(os.environ.get("CAMERA_FPS", 10))
+    CAMERA_BUFFER_SIZE = int(os.environ.get("CAMERA_BUFFER_SIZE", 30))
+    CAMERA_HEADLESS = os.environ.get("CAMERA_HEADLESS", "false").lower() == "true"
+    SNAPSHOT_JPEG_QUALITY = int(os.environ.get("SNAPSHOT_JPEG_QUALITY", 70))
+    SNAPSHOT_MAX_WIDTH = int(os.environ.get("SNAPSHOT_MAX_WIDTH", 512))
+
+    # Vision
+    VISION_ENABLED = os.environ.get("VISION_ENABLED", "true").lower() == "true"
+    VISION_DETAIL = os.environ.get("VISION_DETAIL", "low")
+    VISION_KEEP_IMAGES = int(os.environ.get("VISION_KEEP_IMAGES", 1))
+
+    # Endpointing
+    AUDIO_ENDPOINTING = os.environ.get("AUDIO_ENDPOINTING", "vad")  # possible values: vad, recognizer
+    VAD_SAMPLE_RATE = int(os.environ.get("VAD_SAMPLE_RATE", 16000))
+    VAD_HANGOVER_MS = int(os.environ.get("VAD_HANGOVER_MS", 300))
+    VAD_THRESHOLD_DB = float(os.environ.get("VAD_THRESHOLD_DB", 12))
+    VAD_MIN_SPEECH_MS = int(os.environ.get("VAD_MIN_SPEECH_MS", 120))
+
+    # Speculative responses
+    SPECULATION = os.environ.get("SPECULATION", "off")  # possible values: off, conservative, balanced, aggressive
+
+    # Barge-in
+    BARGE_IN = os.environ.get("BARGE_IN", "false").lower() == "true"
+    BARGE_IN_MIN_SPEECH_MS = int(os.environ.get("BARGE_IN_MIN_SPEECH_MS", 200))
+
+    # Streaming transcription
+    STREAMING_TRANSCRIPTION = os.environ.get("STREAMING_TRANSCRIPTION", "true").lower() == "true"
+    STT_PREPROCESS = os.environ.get("STT_PREPROCESS", "true").lower() == "true"
+    STT_TRIM_SILENCE = os.environ.get("STT_TRIM_SILENCE", "true").lower() == "true"
+    STT_UPLOAD_CODEC = os.environ.get("STT_UPLOAD_CODEC", "flac")  # possible values: flac, wav
+    STT_SEGMENT_MS = int(os.environ.get("STT_SEGMENT_MS", 4000))
+    STT_OVERLAP_MS = int(os.environ.get("STT_OVERLAP_MS", 800))
+
+    # Playback
+    PLAYBACK_SINK = os.environ.get("PLAYBACK_SINK", "device")  # possible values: device, null, file
+    PLAYBACK_FILE = os.environ.get("PLAYBACK_FILE", "playback.wav")
+
+    # TTS cache
+    TTS_CACHE_ENABLED = os.environ.get("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR")
+    TTS_CACHE_DISK_MAX_BYTES = int(
+        os.environ.get("TTS_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024))
+
+    # Adaptive TTS quality
+    TTS_ADAPTIVE_QUALITY = os.environ.get("TTS_ADAPTIVE_QUALITY", "false").lower() == "true"
+    TTS_QUALITY_MIN = os.environ.get("TTS_QUALITY_MIN", "low")  # possible values: low, medium, high
+    TTS_QUALITY_MAX = os.environ.get("TTS_QUALITY_MAX", "high")
+    TTS_TARGET_SECONDS = float(os.environ.get("TTS_TARGET_SECONDS", 1.0))
+    TTS_QUALITY_WINDOW = int(os.environ.get("TTS_QUALITY_WINDOW", 20))
+
+    # Response cache
+    RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 512))
+    RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 24 * 3600))
+    RESPONSE_CACHE_SIMILARITY = os.environ.get("RESPONSE_CACHE_SIMILARITY", "ngram")  # possible values: exact, ngram, embedding
+    RESPONSE_CACHE_THRESHOLD = float(os.environ.get("RESPONSE_CACHE_THRESHOLD", 0.85))
+    RESPONSE_CACHE_CONTEXT_MESSAGES = int(os.environ.get("RESPONSE_CACHE_CONTEXT_MESSAGES", 0))
+
+    # Metrics
+    METRICS_TRACE_FILE = os.environ.get("METRICS_TRACE_FILE")
+    METRICS_PROMETHEUS_FILE = os.environ.get("METRICS_PROMETHEUS_FILE")
+    SESSION_RECORD_DIR = os.environ.get("SESSION_RECORD_DIR")
+
+    # Chat history
+    CONTEXT_MAX_TOKENS = int(os.environ.get("CONTEXT_MAX_TOKENS", 3000))
+    CONTEXT_KEEP_RECENT = int(os.environ.get("CONTEXT_KEEP_RECENT", 4))
+    CONTEXT_SUMMARIZE = os.environ.get("CONTEXT_SUMMARIZE", "true").lower() == "true"
+
+    # Async server
+    SERVER_HOST = os.environ.get("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.environ.get("SERVER_PORT", 8765))
+    SERVER_MAX_WORKERS = int(os.environ.get("SERVER_MAX_WORKERS", 32))
+    SERVER_SESSION_QUEUE_SIZE = int(
+        os.environ.get("SERVER_SESSION_QUEUE_SIZE", 2))
+    SERVER_MAX_FRAME_BYTES = int(
+        os.environ.get("SERVER_MAX_FRAME_BYTES", 10 * 1024 * 1024))
+    # Extra models sessions may select, e.g. SESSION_TTS_MODELS=openai; 'local' loads models in the server
+    SESSION_TRANSCRIPTION_MODELS = [name.strip() for name in os.environ.get(
+        "SESSION_TRANSCRIPTION_MODELS", "").split(",") if name.strip()]
+    SESSION_RESPONSE_MODELS = [name.strip() for name in os.environ.get(
+        "SESSION_RESPONSE_MODELS", "").split(",") if name.strip()]
+    SESSION_TTS_MODELS = [name.strip() for name in os.environ.get(
+        "SESSION_TTS_MODELS", "").split(",") if name.strip()]
 
     @staticmethod
     def validate_config():
@@ -39,31 +273,235 @@ class Config:
         Raises:
         ValueError: If a required environment variable is not set.
         """
-        if Config.TRANSCRIPTION_MODEL not in ['openai', 'groq', 'deepgram', 'local']:
-            raise ValueError(
-                "Invalid TRANSCRIPTION_MODEL. Must be one of ['openai', 'groq', 'deepgram', 'local']")
-        if Config.RESPONSE_MODEL not in ['openai', 'groq', 'local']:
-            raise ValueError(
-                "Invalid RESPONSE_MODEL. Must be one of ['openai', 'groq', 'local']")
-        if Config.TTS_MODEL not in ['openai', 'deepgram', 'local']:
-            raise ValueError(
-                "Invalid TTS_MODEL. Must be one of ['openai', 'deepgram', 'local']")
-
-        if Config.TRANSCRIPTION_MODEL == 'openai' and not Config.OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY is required for OpenAI models")
-        if Config.TRANSCRIPTION_MODEL == 'groq' and not Config.GROQ_API_KEY:
-            raise ValueError("GROQ_API_KEY is required for Groq models")
-        if Config.TRANSCRIPTION_MODEL == 'deepgram' and not Config.DEEPGRAM_API_KEY:
-            raise ValueError(
-                "DEEPGRAM_API_KEY is required for Deepgram models")
-
-        if Config.RESPONSE_MODEL == 'openai' and not Config.OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY is required for OpenAI models")
-        if Config.RESPONSE_MODEL == 'groq' and not Config.GROQ_API_KEY:
-            raise ValueError("GROQ_API_KEY is required for Groq models")
-
-        if Config.TTS_MODEL == 'openai' and not Config.OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY is required for OpenAI models")
-        if Config.TTS_MODEL == 'deepgram' and not Config.DEEPGRAM_API_KEY:
-            raise ValueError(
-                "DEEPGRAM_API_KEY is required for Deepgram models")
+        validate_settings(Config)
+
+
+# Settings that shape a session's conversation but not its provider calls, left out of the
+# keys Providers and response caches are shared by
+CONVERSATION_SETTINGS = ('SYSTEM_PROMPT', 'CONTEXT_MAX_TOKENS', 'CONTEXT_KEEP_RECENT', 'CONTEXT_SUMMARIZE')
+
+# Provider names whose API key is in settings, and the setting holding it
+API_KEY_SETTINGS = {'openai': 'OPENAI_API_KEY', 'groq': 'GROQ_API_KEY', 'deepgram': 'DEEPGRAM_API_KEY'}
+
+
+def validate_settings(settings):
+    """
+    Validate a configuration: Config itself or a Settings object.
+
+    Args:
+    settings (object): Anything with the attributes of Config.
+
+    Raises:
+    ValueError: If a setting is invalid or a required API key is not set.
+    """
+    backends = get_backend_registry()
+    for name, stage, model in (('TRANSCRIPTION_MODEL', 'stt', settings.TRANSCRIPTION_MODEL),
+                               ('RESPONSE_MODEL', 'llm', settings.RESPONSE_MODEL),
+                               ('TTS_MODEL', 'tts', settings.TTS_MODEL)):
+        if not backends.has(stage, model):
+            raise ValueError(f"Invalid {name}. Must be one of {backends.names(stage)}")
+    if settings.PIPELINE_MODE not in ['sequential', 'streaming']:
+        raise ValueError(
+            "Invalid PIPELINE_MODE. Must be one of ['sequential', 'streaming']")
+    if settings.AUDIO_ENDPOINTING not in ['vad', 'recognizer']:
+        raise ValueError(
+            "Invalid AUDIO_ENDPOINTING. Must be one of ['vad', 'recognizer']")
+    if settings.BARGE_IN and settings.AUDIO_ENDPOINTING != 'vad':
+        raise ValueError("BARGE_IN requires AUDIO_ENDPOINTING='vad'")
+    if settings.SPECULATION not in ['off', 'conservative', 'balanced', 'aggressive']:
+        raise ValueError(
+            "Invalid SPECULATION. Must be one of ['off', 'conservative', 'balanced', 'aggressive']")
+    if settings.RESPONSE_CACHE_SIMILARITY not in ['exact', 'ngram', 'embedding']:
+        raise ValueError(
+            "Invalid RESPONSE_CACHE_SIMILARITY. Must be one of ['exact', 'ngram', 'embedding']")
+    if settings.STT_UPLOAD_CODEC not in ['wav', 'flac']:
+        raise ValueError(
+            "Invalid STT_UPLOAD_CODEC. Must be one of ['wav', 'flac']")
+    if settings.PLAYBACK_SINK not in ['device', 'null', 'file']:
+        raise ValueError(
+            "Invalid PLAYBACK_SINK. Must be one of ['device', 'null', 'file']")
+    tiers = ['low', 'medium', 'high']
+    for name, tier in (('TTS_QUALITY_MIN', settings.TTS_QUALITY_MIN), ('TTS_QUALITY_MAX', settings.TTS_QUALITY_MAX)):
+        if tier not in tiers:
+            raise ValueError(f"Invalid {name}. Must be one of {tiers}")
+    if tiers.index(settings.TTS_QUALITY_MIN) > tiers.index(settings.TTS_QUALITY_MAX):
+        raise ValueError("TTS_QUALITY_MIN must not be above TTS_QUALITY_MAX")
+
+    for name, stage, models in (('TRANSCRIPTION_FALLBACKS', 'stt', settings.TRANSCRIPTION_FALLBACKS),
+                                ('RESPONSE_FALLBACKS', 'llm', settings.RESPONSE_FALLBACKS),
+                                ('TTS_FALLBACKS', 'tts', settings.TTS_FALLBACKS),
+                                ('SESSION_TRANSCRIPTION_MODELS', 'stt', settings.SESSION_TRANSCRIPTION_MODELS),
+                                ('SESSION_RESPONSE_MODELS', 'llm', settings.SESSION_RESPONSE_MODELS),
+                                ('SESSION_TTS_MODELS', 'tts', settings.SESSION_TTS_MODELS)):
+        for model in models:
+            if not backends.has(stage, model):
+                raise ValueError(f"Invalid {name} entry {model!r}. Must be one of {backends.names(stage)}")
+
+    # Every model that may be called, including fallbacks, needs its key
+    used = ({settings.TRANSCRIPTION_MODEL, settings.RESPONSE_MODEL, settings.TTS_MODEL}
+            | set(settings.TRANSCRIPTION_FALLBACKS) | set(settings.RESPONSE_FALLBACKS) | set(settings.TTS_FALLBACKS))
+    if 'openai' in used and not settings.OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY is required for OpenAI models")
+    if 'groq' in used and not settings.GROQ_API_KEY:
+        raise ValueError("GROQ_API_KEY is required for Groq models")
+    if 'deepgram' in used and not settings.DEEPGRAM_API_KEY:
+        raise ValueError(
+            "DEEPGRAM_API_KEY is required for Deepgram models")
+    if (settings.RESPONSE_CACHE_ENABLED and settings.RESPONSE_CACHE_SIMILARITY == 'embedding'
+            and not settings.OPENAI_API_KEY):
+        raise ValueError("OPENAI_API_KEY is required for the response cache's embedding similarity")
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, (list, tuple)) else value
+
+
+class Settings:
+    """
+    An immutable, validated snapshot of the configuration.
+
+    It holds every setting of Config under the same name, with lists made into
+    tuples, and is validated when it is built, so an invalid configuration fails
+    at startup rather than in a turn. API keys are looked up per provider once.
+    A variation, e.g. other models for one tenant's sessions, is made with
+    replace(), which returns a new Settings and leaves this one, and every
+    session using it, untouched. Settings are hashable, so objects built from
+    them, such as Providers, can be shared between equal settings.
+
+    Args:
+    values (dict): Value per setting name.
+
+    Raises:
+    ValueError: If the settings are invalid.
+    """
+
+    def __init__(self, values):
+        values = {name: _freeze(value) for name, value in values.items()}
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_api_keys', {provider: values.get(name)
+                                               for provider, name in API_KEY_SETTINGS.items()})
+        object.__setattr__(self, '_hash', hash(tuple(sorted(values.items()))))
+        validate_settings(self)
+
+    @classmethod
+    def from_config(cls, config=None, **overrides):
+        """
+        Snapshot the settings of a Config class.
+
+        Args:
+        config (type): The Config class to read; defaults to Config.
+        **overrides: Settings to change, see replace().
+
+        Returns:
+        Settings: The validated settings.
+        """
+        config = config or Config
+        values = {name: getattr(config, name) for name in dir(config) if name.isupper()}
+        return cls(values).replace(**overrides) if overrides else cls(values)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"No setting named {name}") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings are immutable; use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError("Settings are immutable; use replace()")
+
+    def __eq__(self, other):
+        return isinstance(other, Settings) and self._values == other._values
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        shown = {name: '***' if name.endswith('_API_KEY') and value else value
+                 for name, value in self._values.items()}
+        return f"Settings({shown})"
+
+    def replace(self, **overrides):
+        """
+        Return new settings with some values changed.
+
+        Args:
+        **overrides: New value per setting name; each must have the type of the current value
+            (lists are accepted for tuples and ints for floats).
+
+        Returns:
+        Settings: The validated settings.
+
+        Raises:
+        ValueError: If a name is unknown, a value has the wrong type or the result is invalid.
+        """
+        values = dict(self._values)
+        for name, value in overrides.items():
+            if name not in values:
+                raise ValueError(f"Unknown setting {name}")
+            value = _freeze(value)
+            current = values[name]
+            if current is not None and value is not None:
+                if type(current) is float and type(value) is int:
+                    value = float(value)
+                if type(value) is not type(current):
+                    raise ValueError(f"Invalid {name}: expected {type(current).__name__}, got {type(value).__name__}")
+            values[name] = value
+        return Settings(values)
+
+    def key(self, exclude=()):
+        """
+        Return a hashable key of the settings, leaving some out.
+
+        Args:
+        exclude (iterable): Setting names left out, e.g. CONVERSATION_SETTINGS.
+
+        Returns:
+        tuple: (name, value) pairs of the other settings.
+        """
+        exclude = set(exclude)
+        return tuple(sorted(item for item in self._values.items() if item[0] not in exclude))
+
+    def api_key(self, provider):
+        """
+        Return the API key for a provider.
+
+        Args:
+        provider (str): The provider name ('openai', 'groq', 'deepgram', 'local', or a plugin).
+
+        Returns:
+        str: The API key, or None for providers that need none.
+        """
+        return self._api_keys.get(provider)
+
+    def as_dict(self):
+        """
+        Return the settings as a dict, e.g. to record them.
+
+        Returns:
+        dict: Value per setting name.
+        """
+        return dict(self._values)
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def get_settings():
+    """
+    Return the process-wide Settings, built from Config and validated on first use.
+
+    Returns:
+    Settings: The shared settings.
+
+    Raises:
+    ValueError: If the configuration is invalid.
+    """
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings.from_config()
+    return _settings
@@ -0,0 +1,190 @@
+import math
+import logging
+from collections import deque
+
+from backend.voice_assistant.vision import IMAGE_PLACEHOLDER, evict_images, message_text
+
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+# What an attached image costs at each detail level
+IMAGE_TOKENS = {'low': 85, 'high': 765, 'auto': 765}
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below in a few sentences for your own future reference. "
+    "Keep names, facts, numbers and open questions; drop small talk."
+)
+
+
+def estimate_tokens(message):
+    """
+    Approximate the number of tokens a chat message uses.
+
+    Uses the common ~4 characters per token rule, which is close enough for
+    budgeting without loading a tokenizer.
+
+    Args:
+    message (dict): The chat message.
+
+    Returns:
+    int: The estimated token count.
+    """
+    tokens = MESSAGE_OVERHEAD_TOKENS + math.ceil(len(message_text(message)) / 4)
+    content = message.get("content")
+    if isinstance(content, list):
+        for part in content:
+            if part.get("type") == "image_url":
+                tokens += IMAGE_TOKENS.get(part["image_url"].get("detail", "auto"), IMAGE_TOKENS['auto'])
+    return tokens
+
+
+def llm_summarizer(generate):
+    """
+    Build a summarizer for ChatContext that asks an LLM to condense old turns.
+
+    Args:
+    generate (callable): generate(chat_history) -> str, e.g. a bound generate_response.
+
+    Returns:
+    callable: summarize(previous_summary, messages) -> str.
+    """
+    def summarize(previous_summary, messages):
+        lines = []
+        if previous_summary:
+            lines.append(f"Earlier summary: {previous_summary}")
+        for message in messages:
+            lines.append(f"{message['role']}: {message_text(message)}")
+        return generate([
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": "\n".join(lines)}
+        ])
+    return summarize
+
+
+class ChatContext:
+    """
+    Chat history bounded by an approximate token budget.
+
+    The system prompt is always sent first. Token counts are tracked per message
+    as messages are added and removed, so checking the budget never re-counts
+    the whole history. When the budget is exceeded the oldest turns are dropped
+    down to a low-water mark, leaving headroom so this happens every few turns
+    rather than on every turn. If a summarizer is given, dropped turns are folded
+    into a running summary that is sent right after the system prompt.
+
+    Args:
+    system_prompt (str): The pinned system message.
+    max_tokens (int): The token budget for the whole request.
+    keep_recent (int): Minimum number of recent messages that are never trimmed.
+    low_water (float): Fraction of max_tokens to trim down to once over budget.
+    summarizer (callable): Optional summarize(previous_summary, messages) -> str.
+    """
+
+    def __init__(self, system_prompt, max_tokens=3000, keep_recent=4, low_water=0.75, summarizer=None):
+        self.system_message = {"role": "system", "content": system_prompt}
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.low_water = low_water
+        self.summarizer = summarizer
+        self.summary = None
+        self.trimmed_messages = 0
+        self._system_tokens = estimate_tokens(self.system_message)
+        self._summary_tokens = 0
+        self._entries = deque()
+        self._message_tokens = 0
+
+    @property
+    def tokens(self):
+        return self._system_tokens + self._summary_tokens + self._message_tokens
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, message):
+        """
+        Add a message and enforce the token budget.
+
+        Args:
+        message (dict): The chat message.
+        """
+        tokens = estimate_tokens(message)
+        self._entries.append((message, tokens))
+        self._message_tokens += tokens
+        if self.tokens > self.max_tokens:
+            self._trim()
+
+    def messages(self):
+        """
+        Return the messages to send with the next request.
+
+        Returns:
+        list: The system message, the summary (if any) and the retained turns.
+        """
+        messages = [self.system_message]
+        if self.summary:
+            messages.append(self._summary_message())
+        messages.extend(message for message, _ in self._entries)
+        return messages
+
+    def evict_images(self, keep_last=1, placeholder=IMAGE_PLACEHOLDER):
+        """
+        Replace images in all but the most recent messages with a text placeholder.
+
+        Args:
+        keep_last (int): Number of most recent image-bearing messages left untouched.
+        placeholder (str): Text that stands in for an evicted image.
+
+        Returns:
+        int: The number of messages whose image was removed.
+        """
+        messages = [message for message, _ in self._entries]
+        evicted = evict_images(messages, keep_last, placeholder)
+        if evicted:
+            for index, (message, tokens) in enumerate(self._entries):
+                if messages[index] is not message:
+                    new_tokens = estimate_tokens(messages[index])
+                    self._entries[index] = (messages[index], new_tokens)
+                    self._message_tokens += new_tokens - tokens
+        return evicted
+
+    def usage(self):
+        """
+        Report how much of the token budget is in use.
+
+        Returns:
+        dict: Token counts, the budget, the fraction used and trimming statistics.
+        """
+        return {
+            "tokens": self.tokens,
+            "max_tokens": self.max_tokens,
+            "fraction": self.tokens / self.max_tokens,
+            "messages": len(self._entries),
+            "summary_tokens": self._summary_tokens,
+            "trimmed_messages": self.trimmed_messages,
+        }
+
+    def _summary_message(self):
+        return {"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"}
+
+    def _trim(self):
+        target = self.max_tokens * self.low_water
+        dropped = []
+        while self.tokens > target and len(self._entries) > self.keep_recent:
+            message, tokens = self._entries.popleft()
+            self._message_tokens -= tokens
+            dropped.append(message)
+        # Don't start the retained history with an orphaned assistant reply
+        while self._entries and self._entries[0][0]["role"] == "assistant" and len(self._entries) > self.keep_recent:
+            message, tokens = self._entries.popleft()
+            self._message_tokens -= tokens
+            dropped.append(message)
+        if not dropped:
+            return
+
+        self.trimmed_messages += len(dropped)
+        if self.summarizer is not None:
+            try:
+                self.summary = self.summarizer(self.summary, dropped)
+                self._summary_tokens = estimate_tokens(self._summary_message())
+            except Exception as e:
+                logging.error(f"Failed to summarize chat history: {e}")
+        logging.info(f"Trimmed {len(dropped)} messages from chat history ({self.tokens}/{self.max_tokens} tokens)")
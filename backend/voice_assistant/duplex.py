@@ -0,0 +1,228 @@
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+from backend.voice_assistant.utils import pcm_to_wav
+from backend.voice_assistant.vad import EnergyVAD, Endpointer, read_wav
+
+
+class MicrophoneSource:
+    """
+    The microphone as a continuous PCM source, kept open across turns.
+
+    Args:
+    sample_rate (int): Microphone sample rate.
+    chunk_ms (int): Size of each read in milliseconds.
+    """
+
+    def __init__(self, sample_rate=16000, chunk_ms=20):
+        import speech_recognition as sr
+
+        self.sample_rate = sample_rate
+        self.chunk_frames = sample_rate * chunk_ms // 1000
+        self._microphone = sr.Microphone(sample_rate=sample_rate, chunk_size=self.chunk_frames)
+        self._source = self._microphone.__enter__()
+        self.sample_width = self._source.SAMPLE_WIDTH
+
+    def read(self):
+        return self._source.stream.read(self.chunk_frames)
+
+    def close(self):
+        self._microphone.__exit__(None, None, None)
+
+
+class WavFileSource:
+    """
+    A scripted stand-in for the microphone that replays a mono WAV fixture.
+
+    Reads are paced in real time like a microphone's; after the fixture ends it
+    keeps returning silence and sets finished.
+
+    Args:
+    source (str or bytes): A mono WAV file path or WAV bytes.
+    chunk_ms (int): Size of each read in milliseconds.
+    realtime (bool): Pace reads at the audio's real-time rate.
+    """
+
+    def __init__(self, source, chunk_ms=20, realtime=True):
+        self.pcm, self.sample_rate, self.sample_width = read_wav(source)
+        self.chunk_bytes = self.sample_rate * chunk_ms // 1000 * self.sample_width
+        self.chunk_seconds = chunk_ms / 1000
+        self.realtime = realtime
+        self.offset = 0
+        self.started_at = None
+        self.finished = threading.Event()
+
+    def read(self):
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        if self.realtime:
+            due = self.started_at + (self.offset // self.chunk_bytes + 1) * self.chunk_seconds
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        chunk = self.pcm[self.offset:self.offset + self.chunk_bytes]
+        self.offset += self.chunk_bytes
+        if len(chunk) < self.chunk_bytes:
+            self.finished.set()
+            chunk += b"\0" * (self.chunk_bytes - len(chunk))
+        return chunk
+
+    def close(self):
+        pass
+
+
+class Utterance:
+    """
+    One utterance captured by a DuplexListener.
+
+    Args:
+    wav (bytes): The utterance as WAV data.
+    ended_at (float): time.monotonic() when the endpointer closed it.
+    transcriber (StreamingTranscriber): The transcriber that was fed the utterance, if any.
+    barged_in (bool): Whether it interrupted the assistant.
+    """
+
+    def __init__(self, wav, ended_at, transcriber=None, barged_in=False):
+        self.wav = wav
+        self.ended_at = ended_at
+        self.transcriber = transcriber
+        self.barged_in = barged_in
+
+
+class DuplexListener:
+    """
+    Keeps listening while the assistant speaks, so the user can interrupt it.
+
+    A background thread reads the audio source continuously and runs the VAD
+    endpointer over it. Finished utterances are queued for next_utterance().
+    While the assistant is speaking (inside speaking()), speech that lasts
+    barge_in_ms triggers the barge-in callback once, which is expected to cancel
+    generation, synthesis and playback; speech shorter than that is treated as
+    noise or echo of the assistant's own voice and dropped. Without headphones
+    or an echo-cancelling microphone the assistant can interrupt itself, so raise
+    barge_in_ms or the VAD threshold in that case.
+
+    Args:
+    source: MicrophoneSource, WavFileSource or anything with read(), sample_rate and sample_width.
+    hangover_ms (int): Trailing non-speech that ends an utterance.
+    threshold_db (float): Margin above the noise floor for a speech frame.
+    min_speech_ms (int): Consecutive speech needed to start an utterance.
+    barge_in_ms (int): Speech needed to interrupt the assistant.
+    transcriber_factory (callable): Optional transcriber_factory() -> StreamingTranscriber; a new one
+        is fed each utterance while it is spoken.
+    """
+
+    def __init__(self, source, hangover_ms=300, threshold_db=12.0, min_speech_ms=120, barge_in_ms=200,
+                 transcriber_factory=None):
+        self.source = source
+        self.barge_in_ms = barge_in_ms
+        self.transcriber_factory = transcriber_factory
+        self.endpointer = Endpointer(EnergyVAD(source.sample_rate, threshold_db=threshold_db), source.sample_width,
+                                     hangover_ms=hangover_ms, min_speech_ms=min_speech_ms, on_audio=self._on_audio)
+        self.utterances = queue.Queue()
+        self.barge_ins = 0
+        self._on_barge_in = None
+        self._onset = None
+        self._onset_while_speaking = False
+        self._barged_in = False
+        self._transcriber = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='duplex-listener', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.source.close()
+
+    def next_utterance(self, timeout=None):
+        """
+        Wait for the next utterance.
+
+        Args:
+        timeout (float): Seconds to wait; None waits forever.
+
+        Returns:
+        Utterance: The utterance, or None on timeout.
+        """
+        try:
+            return self.utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    @contextmanager
+    def speaking(self, on_barge_in):
+        """
+        Mark the assistant as speaking; on_barge_in() is called if the user interrupts.
+        """
+        with self._lock:
+            self._on_barge_in = on_barge_in
+            # Speech already in progress when the assistant starts also counts
+            self._onset_while_speaking = self._onset is not None
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._on_barge_in = None
+
+    def _on_audio(self, pcm_bytes):
+        if self.transcriber_factory is None:
+            return
+        if self._transcriber is None:
+            self._transcriber = self.transcriber_factory()
+        self._transcriber.feed(pcm_bytes)
+
+    def _run(self):
+        sample_rate = self.source.sample_rate
+        sample_width = self.source.sample_width
+        while not self._stop.is_set():
+            try:
+                chunk = self.source.read()
+            except Exception as e:
+                logging.error(f"Failed to read audio: {e}")
+                return
+            was_in_speech = self.endpointer.in_speech
+            utterances = self.endpointer.feed(chunk)
+            now = time.perf_counter()
+            with self._lock:
+                if not was_in_speech and (self.endpointer.in_speech or utterances):
+                    self._onset = now
+                    self._onset_while_speaking = self._on_barge_in is not None
+                    self._barged_in = False
+                callback = None
+                if (self._onset is not None and self._on_barge_in is not None and not self._barged_in
+                        and (now - self._onset) * 1000 >= self.barge_in_ms):
+                    callback = self._on_barge_in
+                    self._on_barge_in = None
+                    self._barged_in = True
+                    self.barge_ins += 1
+            if callback is not None:
+                logging.info("User barged in")
+                try:
+                    callback()
+                except Exception as e:
+                    logging.error(f"Barge-in handler failed: {e}")
+
+            for pcm in utterances:
+                transcriber, self._transcriber = self._transcriber, None
+                with self._lock:
+                    dropped = self._onset_while_speaking and not self._barged_in
+                    barged_in = self._barged_in
+                    self._onset = None
+                    self._onset_while_speaking = False
+                if dropped:
+                    # Too short to interrupt the assistant: noise or its own voice
+                    if transcriber is not None:
+                        transcriber.close()
+                    continue
+                self.utterances.put(Utterance(pcm_to_wav(pcm, sample_rate, sample_width), time.monotonic(),
+                                              transcriber, barged_in))
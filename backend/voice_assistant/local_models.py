@@ -0,0 +1,192 @@
+import io
+import os
+import glob
+import time
+import wave
+import logging
+import threading
+
+from backend.voice_assistant.vision import message_text
+
+
+def resolve_local_model_paths(local_model_path, stt_path=None, llm_path=None, tts_path=None):
+    """
+    Locate the local STT, LLM and TTS models.
+
+    Explicit paths win; otherwise they are looked up inside local_model_path, which
+    is expected to contain a CTranslate2 Whisper model in a 'whisper' directory, a
+    GGUF LLM file and a Piper voice ('.onnx' with its '.onnx.json' config).
+
+    Args:
+    local_model_path (str): The directory holding the local models.
+    stt_path (str): Explicit Whisper model directory or size name (e.g. 'base.en').
+    llm_path (str): Explicit GGUF model file.
+    tts_path (str): Explicit Piper voice file.
+
+    Returns:
+    dict: Paths keyed by 'stt', 'llm' and 'tts'; a value is None if nothing was found.
+    """
+    def first(pattern):
+        matches = sorted(glob.glob(os.path.join(local_model_path, pattern))) if local_model_path else []
+        return matches[0] if matches else None
+
+    whisper_dir = os.path.join(local_model_path, 'whisper') if local_model_path else None
+    return {
+        'stt': stt_path or (whisper_dir if whisper_dir and os.path.isdir(whisper_dir) else None),
+        'llm': llm_path or first('*.gguf'),
+        'tts': tts_path or first('*.onnx'),
+    }
+
+
+class LocalModels:
+    """
+    CPU-only local backends, loaded once and reused across turns.
+
+    STT uses faster-whisper (int8), the LLM uses llama.cpp through llama-cpp-python
+    and TTS uses Piper. Each model is loaded on first use, or ahead of time with
+    warm_up(), and shared by all callers; the LLM and TTS models are not
+    thread-safe, so calls to each are serialized.
+
+    Args:
+    paths (dict): Model paths from resolve_local_model_paths.
+    num_threads (int): CPU threads per model; None lets each library decide.
+    context_length (int): The LLM context window in tokens.
+    max_response_tokens (int): Maximum tokens generated per response.
+    """
+
+    def __init__(self, paths, num_threads=None, context_length=4096, max_response_tokens=256):
+        self.paths = paths
+        self.num_threads = num_threads
+        self.context_length = context_length
+        self.max_response_tokens = max_response_tokens
+        self._models = {}
+        self._load_lock = threading.Lock()
+        self._llm_lock = threading.Lock()
+        self._tts_lock = threading.Lock()
+        self.load_seconds = {}
+
+    def _get(self, stage):
+        model = self._models.get(stage)
+        if model is not None:
+            return model
+        with self._load_lock:
+            if stage not in self._models:
+                path = self.paths.get(stage)
+                if not path:
+                    raise ValueError(f"No local {stage} model found; set LOCAL_MODEL_PATH or LOCAL_{stage.upper()}_MODEL")
+                start = time.perf_counter()
+                self._models[stage] = getattr(self, f"_load_{stage}")(path)
+                self.load_seconds[stage] = time.perf_counter() - start
+                logging.info(f"Loaded local {stage} model from {path} in {self.load_seconds[stage]:.2f}s")
+            return self._models[stage]
+
+    def _load_stt(self, path):
+        from faster_whisper import WhisperModel
+        return WhisperModel(path, device="cpu", compute_type="int8", cpu_threads=self.num_threads or 0)
+
+    def _load_llm(self, path):
+        from llama_cpp import Llama
+        return Llama(model_path=path, n_ctx=self.context_length, n_threads=self.num_threads, verbose=False)
+
+    def _load_tts(self, path):
+        from piper import PiperVoice
+        return PiperVoice.load(path)
+
+    def transcribe(self, audio_bytes):
+        """
+        Transcribe encoded audio (e.g. WAV data).
+
+        Args:
+        audio_bytes (bytes): The audio to transcribe.
+
+        Returns:
+        str: The transcribed text.
+        """
+        segments, _ = self._get('stt').transcribe(io.BytesIO(audio_bytes), beam_size=1)
+        return " ".join(segment.text.strip() for segment in segments)
+
+    def stream_chat(self, chat_history):
+        """
+        Generate a response, yielding text as it is produced.
+
+        Args:
+        chat_history (list): The chat history; image parts are dropped.
+
+        Yields:
+        str: Fragments of the response text.
+        """
+        llm = self._get('llm')
+        messages = [{"role": message["role"], "content": message_text(message)} for message in chat_history]
+        with self._llm_lock:
+            for chunk in llm.create_chat_completion(messages=messages, max_tokens=self.max_response_tokens,
+                                                    stream=True):
+                delta = chunk["choices"][0]["delta"].get("content")
+                if delta:
+                    yield delta
+
+    def synthesize(self, text):
+        """
+        Convert text to speech.
+
+        Args:
+        text (str): The text to speak.
+
+        Returns:
+        bytes: WAV data.
+        """
+        voice = self._get('tts')
+        buffer = io.BytesIO()
+        with self._tts_lock, wave.open(buffer, "wb") as wav_file:
+            voice.synthesize(text, wav_file)
+        return buffer.getvalue()
+
+    def warm_up(self, stages=('stt', 'llm', 'tts')):
+        """
+        Load the given models and run each once, so the first real turn pays no start-up cost.
+
+        Args:
+        stages (iterable): Any of 'stt', 'llm', 'tts'.
+        """
+        for stage in stages:
+            start = time.perf_counter()
+            if stage == 'stt':
+                silence = io.BytesIO()
+                with wave.open(silence, "wb") as wav_file:
+                    wav_file.setnchannels(1)
+                    wav_file.setsampwidth(2)
+                    wav_file.setframerate(16000)
+                    wav_file.writeframes(b"\0\0" * 16000)
+                self.transcribe(silence.getvalue())
+            elif stage == 'llm':
+                for _ in self.stream_chat([{"role": "user", "content": "Hi"}]):
+                    break
+            elif stage == 'tts':
+                self.synthesize("Hello.")
+            logging.info(f"Warmed up local {stage} model in {time.perf_counter() - start:.2f}s")
+
+
+_local_models = {}
+_local_models_lock = threading.Lock()
+
+
+def get_local_models(local_model_path):
+    """
+    Return the shared LocalModels for a model directory, configured from get_settings().
+
+    Args:
+    local_model_path (str): The directory holding the local models.
+
+    Returns:
+    LocalModels: The shared instance.
+    """
+    from backend.voice_assistant.config import get_settings
+
+    with _local_models_lock:
+        models = _local_models.get(local_model_path)
+        if models is None:
+            settings = get_settings()
+            paths = resolve_local_model_paths(
+                local_model_path, settings.LOCAL_STT_MODEL, settings.LOCAL_LLM_MODEL, settings.LOCAL_TTS_MODEL)
+            models = LocalModels(paths, num_threads=settings.LOCAL_NUM_THREADS)
+            _local_models[local_model_path] = models
+        return models
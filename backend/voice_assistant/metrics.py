@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds, covering a 5 ms cache hit up to a 30 s utterance
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.75, 1.0, 1.25, 1.5,
+                   2.0, 2.5, 3.0, 4.0, 5.0, 7.5, 10.0, 30.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram, as used by Prometheus.
+
+    Memory stays constant however many samples are observed; quantiles are
+    estimated by linear interpolation inside the bucket that holds them.
+
+    Args:
+    buckets (tuple): Sorted bucket upper bounds; an overflow bucket is added.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile.
+
+        Args:
+        q (float): The quantile, between 0 and 1.
+
+        Returns:
+        float: The estimate, or None if nothing was observed.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                return min(max(estimate, self.min), self.max)
+            seen += count
+        return self.max
+
+
+class TurnTrace:
+    """
+    Timing spans and events of one conversational turn.
+
+    Spans measure a stage (e.g. 'stt', 'llm_ttft', 'tts') and carry the provider
+    and payload sizes; marks record when something happened (e.g. 'vad_end',
+    'playback_start') relative to the start of the turn. A trace may be
+    written from several threads.
+
+    Args:
+    metrics (Metrics): Where the finished trace is reported; None keeps it local.
+    providers (dict): Provider per stage family ('stt', 'llm', 'tts'), used to label spans.
+    **attrs: Extra fields written with the trace, e.g. a session id.
+    """
+
+    def __init__(self, metrics=None, providers=None, **attrs):
+        self.metrics = metrics
+        self.providers = providers or {}
+        self.attrs = attrs
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def offset(self, at=None):
+        """Seconds since the start of the turn of a time.perf_counter() value (default: now)."""
+        return (time.perf_counter() if at is None else at) - self.start
+
+    def mark(self, name, at=None):
+        """
+        Record the first time an event happens in this turn.
+
+        Args:
+        name (str): The event name.
+        at (float): The time.perf_counter() value; defaults to now.
+        """
+        with self._lock:
+            self.marks.setdefault(name, self.offset(at))
+
+    def add_span(self, stage, start, end=None, provider=None, **attrs):
+        """
+        Record a finished span.
+
+        Args:
+        stage (str): The stage name.
+        start (float): time.perf_counter() at the start of the span.
+        end (float): time.perf_counter() at the end; defaults to now.
+        provider (str): The provider used; defaults to the one registered for the stage family.
+        **attrs: Payload sizes and other details.
+        """
+        end = time.perf_counter() if end is None else end
+        span = {
+            "stage": stage,
+            "provider": provider or self.providers.get(stage.split('_')[0]),
+            "start": round(self.offset(start), 6),
+            "seconds": round(end - start, 6),
+        }
+        span.update(attrs)
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, stage, provider=None, **attrs):
+        """
+        Time a block as a span. The yielded dict can be filled with details found
+        inside the block, such as the response size.
+        """
+        start = time.perf_counter()
+        details = dict(attrs)
+        try:
+            yield details
+        except Exception:
+            details["error"] = True
+            raise
+        finally:
+            self.add_span(stage, start, provider=provider, **details)
+
+    def to_dict(self):
+        with self._lock:
+            record = {"time": self.wall_start, "seconds": round(self.offset(), 6)}
+            record.update(self.attrs)
+            record["marks"] = {name: round(value, 6) for name, value in self.marks.items()}
+            record["spans"] = list(self.spans)
+            return record
+
+    def finish(self):
+        """
+        End the turn and report it to the metrics it was started from.
+
+        Returns:
+        dict: The trace record.
+        """
+        self.mark('turn_end')
+        record = self.to_dict()
+        if self.metrics is not None:
+            self.metrics.record_turn(record)
+        return record
+
+
+class Metrics:
+    """
+    In-process latency histograms and payload counters per stage and provider.
+
+    Finished turns are folded into the histograms and, if trace_path is set,
+    appended as one JSON line each. p50/p95 per stage are available from
+    summary() and everything can be exported in the Prometheus text format.
+
+    Args:
+    trace_path (str): JSONL file that receives one record per turn; None disables it.
+    prometheus_path (str): File rewritten with the Prometheus exposition after each
+        turn, e.g. for node_exporter's textfile collector; None disables it.
+    buckets (tuple): Histogram bucket upper bounds in seconds.
+    """
+
+    def __init__(self, trace_path=None, prometheus_path=None, buckets=DEFAULT_BUCKETS):
+        self.trace_path = trace_path
+        self.prometheus_path = prometheus_path
+        self.buckets = buckets
+        self.histograms = {}
+        self.payload_bytes = {}
+        self.turns = 0
+        self._lock = threading.Lock()
+
+    def start_turn(self, providers=None, **attrs):
+        """
+        Begin tracing a turn.
+
+        Returns:
+        TurnTrace: The trace, reported here when finished.
+        """
+        return TurnTrace(self, providers, **attrs)
+
+    def observe(self, stage, seconds, provider=None):
+        with self._lock:
+            histogram = self.histograms.get((stage, provider))
+            if histogram is None:
+                histogram = self.histograms[(stage, provider)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def count_bytes(self, stage, direction, size, provider=None):
+        with self._lock:
+            key = (stage, provider, direction)
+            self.payload_bytes[key] = self.payload_bytes.get(key, 0) + size
+
+    def record_turn(self, record):
+        """
+        Fold a finished trace record into the histograms and write it to the trace file.
+
+        Args:
+        record (dict): From TurnTrace.to_dict().
+        """
+        for span in record["spans"]:
+            self.observe(span["stage"], span["seconds"], span["provider"])
+            for direction in ("request_bytes", "response_bytes"):
+                if span.get(direction) is not None:
+                    self.count_bytes(span["stage"], direction[:-len("_bytes")], span[direction], span["provider"])
+        marks = record["marks"]
+        # The latency the user hears: from the end of their speech to the first audio
+        if "vad_end" in marks and "playback_start" in marks:
+            self.observe("response_latency", marks["playback_start"] - marks["vad_end"])
+        with self._lock:
+            self.turns += 1
+        if self.trace_path:
+            try:
+                with self._lock, open(self.trace_path, "a") as trace_file:
+                    trace_file.write(json.dumps(record) + "\n")
+            except OSError as e:
+                logging.error(f"Failed to write turn trace: {e}")
+        if self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+
+    def summary(self):
+        """
+        Summarize latency per stage and provider.
+
+        Returns:
+        dict: {'stage' or 'stage/provider': {'count', 'mean', 'p50', 'p95', 'max'}}, in seconds.
+        """
+        with self._lock:
+            items = sorted(self.histograms.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+            return {
+                (f"{stage}/{provider}" if provider else stage): {
+                    "count": histogram.count,
+                    "mean": histogram.sum / histogram.count,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                    "max": histogram.max,
+                }
+                for (stage, provider), histogram in items
+            }
+
+    def prometheus_text(self):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+        str: The exposition.
+        """
+        lines = [
+            "# HELP voice_assistant_stage_seconds Latency of each turn stage.",
+            "# TYPE voice_assistant_stage_seconds histogram",
+        ]
+        with self._lock:
+            for (stage, provider), histogram in sorted(self.histograms.items(), key=lambda item: str(item[0])):
+                labels = f'stage="{stage}",provider="{provider or ""}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'voice_assistant_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"voice_assistant_stage_seconds_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"voice_assistant_stage_seconds_count{{{labels}}} {histogram.count}")
+            lines.append("# HELP voice_assistant_payload_bytes_total Bytes sent to and received from providers.")
+            lines.append("# TYPE voice_assistant_payload_bytes_total counter")
+            for (stage, provider, direction), size in sorted(self.payload_bytes.items(), key=str):
+                lines.append(f'voice_assistant_payload_bytes_total{{stage="{stage}",provider="{provider or ""}",'
+                             f'direction="{direction}"}} {size}')
+            lines.append("# HELP voice_assistant_turns_total Completed turns.")
+            lines.append("# TYPE voice_assistant_turns_total counter")
+            lines.append(f"voice_assistant_turns_total {self.turns}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Write then rename, so a scraper never reads a half-written file
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as metrics_file:
+                metrics_file.write(self.prometheus_text())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.error(f"Failed to write Prometheus metrics: {e}")
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Return the process-wide Metrics configured from get_settings().
+
+    Returns:
+    Metrics: The shared metrics.
+    """
+    global _metrics
+    from backend.voice_assistant.config import get_settings
+
+    with _metrics_lock:
+        if _metrics is None:
+            settings = get_settings()
+            _metrics = Metrics(settings.METRICS_TRACE_FILE, settings.METRICS_PROMETHEUS_FILE)
+        return _metrics
@@ -0,0 +1,184 @@
+import re
+import time
+import queue
+import logging
+import threading
+
+# A sentence ends at terminal punctuation (optionally followed by closing
+# quotes/brackets) and the whitespace after it. Requiring the whitespace keeps
+# decimals such as "3.5" and abbreviations glued to the next token intact.
+_SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+# Marks the end of a queue between pipeline stages
+_DONE = object()
+
+
+def split_sentences(token_stream, min_chars=20):
+    """
+    Cut a stream of text fragments into sentences as soon as they are complete.
+
+    Args:
+    token_stream (iterable): Text fragments, e.g. streamed LLM deltas.
+    min_chars (int): Minimum sentence length; shorter sentences are merged with the next one
+        so that TTS is not called for fragments like "Hi!".
+
+    Yields:
+    str: Complete sentences, followed by any trailing text when the stream ends.
+    """
+    buffer = ""
+    for token in token_stream:
+        buffer += token
+        start = 0
+        for match in _SENTENCE_END.finditer(buffer):
+            if match.end() - start < min_chars:
+                continue
+            sentence = buffer[start:match.end()].strip()
+            if sentence:
+                yield sentence
+            start = match.end()
+        buffer = buffer[start:]
+
+    tail = buffer.strip()
+    if tail:
+        yield tail
+
+
+class StreamingPipeline:
+    """
+    Overlap response generation, text-to-speech and playback within a single turn.
+
+    The LLM stream is consumed on the calling thread and cut into sentences. Each
+    sentence is synthesized on a TTS worker thread while the LLM keeps streaming, and
+    synthesized audio is played on a playback worker thread in order, so playback of
+    the first sentence starts while later sentences are still being generated.
+
+    Args:
+    stream_fn (callable): stream_fn(chat_history) -> iterable of text fragments.
+    tts_fn (callable): tts_fn(sentence) -> audio, in whatever form play_fn accepts.
+    play_fn (callable): play_fn(audio) -> None, blocking until the audio has played.
+    max_pending (int): Maximum number of sentences/audio chunks buffered between stages.
+    min_sentence_chars (int): Passed to split_sentences.
+
+    A turn can be cut short (e.g. when the user barges in) by setting the cancel
+    event passed to run(): the LLM stream is closed and sentences that have not
+    been synthesized or played yet are dropped. A TTS request already in flight
+    cannot be aborted, but its audio is discarded.
+    """
+
+    def __init__(self, stream_fn, tts_fn, play_fn, max_pending=4, min_sentence_chars=20):
+        self.stream_fn = stream_fn
+        self.tts_fn = tts_fn
+        self.play_fn = play_fn
+        self.max_pending = max_pending
+        self.min_sentence_chars = min_sentence_chars
+        self.last_timings = {}
+        self.last_cancelled = False
+
+    def run(self, chat_history, trace=None, cancel=None):
+        """
+        Run one turn through the pipeline.
+
+        Args:
+        chat_history (list): The chat history as a list of messages.
+        trace (TurnTrace): Optional trace that receives the 'llm_ttft', 'llm', 'tts_ttfb' and
+            'tts' spans and the 'playback_start' mark.
+        cancel (threading.Event): Set to abandon the turn.
+
+        Returns:
+        str: The response text, up to the point of cancellation if the turn was cancelled.
+        """
+        start = time.perf_counter()
+        timings = {}
+        self.last_timings = timings
+        cancel = cancel or threading.Event()
+
+        def mark(name):
+            timings.setdefault(name, time.perf_counter() - start)
+
+        sentence_queue = queue.Queue(maxsize=self.max_pending)
+        audio_queue = queue.Queue(maxsize=self.max_pending)
+
+        def tts_worker():
+            while True:
+                sentence = sentence_queue.get()
+                if sentence is _DONE:
+                    break
+                if cancel.is_set():
+                    continue
+                tts_start = time.perf_counter()
+                try:
+                    audio = self.tts_fn(sentence)
+                except Exception as e:
+                    logging.error(f"Failed to convert sentence to speech: {e}")
+                    continue
+                if trace is not None:
+                    size = len(audio) if isinstance(audio, (bytes, bytearray)) else None
+                    if 'first_tts' not in timings:
+                        trace.add_span('tts_ttfb', tts_start, request_chars=len(sentence), response_bytes=size)
+                    trace.add_span('tts', tts_start, request_chars=len(sentence), response_bytes=size)
+                if audio is not None and not cancel.is_set():
+                    mark('first_tts')
+                    audio_queue.put(audio)
+            audio_queue.put(_DONE)
+
+        def playback_worker():
+            while True:
+                audio = audio_queue.get()
+                if audio is _DONE:
+                    break
+                if cancel.is_set():
+                    continue
+                mark('first_audio')
+                if trace is not None:
+                    trace.mark('playback_start')
+                try:
+                    self.play_fn(audio)
+                except Exception as e:
+                    logging.error(f"Failed to play audio chunk: {e}")
+
+        tts_thread = threading.Thread(target=tts_worker, daemon=True)
+        playback_thread = threading.Thread(target=playback_worker, daemon=True)
+        tts_thread.start()
+        playback_thread.start()
+
+        parts = []
+
+        def tokens():
+            llm_start = time.perf_counter()
+            stream = self.stream_fn(chat_history)
+            try:
+                for token in stream:
+                    if cancel.is_set():
+                        break
+                    if trace is not None and not parts:
+                        trace.add_span('llm_ttft', llm_start)
+                    mark('first_token')
+                    parts.append(token)
+                    yield token
+            except Exception as e:
+                if not parts:
+                    raise
+                # Part of the answer is already being spoken; finish with what arrived
+                logging.error(f"Response stream failed mid-answer: {e}")
+            finally:
+                # Closing the generator releases the provider's streaming response
+                if hasattr(stream, 'close'):
+                    stream.close()
+            if trace is not None:
+                trace.add_span('llm', llm_start, response_chars=sum(len(part) for part in parts),
+                               cancelled=cancel.is_set())
+
+        try:
+            for sentence in split_sentences(tokens(), self.min_sentence_chars):
+                if cancel.is_set():
+                    break
+                mark('first_sentence')
+                sentence_queue.put(sentence)
+        finally:
+            sentence_queue.put(_DONE)
+            tts_thread.join()
+            playback_thread.join()
+            mark('done')
+            self.last_cancelled = cancel.is_set()
+
+        return "".join(parts)
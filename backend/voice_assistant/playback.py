@@ -0,0 +1,395 @@
+import io
+import os
+import time
+import wave
+import queue
+import logging
+import threading
+
+# Marks the end of the playback queue
+_STOP = object()
+
+
+def decode_audio(audio_bytes, audio_format=None, sample_rate=16000, channels=1, sample_width=2):
+    """
+    Decode audio into raw PCM for a playback sink.
+
+    Args:
+    audio_bytes (bytes): WAV, MP3 or raw PCM data.
+    audio_format (str): 'wav', 'mp3' or 'pcm'; None sniffs WAV/MP3 from the header.
+    sample_rate (int): Sample rate of raw PCM input.
+    channels (int): Channel count of raw PCM input.
+    sample_width (int): Bytes per sample of raw PCM input.
+
+    Returns:
+    tuple: (PCM bytes, sample rate, channels, sample width).
+    """
+    if audio_format is None:
+        audio_format = 'wav' if audio_bytes[:4] == b'RIFF' else 'mp3'
+    if audio_format == 'pcm':
+        return audio_bytes, sample_rate, channels, sample_width
+    if audio_format == 'wav':
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wav_file:
+            return (wav_file.readframes(wav_file.getnframes()), wav_file.getframerate(),
+                    wav_file.getnchannels(), wav_file.getsampwidth())
+    if audio_format == 'mp3':
+        return _decode_mp3(audio_bytes)
+    raise ValueError(f"Unsupported audio format: {audio_format}")
+
+
+_mp3_lock = threading.Lock()
+
+
+def _decode_mp3(audio_bytes):
+    # pygame is only used as an MP3 decoder here. Its mixer converts decoded sound to
+    # the mixer's format, so it is opened once, at the 24 kHz mono of OpenAI TTS, on
+    # SDL's dummy driver so that it never claims the output device.
+    import pygame
+
+    with _mp3_lock:
+        if not pygame.mixer.get_init():
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+            pygame.mixer.init(frequency=24000, size=-16, channels=1)
+        frequency, size, channels = pygame.mixer.get_init()
+        pcm = pygame.mixer.Sound(file=io.BytesIO(audio_bytes)).get_raw()
+    return pcm, frequency, channels, abs(size) // 8
+
+
+class NullSink:
+    """
+    Sink that discards audio, for headless runs and benchmarks.
+
+    Args:
+    realtime (bool): Block in write() for the duration of the audio, like a device would.
+    """
+
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.bytes_written = 0
+        self.format = None
+        self._byte_rate = None
+        self.play_until = 0.0
+
+    def open(self, sample_rate, channels, sample_width):
+        self.format = (sample_rate, channels, sample_width)
+        self._byte_rate = sample_rate * channels * sample_width
+
+    def write(self, pcm):
+        self.bytes_written += len(pcm)
+        if self.realtime:
+            now = time.perf_counter()
+            self.play_until = max(self.play_until, now) + len(pcm) / self._byte_rate
+            # Let one chunk be buffered ahead, as a device buffer would
+            ahead = self.play_until - now - len(pcm) / self._byte_rate
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def drain(self):
+        if self.realtime:
+            remaining = self.play_until - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def abort(self):
+        self.play_until = 0.0
+
+    def close(self):
+        self.format = None
+
+
+class FileSink:
+    """
+    Sink that appends everything played to a WAV file, for headless tests.
+
+    Args:
+    path (str): The WAV file to write.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = None
+        self._wav_file = None
+
+    def open(self, sample_rate, channels, sample_width):
+        if self._wav_file is not None:
+            if (sample_rate, channels, sample_width) != self.format:
+                raise ValueError("FileSink cannot change audio format mid-file")
+            return
+        self.format = (sample_rate, channels, sample_width)
+        self._wav_file = wave.open(self.path, "wb")
+        self._wav_file.setnchannels(channels)
+        self._wav_file.setsampwidth(sample_width)
+        self._wav_file.setframerate(sample_rate)
+
+    def write(self, pcm):
+        self._wav_file.writeframes(pcm)
+
+    def drain(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def close(self):
+        if self._wav_file is not None:
+            self._wav_file.close()
+            self._wav_file = None
+
+
+class PyAudioSink:
+    """
+    Sink that plays through the default output device with PyAudio.
+
+    The stream is opened once and kept open while the format stays the same, so
+    consecutive clips play without device start-up cost.
+
+    Args:
+    frames_per_buffer (int): Device buffer size in frames; smaller starts sooner but risks underruns.
+    """
+
+    def __init__(self, frames_per_buffer=512):
+        import pyaudio
+
+        self.frames_per_buffer = frames_per_buffer
+        self.format = None
+        self._pyaudio = pyaudio.PyAudio()
+        self._stream = None
+
+    def open(self, sample_rate, channels, sample_width):
+        if self._stream is not None and self.format == (sample_rate, channels, sample_width):
+            return
+        self.close()
+        self._stream = self._pyaudio.open(
+            format=self._pyaudio.get_format_from_width(sample_width),
+            channels=channels,
+            rate=sample_rate,
+            output=True,
+            frames_per_buffer=self.frames_per_buffer
+        )
+        self.format = (sample_rate, channels, sample_width)
+
+    def write(self, pcm):
+        self._stream.write(pcm)
+
+    def drain(self):
+        # write() returns once the data is in the device buffer; wait for it to be heard
+        time.sleep(self._stream.get_output_latency())
+
+    def abort(self):
+        # Stopping discards whatever is still buffered in the device
+        self._stream.stop_stream()
+        self._stream.start_stream()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+            self.format = None
+
+    def terminate(self):
+        self.close()
+        self._pyaudio.terminate()
+
+
+class _Clip:
+    def __init__(self, pcm, sample_rate, channels, sample_width, generation):
+        self.pcm = pcm
+        self.format = (sample_rate, channels, sample_width)
+        self.generation = generation
+        self.enqueued_at = time.perf_counter()
+        self.started_at = None
+        self.done = threading.Event()
+
+
+class AudioPlayer:
+    """
+    Persistent audio output engine.
+
+    Clips are decoded when they are enqueued and played in order by one
+    long-lived thread that writes them to the sink in short chunks, so playback
+    of the next clip starts as soon as the previous one ends and cancel() takes
+    effect within one chunk. Waiting for the end of playback uses events rather
+    than polling.
+
+    Args:
+    sink: Where audio goes (PyAudioSink, NullSink, FileSink or anything with the same methods).
+    chunk_ms (int): Length of each write to the sink, bounding how late a cancel can land.
+    on_first_sample (callable): Optional on_first_sample(seconds), called with each clip's
+        enqueue-to-first-sample latency.
+    """
+
+    def __init__(self, sink, chunk_ms=20, on_first_sample=None):
+        self.sink = sink
+        self.chunk_ms = chunk_ms
+        self.on_first_sample = on_first_sample
+        self._queue = queue.Queue()
+        self._generation = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = threading.Thread(target=self._run, name='audio-player', daemon=True)
+        self._thread.start()
+
+    @property
+    def playing(self):
+        return not self._idle.is_set()
+
+    @property
+    def generation(self):
+        """
+        The current generation; every cancel() starts a new one.
+        """
+        return self._generation
+
+    def enqueue(self, audio_bytes, audio_format=None, generation=None, **pcm_format):
+        """
+        Queue audio for playback and return immediately.
+
+        Args:
+        audio_bytes (bytes): WAV, MP3 or raw PCM data.
+        audio_format (str): See decode_audio.
+        generation (int): The generation the clip belongs to, e.g. the one its turn started in; if it
+            has been cancelled since, the clip is dropped. Defaults to the current generation.
+        **pcm_format: sample_rate, channels and sample_width of raw PCM input.
+
+        Returns:
+        threading.Event: Set once the clip has finished playing or was cancelled.
+        """
+        dropped = threading.Event()
+        dropped.set()
+        if generation is not None and generation != self._generation:
+            return dropped
+        pcm, sample_rate, channels, sample_width = decode_audio(audio_bytes, audio_format, **pcm_format)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                # Cancelled while it was being decoded
+                return dropped
+            clip = _Clip(pcm, sample_rate, channels, sample_width, self._generation)
+            self._pending += 1
+            self._idle.clear()
+        self._queue.put(clip)
+        return clip.done
+
+    def play(self, audio_bytes, audio_format=None, **pcm_format):
+        """
+        Play audio and block until it has finished or was cancelled.
+        """
+        self.enqueue(audio_bytes, audio_format, **pcm_format).wait()
+
+    def wait(self, timeout=None):
+        """
+        Block until everything queued has played or been cancelled.
+
+        Returns:
+        bool: False if the timeout expired first.
+        """
+        return self._idle.wait(timeout)
+
+    def cancel(self):
+        """
+        Stop the current clip and drop everything queued (barge-in).
+
+        Returns:
+        bool: Whether anything was playing or queued.
+        """
+        with self._lock:
+            self._generation += 1
+            was_playing = self._pending > 0
+        return was_playing
+
+    def close(self):
+        self.cancel()
+        self._queue.put(_STOP)
+        self._thread.join(timeout=1)
+        self.sink.close()
+
+    def _finish(self, clip):
+        clip.done.set()
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.set()
+
+    def _run(self):
+        while True:
+            clip = self._queue.get()
+            if clip is _STOP:
+                return
+            try:
+                if clip.generation == self._generation:
+                    self._play(clip)
+            except Exception as e:
+                logging.error(f"Failed to play audio: {e}")
+            finally:
+                self._finish(clip)
+
+    def _play(self, clip):
+        sample_rate, channels, sample_width = clip.format
+        self.sink.open(sample_rate, channels, sample_width)
+        frame_bytes = channels * sample_width
+        chunk_bytes = max(frame_bytes, sample_rate * self.chunk_ms // 1000 * frame_bytes)
+        for offset in range(0, len(clip.pcm), chunk_bytes):
+            if clip.generation != self._generation:
+                self.sink.abort()
+                return
+            if clip.started_at is None:
+                clip.started_at = time.perf_counter()
+                if self.on_first_sample is not None:
+                    self.on_first_sample(clip.started_at - clip.enqueued_at)
+            self.sink.write(clip.pcm[offset:offset + chunk_bytes])
+        # Only wait for the device to empty when nothing else is queued behind this clip
+        if self._queue.empty():
+            self.sink.drain()
+
+
+_player = None
+_player_lock = threading.Lock()
+
+
+def create_sink(kind, path=None):
+    """
+    Create a playback sink.
+
+    Args:
+    kind (str): 'device', 'null' or 'file'.
+    path (str): Output WAV file for the 'file' sink.
+
+    Returns:
+    The sink.
+    """
+    if kind == 'device':
+        return PyAudioSink()
+    if kind == 'null':
+        return NullSink(realtime=True)
+    if kind == 'file':
+        return FileSink(path or "playback.wav")
+    raise ValueError(f"Unsupported playback sink: {kind}")
+
+
+def close_player():
+    """
+    Stop the shared player's output thread and close its sink, if it was created.
+    """
+    global _player
+    with _player_lock:
+        if _player is not None:
+            _player.close()
+            _player = None
+
+
+def get_player():
+    """
+    Return the process-wide AudioPlayer, created on first use with the sink from get_settings().
+
+    Returns:
+    AudioPlayer: The shared player.
+    """
+    global _player
+    from backend.voice_assistant.config import get_settings
+
+    with _player_lock:
+        if _player is None:
+            settings = get_settings()
+            _player = AudioPlayer(create_sink(settings.PLAYBACK_SINK, settings.PLAYBACK_FILE))
+        return _player
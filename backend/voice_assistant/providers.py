@@ -0,0 +1,214 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from backend.voice_assistant.config import CONVERSATION_SETTINGS, get_settings
+from backend.voice_assistant.router import CircuitBreaker, ProviderRoute, StageRouter
+
+
+class Providers:
+    """
+    The provider calls a turn needs, bound to a model and API key.
+
+    Keeping the calls behind plain callables lets the main loop, the server and the
+    benchmarks share one turn implementation and swap in stubs.
+
+    Args:
+    transcribe (callable): transcribe(audio_bytes) -> str.
+    stream_response (callable): stream_response(chat_history) -> iterable of text fragments.
+    synthesize (callable): synthesize(text) -> bytes, or None on failure.
+    audio_format (str): Format of the audio returned by synthesize ('wav', 'mp3'); None if it
+        varies, in which case players sniff it.
+    names (dict): Provider name per stage ('stt', 'llm', 'tts'), used to label metrics.
+    generate (callable): generate(chat_history) -> str, for internal requests such as summaries
+        that should bypass the response cache; defaults to joining stream_response.
+    routers (dict): The StageRouter per stage, if the calls are routed.
+    quality (dict): The TTSQualityController per TTS model, if TTS quality is adaptive.
+    """
+
+    def __init__(self, transcribe, stream_response, synthesize, audio_format='wav', names=None, generate=None,
+                 routers=None, quality=None):
+        self.transcribe = transcribe
+        self.stream_response = stream_response
+        self.synthesize = synthesize
+        self.audio_format = audio_format
+        self.names = names or {}
+        self.generate = generate or (lambda chat_history: "".join(stream_response(chat_history)))
+        self.routers = routers or {}
+        self.quality = quality or {}
+
+
+def _stage_router(stage, models, make_call, timeout, settings, metrics=None):
+    routes = [
+        ProviderRoute(model, make_call(model), timeout, CircuitBreaker(
+            window=settings.CIRCUIT_WINDOW,
+            max_error_rate=settings.CIRCUIT_ERROR_RATE,
+            slow_seconds=settings.CIRCUIT_SLOW_SECONDS,
+            max_slow_rate=settings.CIRCUIT_SLOW_RATE,
+            cooldown=settings.CIRCUIT_COOLDOWN
+        ))
+        # A fallback that repeats an earlier model would only retry it
+        for model in dict.fromkeys(models)
+    ]
+    return StageRouter(stage, routes, hedge=settings.HEDGE_REQUESTS, metrics=metrics)
+
+
+def default_providers(metrics=None, settings=None):
+    """
+    Build Providers for the models selected in settings.
+
+    Each stage is routed across its model and the configured fallbacks, with
+    per-provider timeouts and circuit breakers. Provider failures raise
+    ProviderError once every provider of a stage has failed, rather than
+    producing an error message that would be spoken to the user. Audio is
+    downmixed, resampled and trimmed before it is uploaded for transcription,
+    and if the response cache is enabled, answers to repeated questions come
+    from it. With TTS_ADAPTIVE_QUALITY, each TTS model that has quality tiers
+    gets a controller that picks the tier of every request.
+
+    Every call is bound here, once, to its backend and API key, so a turn does
+    no lookups by provider name.
+
+    Args:
+    metrics (Metrics): Optional metrics that receive per-provider attempt latencies.
+    settings (Settings): The settings to build from; defaults to get_settings().
+
+    Returns:
+    Providers: The configured provider calls.
+    """
+    from backend.voice_assistant.transcription import transcribe_audio_bytes
+    from backend.voice_assistant.response_generation import generate_response_stream
+    from backend.voice_assistant.text_to_speech import synthesize_speech, tts_audio_format, TTS_QUALITY_TIERS
+    from backend.voice_assistant.tts_quality import TTSQualityController
+    from backend.voice_assistant.audio_preprocessing import prepare_upload
+    from backend.voice_assistant.response_cache import cached_stream, get_response_cache
+
+    settings = settings or get_settings()
+    local_model_path = settings.LOCAL_MODEL_PATH
+
+    def transcriber(model):
+        api_key = settings.api_key(model)
+        return lambda audio_bytes, file_name: transcribe_audio_bytes(
+            model, api_key, audio_bytes, local_model_path, file_name, strict=True)
+
+    def responder(model):
+        api_key = settings.api_key(model)
+        return lambda chat_history: generate_response_stream(
+            model, api_key, chat_history, local_model_path, strict=True)
+
+    quality = {}
+
+    def synthesizer(model):
+        api_key = settings.api_key(model)
+        if settings.TTS_ADAPTIVE_QUALITY and model in TTS_QUALITY_TIERS:
+            quality[model] = TTSQualityController(
+                TTS_QUALITY_TIERS[model], settings.TTS_QUALITY_MIN, settings.TTS_QUALITY_MAX,
+                settings.TTS_TARGET_SECONDS, settings.TTS_QUALITY_WINDOW)
+        controller = quality.get(model)
+        return lambda text: synthesize_speech(model, api_key, text, local_model_path, strict=True,
+                                              quality=controller)
+
+    routers = {
+        'stt': _stage_router('stt', [settings.TRANSCRIPTION_MODEL, *settings.TRANSCRIPTION_FALLBACKS], transcriber,
+                             settings.STT_TIMEOUT, settings, metrics),
+        'llm': _stage_router('llm', [settings.RESPONSE_MODEL, *settings.RESPONSE_FALLBACKS], responder,
+                             settings.LLM_TIMEOUT, settings, metrics),
+        'tts': _stage_router('tts', [settings.TTS_MODEL, *settings.TTS_FALLBACKS], synthesizer,
+                             settings.TTS_TIMEOUT, settings, metrics),
+    }
+
+    preprocess, trim, codec = settings.STT_PREPROCESS, settings.STT_TRIM_SILENCE, settings.STT_UPLOAD_CODEC
+
+    def transcribe(audio_bytes):
+        # Shrunk once, before routing, so a failover does not redo the work
+        file_name = "audio.wav"
+        if preprocess:
+            audio_bytes, file_name = prepare_upload(audio_bytes, trim=trim, codec=codec)
+        return routers['stt'].call(audio_bytes, file_name)
+
+    stream_response = routers['llm'].stream
+    response_cache = get_response_cache(settings)
+    if response_cache is not None:
+        stream_response = cached_stream(stream_response, response_cache)
+
+    audio_formats = set()
+    for model in routers['tts'].names:
+        audio_formats |= quality[model].formats if model in quality else {tts_audio_format(model)}
+    return Providers(
+        transcribe,
+        stream_response,
+        routers['tts'].call,
+        audio_formats.pop() if len(audio_formats) == 1 else None,
+        # Spans are labelled with the preference order, since the provider that answers can vary
+        names={stage: ",".join(router.names) for stage, router in routers.items()},
+        generate=lambda chat_history: "".join(routers['llm'].stream(chat_history)),
+        routers=routers,
+        quality=quality
+    )
+
+
+# Most distinct Providers kept for sharing; the least recently used are dropped beyond it
+MAX_SHARED_PROVIDERS = 16
+
+_providers = OrderedDict()
+_providers_lock = threading.Lock()
+
+
+def get_providers(settings=None):
+    """
+    Return the process-wide Providers built from the given settings, so circuit
+    breaker and latency state carry over from turn to turn. Sessions whose
+    settings differ only in CONVERSATION_SETTINGS, e.g. the system prompt, share
+    their Providers. The MAX_SHARED_PROVIDERS most recently used are kept; a
+    session holding one that was dropped keeps using it. If SESSION_RECORD_DIR
+    is set, every call through them is recorded.
+
+    Args:
+    settings (Settings): The settings to build from; defaults to get_settings().
+
+    Returns:
+    Providers: The shared providers.
+    """
+    from backend.voice_assistant.metrics import get_metrics
+    from backend.voice_assistant.session_replay import get_session_recorder
+
+    settings = settings or get_settings()
+    key = settings.key(exclude=CONVERSATION_SETTINGS)
+    with _providers_lock:
+        providers = _providers.get(key)
+        if providers is None:
+            providers = default_providers(get_metrics(), settings)
+            recorder = get_session_recorder()
+            if recorder is not None:
+                providers = recorder.wrap(providers)
+            _providers[key] = providers
+            while len(_providers) > MAX_SHARED_PROVIDERS:
+                _providers.popitem(last=False)
+        else:
+            _providers.move_to_end(key)
+        return providers
+
+
+def prewarm_providers(providers=None, settings=None):
+    """
+    Import the backend of every provider the routers may call and create what it
+    needs (SDK client and connection pool, or local model), so the first turn does
+    not pay for it. Failures are logged; the routers fail over as usual.
+
+    Args:
+    providers (Providers): The providers to warm; defaults to get_providers(settings).
+    settings (Settings): The settings they were built from; defaults to get_settings().
+
+    Returns:
+    dict: Seconds spent per "stage:name" warmed.
+    """
+    from backend.voice_assistant.backends import prewarm_backends
+
+    settings = settings or get_settings()
+    providers = providers or get_providers(settings)
+    selected = {stage: router.names for stage, router in providers.routers.items()}
+    api_keys = {name: settings.api_key(name) for names in selected.values() for name in names}
+    timings = prewarm_backends(selected, api_keys, settings.LOCAL_MODEL_PATH)
+    if timings:
+        logging.info("Pre-warmed " + ", ".join(f"{name} in {seconds:.2f}s" for name, seconds in timings.items()))
+    return timings
@@ -0,0 +1,365 @@
+import json
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+
+from backend.voice_assistant.vision import has_image, message_text, refers_to_image
+from backend.voice_assistant.speculation import NUMBER_WORDS, on_commit, speculating, transcript_words
+
+
+def normalize_question(text):
+    """
+    Normalize a question so that transcripts differing only in case, punctuation or
+    spacing share a cache entry.
+
+    Args:
+    text (str): The user message text.
+
+    Returns:
+    str: The lower-case words joined by single spaces.
+    """
+    return " ".join(transcript_words(text))
+
+
+def char_ngrams(text, n=3):
+    """
+    Count the character n-grams of a normalized question, padded at the ends.
+
+    Args:
+    text (str): The normalized question.
+    n (int): The n-gram length.
+
+    Returns:
+    Counter: n-gram counts.
+    """
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+
+
+def norm(vector):
+    """
+    Euclidean norm of a sparse (Counter) or dense (sequence) vector.
+    """
+    values = vector.values() if isinstance(vector, Counter) else vector
+    return math.sqrt(sum(value * value for value in values))
+
+
+def cosine(left, right, left_norm=None, right_norm=None):
+    """
+    Cosine similarity of two sparse (Counter) or dense (sequence) vectors.
+
+    Args:
+    left, right: The vectors, both sparse or both dense.
+    left_norm, right_norm (float): Precomputed norms, to save recomputing them per comparison.
+
+    Returns:
+    float: The similarity, 0.0 if either vector is empty.
+    """
+    if isinstance(left, Counter):
+        if len(right) < len(left):
+            left, right = right, left
+        dot = sum(count * right.get(gram, 0) for gram, count in left.items())
+    else:
+        dot = sum(a * b for a, b in zip(left, right))
+    left_norm = norm(left) if left_norm is None else left_norm
+    right_norm = norm(right) if right_norm is None else right_norm
+    if not left_norm or not right_norm:
+        return 0.0
+    return dot / (left_norm * right_norm)
+
+
+def openai_embedder(api_key, model="text-embedding-3-small"):
+    """
+    Build an embed(text) -> vector function backed by the OpenAI embeddings API.
+
+    Args:
+    api_key (str): The OpenAI API key.
+    model (str): The embedding model.
+
+    Returns:
+    callable: embed(text) -> list of floats.
+    """
+    from backend.voice_assistant.clients import get_client
+
+    def embed(text):
+        return get_client('openai', api_key).embeddings.create(model=model, input=text).data[0].embedding
+
+    return embed
+
+
+class _Entry:
+    def __init__(self, context, question, response, vector, created):
+        self.context = context
+        self.question = question
+        self.response = response
+        self.vector = vector
+        self.norm = norm(vector) if vector is not None else None
+        self.numbers = NUMBER_WORDS.findall(question)
+        self.created = created
+
+
+class ResponseCache:
+    """
+    Cache of LLM answers to repeated questions.
+
+    An entry is keyed on the normalized last user message plus a hash of the
+    context that can change its answer: the system messages and the
+    context_messages messages before the question. A question with an image
+    attached is keyed on its text alone when it does not refer to the image
+    (see vision.refers_to_image), and not cached when it does, since the answer
+    then depends on the picture. Exact
+    repeats are found by key. With similarity 'ngram' (character trigram
+    cosine) or 'embedding' (cosine of embed() vectors), a near-duplicate in the
+    same context whose similarity reaches threshold is also a hit, unless the
+    two questions mention different numbers. Entries expire after ttl seconds
+    and the least recently used are evicted beyond max_entries.
+
+    Args:
+    max_entries (int): Most answers kept.
+    ttl (float): Seconds an answer stays valid.
+    similarity (str): 'exact', 'ngram' or 'embedding'.
+    threshold (float): Similarity a near-duplicate needs; n-gram and embedding scores differ in scale.
+    context_messages (int): Messages before the question that are part of the key; 0 caches
+        questions independently of the conversation so far.
+    embed (callable): embed(text) -> vector, required for 'embedding'.
+    """
+
+    def __init__(self, max_entries=512, ttl=24 * 3600, similarity='ngram', threshold=0.85, context_messages=0,
+                 embed=None):
+        if similarity not in ('exact', 'ngram', 'embedding'):
+            raise ValueError(f"Unsupported similarity: {similarity}")
+        if similarity == 'embedding' and embed is None:
+            raise ValueError("Embedding similarity needs an embed function")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.threshold = threshold
+        self.context_messages = context_messages
+        self.embed = embed
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, chat_history):
+        """
+        Return the cache key of a request.
+
+        Args:
+        chat_history (list): The chat history ending with the user's question.
+
+        Returns:
+        tuple: (context hash, normalized question), or None if the request cannot be cached.
+        """
+        if not chat_history or chat_history[-1].get("role") != "user":
+            return None
+        text = message_text(chat_history[-1])
+        if has_image(chat_history[-1]) and refers_to_image(text):
+            return None
+        question = normalize_question(text)
+        if not question:
+            return None
+        earlier = chat_history[:-1]
+        recent = earlier[len(earlier) - self.context_messages:] if self.context_messages else []
+        context = [[message["role"], message_text(message)] for message in earlier if message.get("role") == "system"]
+        context += [[message["role"], message_text(message)] for message in recent if message.get("role") != "system"]
+        digest = hashlib.sha256(json.dumps(context).encode()).hexdigest()
+        return digest, question
+
+    def _vector(self, question):
+        if self.similarity == 'ngram':
+            return char_ngrams(question)
+        if self.similarity == 'embedding':
+            return self.embed(question)
+        return None
+
+    def get(self, chat_history, count=True):
+        """
+        Look up the answer to a request.
+
+        Args:
+        chat_history (list): The chat history ending with the user's question.
+        count (bool): Count the lookup in stats(); False for lookups that are not a turn's own,
+            e.g. speculative requests on partial transcripts.
+
+        Returns:
+        str: The cached answer, or None on a miss.
+        """
+        key = self.key(chat_history)
+        if key is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += count
+                return entry.response
+            candidates = [entry for entry in self._entries.values() if entry.context == key[0]]
+        if self.similarity == 'exact' or not candidates:
+            with self._lock:
+                self.misses += count
+            return None
+
+        try:
+            vector = self._vector(key[1])
+        except Exception as e:
+            logging.error(f"Failed to embed question for the response cache: {e}")
+            with self._lock:
+                self.misses += count
+            return None
+        numbers = NUMBER_WORDS.findall(key[1])
+        vector_norm = norm(vector)
+        best, best_score = None, self.threshold
+        for entry in candidates:
+            if entry.numbers != numbers:
+                continue
+            score = cosine(vector, entry.vector, vector_norm, entry.norm)
+            if score >= best_score:
+                best, best_score = entry, score
+        with self._lock:
+            if best is None or (best.context, best.question) not in self._entries:
+                self.misses += count
+                return None
+            self._entries.move_to_end((best.context, best.question))
+            self.similar_hits += count
+        logging.info(f"Response cache matched {key[1]!r} to {best.question!r} ({best_score:.2f})")
+        return best.response
+
+    def put(self, chat_history, response):
+        """
+        Store the answer to a request.
+
+        Args:
+        chat_history (list): The chat history ending with the user's question.
+        response (str): The complete answer.
+        """
+        key = self.key(chat_history)
+        if key is None or not response:
+            return
+        try:
+            vector = self._vector(key[1])
+        except Exception as e:
+            logging.error(f"Failed to embed question for the response cache: {e}")
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = _Entry(key[0], key[1], response, vector, time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _expire(self, now):
+        expired = [key for key, entry in self._entries.items() if now - entry.created > self.ttl]
+        for key in expired:
+            del self._entries[key]
+
+    def stats(self):
+        """
+        Report hit/miss counters.
+
+        Returns:
+        dict: Exact and similar hits, misses, hit rate and the number of entries.
+        """
+        with self._lock:
+            lookups = self.exact_hits + self.similar_hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.similar_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+def cached_stream(stream_fn, cache):
+    """
+    Wrap a response stream function with a response cache.
+
+    On a hit the cached answer is returned at once without calling the LLM; on a
+    miss the LLM stream is passed through and its answer stored once it has
+    completed. Answers cut short (e.g. by barge-in) or failed are not stored.
+    Lookups made by speculative requests are left out of the cache's stats, so
+    they cover the requests made for final transcripts, and a speculative answer
+    is only stored once it is committed, under the final transcript.
+
+    Args:
+    stream_fn (callable): stream_fn(chat_history) -> iterable of text fragments.
+    cache (ResponseCache): The cache.
+
+    Returns:
+    callable: stream(chat_history) -> iterable of text fragments.
+    """
+    def stream(chat_history):
+        cached = cache.get(chat_history, count=not speculating())
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        source = stream_fn(chat_history)
+        try:
+            for fragment in source:
+                parts.append(fragment)
+                yield fragment
+        finally:
+            if hasattr(source, 'close'):
+                source.close()
+        response = "".join(parts)
+        if not on_commit(lambda final_history: cache.put(final_history, response)):
+            cache.put(chat_history, response)
+
+    return stream
+
+
+# Most distinct response caches kept; the least recently used are dropped beyond it
+MAX_RESPONSE_CACHES = 16
+
+_caches = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_response_cache(settings=None):
+    """
+    Return the process-wide response cache for the given settings, or None if it is disabled.
+
+    Sessions whose settings differ, e.g. in model, could get different answers
+    to the same question, so they get separate caches. Settings differing only
+    in CONVERSATION_SETTINGS share one, since the system prompt is part of each
+    entry's key. The MAX_RESPONSE_CACHES most recently used caches are kept.
+
+    Args:
+    settings (Settings): The settings to read; defaults to get_settings().
+
+    Returns:
+    ResponseCache: The shared cache.
+    """
+    from backend.voice_assistant.config import CONVERSATION_SETTINGS, get_settings
+
+    settings = settings or get_settings()
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    key = settings.key(exclude=CONVERSATION_SETTINGS)
+    with _cache_lock:
+        cache = _caches.get(key)
+        if cache is not None:
+            _caches.move_to_end(key)
+        else:
+            embed = None
+            if settings.RESPONSE_CACHE_SIMILARITY == 'embedding':
+                embed = openai_embedder(settings.OPENAI_API_KEY)
+            cache = ResponseCache(
+                max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+                ttl=settings.RESPONSE_CACHE_TTL,
+                similarity=settings.RESPONSE_CACHE_SIMILARITY,
+                threshold=settings.RESPONSE_CACHE_THRESHOLD,
+                context_messages=settings.RESPONSE_CACHE_CONTEXT_MESSAGES,
+                embed=embed
+            )
+            _caches[key] = cache
+            while len(_caches) > MAX_RESPONSE_CACHES:
+                _caches.popitem(last=False)
+        return cache
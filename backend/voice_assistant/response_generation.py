@@ -1,42 +1,84 @@
 import logging
 
-from groq import Groq
-from openai import OpenAI
+from backend.voice_assistant.backends import get_backend
 
 
-def generate_response(model, api_key, chat_history, local_model_path=None):
+def generate_response(model, api_key, chat_history, local_model_path=None, strict=False):
     """
     Generate a response using the specified model.
 
     Args:
-    model (str): The model to use for response generation ('openai', 'groq', 'local').
+    model (str): The response backend ('openai', 'groq', 'local', or a registered plugin).
     api_key (str): The API key for the response generation service.
     chat_history (list): The chat history as a list of messages.
     local_model_path (str): The path to the local model (if applicable).
+    strict (bool): Raise on failure instead of returning an error message as the response.
 
     Returns:
     str: The generated response text.
     """
     try:
-        if model == 'openai':
-            client = OpenAI(api_key=api_key)
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=chat_history
-            )
-            return response.choices[0].message.content
-        elif model == 'groq':
-            client = Groq(api_key=api_key)
-            response = client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=chat_history
-            )
-            return response.choices[0].message.content
-        elif model == 'local':
-            # Placeholder for local LLM response generation
-            return "Generated response from local model"
-        else:
-            raise ValueError("Unsupported response generation model")
+        return "".join(get_backend('llm', model)(api_key, chat_history, local_model_path))
     except Exception as e:
         logging.error(f"Failed to generate response: {e}")
+        if strict:
+            raise
         return "Error in generating response"
+
+
+def generate_response_stream(model, api_key, chat_history, local_model_path=None, strict=False):
+    """
+    Generate a response using the specified model, yielding text as it is produced.
+
+    Args:
+    model (str): The response backend ('openai', 'groq', 'local', or a registered plugin).
+    api_key (str): The API key for the response generation service.
+    chat_history (list): The chat history as a list of messages.
+    local_model_path (str): The path to the local model (if applicable).
+    strict (bool): Raise on failure instead of yielding an error message as the response.
+
+    Yields:
+    str: Fragments of the generated response text, in order.
+    """
+    produced = False
+    try:
+        for delta in get_backend('llm', model)(api_key, chat_history, local_model_path):
+            produced = True
+            yield delta
+    except Exception as e:
+        logging.error(f"Failed to generate response: {e}")
+        if strict:
+            raise
+        if not produced:
+            yield "Error in generating response"
+
+
+# Backends, imported through the registry in backends.py when first selected
+
+def _stream_chat_completion(client, model, chat_history):
+    stream = client.chat.completions.create(
+        model=model,
+        messages=chat_history,
+        stream=True
+    )
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+def _stream_openai(api_key, chat_history, local_model_path):
+    from backend.voice_assistant.clients import get_client
+    return _stream_chat_completion(get_client('openai', api_key), "gpt-4o-mini", chat_history)
+
+
+def _stream_groq(api_key, chat_history, local_model_path):
+    from backend.voice_assistant.clients import get_client
+    return _stream_chat_completion(get_client('groq', api_key), "llama3-8b-8192", chat_history)
+
+
+def _stream_local(api_key, chat_history, local_model_path):
+    from backend.voice_assistant.local_models import get_local_models
+    return get_local_models(local_model_path).stream_chat(chat_history)
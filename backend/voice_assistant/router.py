@@ -0,0 +1,366 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+
+
+class ProviderError(Exception):
+    """
+    Raised when no provider of a stage produced a result.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider that keeps failing or has become slow.
+
+    The outcome and latency of the last `window` calls are kept. The breaker
+    opens when, over at least min_calls of them, the error rate reaches
+    max_error_rate or the share of calls slower than slow_seconds reaches
+    max_slow_rate. An open breaker refuses calls for cooldown seconds, then lets
+    a single trial call through (half-open); a fast success closes it again and
+    anything else reopens it.
+
+    Args:
+    window (int): Number of recent calls considered.
+    min_calls (int): Calls needed in the window before the breaker may open.
+    max_error_rate (float): Error rate that opens the breaker.
+    slow_seconds (float): Calls at least this slow count as slow; None ignores latency.
+    max_slow_rate (float): Share of slow calls that opens the breaker.
+    cooldown (float): Seconds an open breaker waits before a trial call.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window=20, min_calls=5, max_error_rate=0.5, slow_seconds=None, max_slow_rate=0.5,
+                 cooldown=30.0):
+        self.min_calls = min_calls
+        self.max_error_rate = max_error_rate
+        self.slow_seconds = slow_seconds
+        self.max_slow_rate = max_slow_rate
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.trips = 0
+        self._outcomes = deque(maxlen=window)
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self, now=None):
+        """
+        Ask to make a call. A True answer in the half-open state reserves the trial
+        call, so it must be followed by record().
+
+        Args:
+        now (float): time.monotonic() value; defaults to now.
+
+        Returns:
+        bool: Whether the call may be made.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and now - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record(self, ok, seconds, now=None):
+        """
+        Report the outcome of a call.
+
+        Args:
+        ok (bool): Whether the call succeeded.
+        seconds (float): How long it took.
+        now (float): time.monotonic() value; defaults to now.
+        """
+        now = time.monotonic() if now is None else now
+        slow = self.slow_seconds is not None and seconds >= self.slow_seconds
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if ok and not slow:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                    logging.info("Circuit closed after a successful trial call")
+                else:
+                    self._open(now)
+                return
+            self._outcomes.append((ok, slow))
+            if self.state == self.CLOSED and self._tripped():
+                self._open(now)
+
+    def _tripped(self):
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return False
+        errors = sum(1 for ok, _ in self._outcomes if not ok)
+        slow = sum(1 for ok, is_slow in self._outcomes if ok and is_slow)
+        return errors / calls >= self.max_error_rate or (
+            self.slow_seconds is not None and slow / calls >= self.max_slow_rate)
+
+    def _open(self, now):
+        self.state = self.OPEN
+        self.opened_at = now
+        self.trips += 1
+        self._trial_running = False
+
+
+class ProviderRoute:
+    """
+    One provider a stage can be routed to.
+
+    Args:
+    name (str): The provider name, e.g. 'openai'.
+    call (callable): call(*args) -> result; must raise on failure rather than return an error value.
+        For streamed stages it returns an iterable of fragments.
+    timeout (float): Seconds before an attempt is given up on; for streamed stages, until the
+        first fragment.
+    breaker (CircuitBreaker): The provider's breaker; a default one is created if None.
+    latency_window (int): Number of recent successful latencies kept for the hedging delay.
+    """
+
+    def __init__(self, name, call, timeout=10.0, breaker=None, latency_window=100):
+        self.name = name
+        self.call = call
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = deque(maxlen=latency_window)
+        self.calls = 0
+        self.wins = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.hedges = 0
+
+    def latency_quantile(self, q, min_samples=1):
+        """
+        Return a quantile of the recent successful latencies.
+
+        Args:
+        q (float): The quantile, between 0 and 1.
+        min_samples (int): Return None until this many latencies have been seen.
+
+        Returns:
+        float: The latency in seconds, or None.
+        """
+        samples = sorted(self.latencies)
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class StageRouter:
+    """
+    Route the calls of one pipeline stage across providers in order of preference.
+
+    Each call goes to the first provider whose circuit breaker allows it. An
+    attempt that raises or runs past its provider's timeout moves the call on to
+    the next provider; the abandoned attempt keeps running on its own thread and
+    its result is discarded. With hedging, if the current attempt has not
+    answered within the provider's recent p95 latency, the next provider is
+    started as well and whichever answers first wins, which cuts the latency tail
+    at the cost of a few duplicate requests. If every breaker is open the first
+    provider is tried anyway, so a single configured provider behaves as before.
+    Streamed responses fail over only until their first fragment; a failure after
+    that raises ProviderError from the stream.
+
+    Args:
+    stage (str): The stage name, used in logs and metrics ('stt', 'llm', 'tts').
+    routes (list): ProviderRoute objects, most preferred first.
+    hedge (bool): Start the next provider when the current one is slower than usual.
+    hedge_quantile (float): Latency quantile after which a hedged request is sent.
+    hedge_min_samples (int): Latencies a provider needs before it is hedged.
+    metrics (Metrics): Optional metrics that receive each successful attempt's latency as
+        '<stage>_attempt' per provider.
+    """
+
+    def __init__(self, stage, routes, hedge=False, hedge_quantile=0.95, hedge_min_samples=20, metrics=None):
+        if not routes:
+            raise ValueError(f"No providers configured for {stage}")
+        self.stage = stage
+        self.routes = list(routes)
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.metrics = metrics
+
+    @property
+    def names(self):
+        return [route.name for route in self.routes]
+
+    def call(self, *args):
+        """
+        Make a call, failing over between providers.
+
+        Returns:
+        The first successful provider's result.
+
+        Raises:
+        ProviderError: If no provider succeeded.
+        """
+        return self._run(lambda route: route.call(*args))
+
+    def stream(self, *args):
+        """
+        Open a streamed call, failing over between providers until the first fragment arrives.
+
+        Yields:
+        The fragments of the first provider to produce one.
+
+        Raises:
+        ProviderError: If no provider produced a first fragment, or the stream failed later.
+        """
+        route, first, stream = self._run(lambda route: _open_stream(route, args), discard=_close_stream)
+        try:
+            if first is not None:
+                yield first
+            for fragment in stream:
+                yield fragment
+        except Exception as e:
+            # Part of the response has been used already, so it cannot be retried elsewhere
+            logging.error(f"{self.stage} provider {route.name} failed mid-response: {e}")
+            route.failures += 1
+            route.breaker.record(False, 0.0)
+            raise ProviderError(f"{self.stage} provider {route.name} failed mid-response: {e}") from e
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close()
+
+    def stats(self):
+        """
+        Summarize routing per provider.
+
+        Returns:
+        dict: {provider: {'state', 'calls', 'wins', 'failures', 'timeouts', 'hedges', 'trips', 'p95'}}.
+        """
+        return {
+            route.name: {
+                "state": route.breaker.state,
+                "calls": route.calls,
+                "wins": route.wins,
+                "failures": route.failures,
+                "timeouts": route.timeouts,
+                "hedges": route.hedges,
+                "trips": route.breaker.trips,
+                "p95": route.latency_quantile(0.95),
+            }
+            for route in self.routes
+        }
+
+    def _start(self, route, attempt, pending):
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(attempt(route))
+            except BaseException as e:
+                future.set_exception(e)
+
+        route.calls += 1
+        started = time.perf_counter()
+        pending[future] = (route, started)
+        threading.Thread(target=run, name=f'{self.stage}-{route.name}', daemon=True).start()
+        return started
+
+    def _settle_late(self, future, route, started, discard, timed_out):
+        # An attempt that lost or timed out still reports to its breaker once it finishes
+        def done(future):
+            seconds = time.perf_counter() - started
+            error = future.exception()
+            if not timed_out:
+                route.breaker.record(error is None, seconds)
+                if error is None:
+                    route.latencies.append(seconds)
+            if error is None and discard is not None:
+                discard(future.result())
+
+        future.add_done_callback(done)
+
+    def _run(self, attempt, discard=None):
+        remaining = list(self.routes)
+        pending = {}
+        errors = []
+        latest = None
+        latest_started = None
+
+        def launch():
+            nonlocal latest, latest_started
+            while remaining:
+                route = remaining.pop(0)
+                if route.breaker.allow():
+                    latest, latest_started = route, self._start(route, attempt, pending)
+                    return True
+                errors.append(f"{route.name}: circuit open")
+            return False
+
+        if not launch():
+            logging.warning(f"All {self.stage} circuits are open; trying {self.routes[0].name} anyway")
+            latest, latest_started = self.routes[0], self._start(self.routes[0], attempt, pending)
+
+        while pending:
+            now = time.perf_counter()
+            wake = min(started + route.timeout for route, started in pending.values())
+            hedge_at = None
+            if self.hedge and remaining:
+                delay = latest.latency_quantile(self.hedge_quantile, self.hedge_min_samples)
+                if delay is not None:
+                    hedge_at = latest_started + delay
+                    wake = min(wake, hedge_at)
+            done, _ = wait(list(pending), timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                route, started = pending.pop(future)
+                seconds = time.perf_counter() - started
+                error = future.exception()
+                route.breaker.record(error is None, seconds)
+                if error is None:
+                    route.latencies.append(seconds)
+                    route.wins += 1
+                    if self.metrics is not None:
+                        self.metrics.observe(f"{self.stage}_attempt", seconds, route.name)
+                    for other, (other_route, other_started) in pending.items():
+                        self._settle_late(other, other_route, other_started, discard, timed_out=False)
+                    return future.result()
+                route.failures += 1
+                errors.append(f"{route.name}: {error}")
+                logging.warning(f"{self.stage} provider {route.name} failed: {error}")
+
+            now = time.perf_counter()
+            for future, (route, started) in list(pending.items()):
+                if now - started >= route.timeout:
+                    del pending[future]
+                    route.timeouts += 1
+                    route.breaker.record(False, now - started)
+                    errors.append(f"{route.name}: no answer within {route.timeout}s")
+                    logging.warning(f"{self.stage} provider {route.name} timed out after {route.timeout}s")
+                    self._settle_late(future, route, started, discard, timed_out=True)
+
+            if not pending:
+                launch()
+            elif hedge_at is not None and now >= hedge_at and launch():
+                latest.hedges += 1
+                logging.info(f"Hedging {self.stage} request to {latest.name}")
+
+        raise ProviderError(f"No {self.stage} provider succeeded: {'; '.join(errors)}")
+
+
+def _open_stream(route, args):
+    # A streamed attempt succeeds once the first fragment is in hand
+    stream = iter(route.call(*args))
+    try:
+        first = next(stream)
+    except StopIteration:
+        first = None
+    return route, first, stream
+
+
+def _close_stream(result):
+    stream = result[2]
+    if hasattr(stream, 'close'):
+        stream.close()
@@ -0,0 +1,442 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import defaultdict, deque
+
+from backend.voice_assistant.router import ProviderError
+from backend.voice_assistant.providers import Providers
+from backend.voice_assistant.vision import message_text
+from backend.voice_assistant.response_cache import normalize_question
+
+SESSION_VERSION = 1
+
+
+def audio_key(audio_bytes):
+    """
+    Key a recorded utterance by its content.
+    """
+    return hashlib.sha256(audio_bytes).hexdigest()
+
+
+def request_key(chat_history):
+    """
+    Key an LLM request by its last user message, normalized so that a speculative
+    request made from a partial transcript matches the final one.
+    """
+    return normalize_question(message_text(chat_history[-1])) if chat_history else ""
+
+
+class SessionRecorder:
+    """
+    Record a live session so it can be replayed offline.
+
+    For every turn the recorder keeps the user's utterance, the webcam frame,
+    the final transcript and how long after the end of speech it arrived, and
+    every provider call made with its request, response and timings: when
+    each streamed fragment arrived, and the audio each TTS call returned. The
+    session is a directory holding session.json (settings the replay needs),
+    events.jsonl (one event per line, appended as it happens) and the audio
+    and image blobs.
+
+    Args:
+    directory (str): The session directory; created if missing.
+    **settings: Written to session.json, e.g. system_prompt, audio_format and names.
+    """
+
+    def __init__(self, directory, **settings):
+        self.directory = directory
+        self.settings = dict(settings, version=SESSION_VERSION, created=time.time())
+        self.turn = 0
+        self._turn_started = False
+        self._blobs = 0
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._write_settings()
+        self._events = open(os.path.join(directory, "events.jsonl"), "a", encoding="utf-8")
+
+    def _write_settings(self):
+        with open(os.path.join(self.directory, "session.json"), "w", encoding="utf-8") as session_file:
+            json.dump(self.settings, session_file, indent=2)
+
+    def _offset(self, at=None):
+        return round((time.perf_counter() if at is None else at) - self._start, 6)
+
+    def _blob(self, data, extension):
+        with self._lock:
+            self._blobs += 1
+            name = f"blobs/{self._blobs:06d}.{extension}"
+        with open(os.path.join(self.directory, name), "wb") as blob_file:
+            blob_file.write(data)
+        return name
+
+    def _claim_turn(self):
+        # Called with the lock held. A turn gets its number with its first event, so
+        # turns started but left without calls or inputs, e.g. an idle listener
+        # timeout, leave no gaps in the numbering.
+        if self._turn_started:
+            self.turn += 1
+            self._turn_started = False
+        return self.turn
+
+    def current_turn(self):
+        """
+        Return the number of the turn events are recorded under now.
+        """
+        with self._lock:
+            return self._claim_turn()
+
+    def _write(self, event):
+        with self._lock:
+            if "turn" not in event:
+                event["turn"] = self._claim_turn()
+            self._events.write(json.dumps(event) + "\n")
+            self._events.flush()
+
+    def start_turn(self):
+        """
+        Begin a new turn; provider calls from now on are recorded under it. The
+        turn is numbered once something is recorded in it.
+        """
+        with self._lock:
+            self._turn_started = True
+
+    def record_turn(self, audio_bytes, transcript, frame_jpeg=None, frame_sent=False, stt_seconds=None):
+        """
+        Record the inputs of the current turn.
+
+        Args:
+        audio_bytes (bytes): The utterance as WAV data.
+        transcript (str): The final transcript.
+        frame_jpeg (bytes): The webcam frame nearest to the end of speech, if any.
+        frame_sent (bool): Whether the frame was attached to the request.
+        stt_seconds (float): Seconds from the end of speech until the transcript was ready.
+        """
+        self._write({
+            "type": "turn",
+            "at": self._offset(),
+            "audio": self._blob(audio_bytes, "wav"),
+            "audio_key": audio_key(audio_bytes),
+            "frame": self._blob(frame_jpeg, "jpg") if frame_jpeg is not None else None,
+            "frame_sent": frame_sent and frame_jpeg is not None,
+            "transcript": transcript,
+            "stt_seconds": None if stt_seconds is None else round(stt_seconds, 6),
+        })
+
+    def wrap(self, providers):
+        """
+        Wrap Providers so that every call through them is recorded.
+
+        Args:
+        providers (Providers): The live providers.
+
+        Returns:
+        Providers: Providers with the same behaviour that record as they go.
+        """
+        self.settings.update(audio_format=providers.audio_format, names=providers.names)
+        self._write_settings()
+
+        def transcribe(audio_bytes):
+            start = time.perf_counter()
+            event = {"type": "call", "stage": "stt", "turn": self.current_turn(), "key": audio_key(audio_bytes),
+                     "request_bytes": len(audio_bytes), "at": self._offset(start)}
+            try:
+                event["response"] = transcript = providers.transcribe(audio_bytes)
+                return transcript
+            except Exception as e:
+                event["error"] = str(e)
+                raise
+            finally:
+                event["seconds"] = round(time.perf_counter() - start, 6)
+                self._write(event)
+
+        def stream_response(chat_history):
+            start = time.perf_counter()
+            event = {"type": "call", "stage": "llm", "turn": self.current_turn(), "key": request_key(chat_history),
+                     "messages": len(chat_history), "at": self._offset(start)}
+            fragments = []
+            try:
+                for fragment in providers.stream_response(chat_history):
+                    fragments.append([round(time.perf_counter() - start, 6), fragment])
+                    yield fragment
+            except Exception as e:
+                event["error"] = str(e)
+                raise
+            finally:
+                # Also reached when the stream is closed early, e.g. on barge-in
+                event["fragments"] = fragments
+                event["seconds"] = round(time.perf_counter() - start, 6)
+                self._write(event)
+
+        def synthesize(text):
+            start = time.perf_counter()
+            event = {"type": "call", "stage": "tts", "turn": self.current_turn(), "key": text, "at": self._offset(start)}
+            try:
+                audio = providers.synthesize(text)
+                event["audio"] = self._blob(audio, "audio") if audio is not None else None
+                return audio
+            except Exception as e:
+                event["error"] = str(e)
+                raise
+            finally:
+                event["seconds"] = round(time.perf_counter() - start, 6)
+                self._write(event)
+
+        return Providers(transcribe, stream_response, synthesize, providers.audio_format, providers.names,
+                         providers.generate, providers.routers, providers.quality)
+
+    def close(self):
+        with self._lock:
+            self._events.close()
+
+
+class RecordedTurn:
+    def __init__(self, audio, transcript, frame, frame_sent, stt_seconds):
+        self.audio = audio
+        self.transcript = transcript
+        self.frame = frame
+        self.frame_sent = frame_sent
+        self.stt_seconds = stt_seconds
+
+
+class RecordedSession:
+    """
+    A recorded session loaded for replay.
+
+    Attributes:
+    settings (dict): The contents of session.json.
+    turns (list): RecordedTurn objects in order.
+    calls (dict): Recorded provider call events per stage.
+    """
+
+    def __init__(self, settings, turns, calls):
+        self.settings = settings
+        self.turns = turns
+        self.calls = calls
+
+
+def load_session(directory):
+    """
+    Load a session recorded by SessionRecorder.
+
+    Args:
+    directory (str): The session directory.
+
+    Returns:
+    RecordedSession: The session.
+    """
+    def blob(name):
+        if name is None:
+            return None
+        with open(os.path.join(directory, name), "rb") as blob_file:
+            return blob_file.read()
+
+    with open(os.path.join(directory, "session.json"), encoding="utf-8") as session_file:
+        settings = json.load(session_file)
+    if settings.get("version") != SESSION_VERSION:
+        raise ValueError(f"Unsupported session version: {settings.get('version')}")
+    turns = []
+    calls = defaultdict(list)
+    with open(os.path.join(directory, "events.jsonl"), encoding="utf-8") as events_file:
+        for line in events_file:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short when the recording was killed
+            if event["type"] == "turn":
+                turns.append(RecordedTurn(blob(event["audio"]), event["transcript"], blob(event["frame"]),
+                                          event["frame_sent"], event["stt_seconds"]))
+            elif event["type"] == "call":
+                if event["stage"] == "tts":
+                    event["audio"] = blob(event.get("audio"))
+                calls[event["stage"]].append(event)
+    return RecordedSession(settings, turns, dict(calls))
+
+
+def replay_providers(session, realtime=True):
+    """
+    Build stub Providers that answer with a session's recorded responses.
+
+    Requests are matched to recordings by content: utterances by their audio,
+    LLM requests by the normalized last user message and TTS requests by their
+    text; repeated requests are answered in recorded order. With realtime, each
+    answer takes as long as it did when recorded, and streamed fragments arrive
+    at their recorded offsets; otherwise everything is answered at once. A
+    recorded failure is raised as ProviderError, and a request that was never
+    recorded (the replay has diverged from the recording) raises ProviderError.
+
+    Args:
+    session (RecordedSession): The session.
+    realtime (bool): Reproduce the recorded timings.
+
+    Returns:
+    Providers: The stub providers.
+    """
+    lock = threading.Lock()
+    turns = {audio_key(turn.audio): turn for turn in session.turns}
+    queues = {stage: defaultdict(deque) for stage in ('stt', 'llm', 'tts')}
+    for stage, events in session.calls.items():
+        for event in events:
+            queues[stage][event["key"]].append(event)
+
+    def wait(seconds):
+        if realtime and seconds > 0:
+            time.sleep(seconds)
+
+    def recorded(stage, key):
+        with lock:
+            pending = queues[stage].get(key)
+            if not pending:
+                raise ProviderError(f"No recorded {stage} response for {key[:60]!r}")
+            # The last recording of a request keeps answering repeats of it
+            return pending.popleft() if len(pending) > 1 else pending[0]
+
+    def transcribe(audio_bytes):
+        key = audio_key(audio_bytes)
+        turn = turns.get(key)
+        if turn is not None and turn.stt_seconds is not None:
+            wait(turn.stt_seconds)
+            return turn.transcript
+        event = recorded('stt', key)
+        wait(event["seconds"])
+        if "error" in event:
+            raise ProviderError(event["error"])
+        return event["response"]
+
+    def stream_response(chat_history):
+        event = recorded('llm', request_key(chat_history))
+        start = time.perf_counter()
+        for offset, fragment in event["fragments"]:
+            wait(offset - (time.perf_counter() - start))
+            yield fragment
+        if "error" in event:
+            raise ProviderError(event["error"])
+
+    def synthesize(text):
+        event = recorded('tts', text)
+        wait(event["seconds"])
+        if "error" in event:
+            raise ProviderError(event["error"])
+        return event["audio"]
+
+    return Providers(transcribe, stream_response, synthesize, session.settings.get("audio_format"),
+                     session.settings.get("names"))
+
+
+def run_session(turns, providers, settings, realtime=True, metrics=None, recorder=None):
+    """
+    Run turns through the streaming pipeline from prepared inputs, offline.
+
+    Each turn runs as in the main loop from the end of the user's speech:
+    the utterance is transcribed, the user message is built with the frame if
+    one is to be sent, and the answer is streamed, synthesized and played to a
+    null sink, which takes as long as the audio with realtime. Turns follow
+    each other without the user's thinking time. Context summarization is
+    not run.
+
+    Args:
+    turns (list): RecordedTurn objects; only audio, frame and frame_sent are used.
+    providers (Providers): The providers, e.g. from replay_providers() or stubs.
+    settings (dict): Session settings such as system_prompt (see SessionRecorder).
+    realtime (bool): Play audio in real time; otherwise playback takes no time.
+    metrics (Metrics): Receives the turn traces; a private one is created if None.
+    recorder (SessionRecorder): Records the run, if given; providers should be wrapped by it.
+
+    Returns:
+    list: The trace record of each turn, with the response text under 'response'.
+    """
+    from backend.voice_assistant.metrics import Metrics
+    from backend.voice_assistant.context import ChatContext
+    from backend.voice_assistant.pipeline import StreamingPipeline
+    from backend.voice_assistant.playback import AudioPlayer, NullSink
+    from backend.voice_assistant.vision import build_user_message
+
+    player = AudioPlayer(NullSink(realtime=realtime))
+    metrics = metrics or Metrics()
+    context = ChatContext(settings.get("system_prompt", ""), max_tokens=settings.get("context_max_tokens", 3000),
+                          keep_recent=settings.get("context_keep_recent", 4))
+
+    def play_fn(audio_bytes):
+        player.enqueue(audio_bytes, providers.audio_format)
+
+    records = []
+    try:
+        for turn in turns:
+            trace = metrics.start_turn(providers.names)
+            if recorder is not None:
+                recorder.start_turn()
+            trace.mark('vad_end')
+            speech_end = time.perf_counter()
+            with trace.span('stt', request_bytes=len(turn.audio)) as span:
+                transcript = providers.transcribe(turn.audio)
+                span['response_chars'] = len(transcript)
+            if recorder is not None:
+                recorder.record_turn(turn.audio, transcript, turn.frame, turn.frame_sent,
+                                     time.perf_counter() - speech_end)
+            context.append(build_user_message(
+                transcript, turn.frame if turn.frame_sent else None, settings.get("vision_detail", 'low')))
+            context.evict_images(settings.get("vision_keep_images", 1))
+
+            pipeline = StreamingPipeline(providers.stream_response, providers.synthesize, play_fn)
+            response_text = pipeline.run(context.messages(), trace)
+            player.wait()
+            context.append({"role": "assistant", "content": response_text})
+            record = trace.finish()
+            record["response"] = response_text
+            records.append(record)
+    finally:
+        player.close()
+    return records
+
+
+def replay_session(session, realtime=True, metrics=None):
+    """
+    Replay a recorded session through the streaming pipeline with stub providers.
+
+    Args:
+    session (RecordedSession): The session.
+    realtime (bool): Reproduce the recorded provider timings and play audio in real time;
+        otherwise everything runs as fast as it can, to measure the pipeline's own overhead.
+    metrics (Metrics): Receives the turn traces; a private one is created if None.
+
+    Returns:
+    list: The trace record of each turn, with the response text under 'response'.
+    """
+    return run_session(session.turns, replay_providers(session, realtime), session.settings, realtime, metrics)
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_session_recorder():
+    """
+    Return the process-wide session recorder, or None unless SESSION_RECORD_DIR is set.
+
+    Each process records into a new timestamped directory under SESSION_RECORD_DIR.
+
+    Returns:
+    SessionRecorder: The shared recorder.
+    """
+    global _recorder
+    from backend.voice_assistant.config import get_settings
+
+    settings = get_settings()
+    if not settings.SESSION_RECORD_DIR:
+        return None
+    with _recorder_lock:
+        if _recorder is None:
+            directory = os.path.join(settings.SESSION_RECORD_DIR, time.strftime("%Y%m%d-%H%M%S"))
+            _recorder = SessionRecorder(
+                directory,
+                system_prompt=settings.SYSTEM_PROMPT,
+                context_max_tokens=settings.CONTEXT_MAX_TOKENS,
+                context_keep_recent=settings.CONTEXT_KEEP_RECENT,
+                vision_detail=settings.VISION_DETAIL,
+                vision_keep_images=settings.VISION_KEEP_IMAGES
+            )
+            logging.info(f"Recording the session to {directory}")
+        return _recorder
@@ -0,0 +1,313 @@
+import re
+import time
+import logging
+import threading
+
+_WORD = re.compile(r"[\w']+")
+
+# Questions that differ in a number ("what is 7 times 8" / "7 times 9") never share an answer
+NUMBER_WORDS = re.compile(r"\b(?:\d+|zero|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|\w+teen|"
+                          r"twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety|hundred|thousand|million|billion)\b")
+# Words whose insertion, deletion or substitution does not change what is being asked
+FILLER_WORDS = frozenset(("um", "uh", "uhm", "er", "erm", "ah", "hmm", "mm", "oh", "so", "well", "okay", "ok",
+                          "please", "a", "an", "the"))
+
+# How eagerly to speculate: how long a partial transcript must stay unchanged,
+# how many words it needs, and how many filler-word edits still count as the same request
+SPECULATION_LEVELS = {
+    'conservative': {'stable_ms': 400, 'min_words': 3, 'max_edits': 0},
+    'balanced': {'stable_ms': 200, 'min_words': 2, 'max_edits': 0},
+    'aggressive': {'stable_ms': 100, 'min_words': 2, 'max_edits': 1},
+}
+
+
+def transcript_words(text):
+    """
+    Split a transcript into lower-case words, ignoring punctuation.
+
+    Args:
+    text (str): The transcript.
+
+    Returns:
+    list: The words.
+    """
+    return _WORD.findall(text.lower())
+
+
+def word_edit_distance(left, right):
+    """
+    Count the word insertions, deletions and substitutions that turn one word list into another.
+
+    Args:
+    left (list): Words.
+    right (list): Words.
+
+    Returns:
+    int: The Levenshtein distance over words.
+    """
+    previous = list(range(len(right) + 1))
+    for i, left_word in enumerate(left, 1):
+        current = [i]
+        for j, right_word in enumerate(right, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (left_word != right_word)))
+        previous = current
+    return previous[-1]
+
+
+_thread_state = threading.local()
+
+
+def speculating():
+    """
+    Tell whether the calling thread is making a speculative request.
+
+    Returns:
+    bool: True inside a speculative request's stream, e.g. for caches that should not count it.
+    """
+    return getattr(_thread_state, 'speculation', None) is not None
+
+
+def on_commit(callback):
+    """
+    Defer work of a speculative request until it is committed, e.g. storing its answer,
+    which was generated for a partial transcript.
+
+    Args:
+    callback (callable): callback(chat_history), called with the final chat history once the
+        request running on the calling thread has been committed and replayed in full; never
+        called if it is abandoned, fails or is cut short.
+
+    Returns:
+    bool: False if the calling thread is not making a speculative request.
+    """
+    speculation = getattr(_thread_state, 'speculation', None)
+    if speculation is None:
+        return False
+    speculation.on_replayed.append(callback)
+    return True
+
+
+def same_request(speculated, final, max_edits=0):
+    """
+    Tell whether a final transcript asks the same thing as the one speculated on.
+
+    Up to max_edits filler words may differ. Any other word, any number, and any
+    word the final transcript adds at the end (the user was not done yet) makes
+    it a different request.
+
+    Args:
+    speculated (list): Words of the speculated transcript, from transcript_words.
+    final (list): Words of the final transcript.
+    max_edits (int): Filler-word edits tolerated.
+
+    Returns:
+    bool: True if the speculative answer may be used for the final transcript.
+    """
+    if speculated == final:
+        return True
+    if max_edits <= 0 or not speculated or not final or speculated[-1] != final[-1]:
+        return False
+    if NUMBER_WORDS.findall(" ".join(speculated)) != NUMBER_WORDS.findall(" ".join(final)):
+        return False
+    content = [[word for word in words if word not in FILLER_WORDS] for words in (speculated, final)]
+    return content[0] == content[1] and word_edit_distance(speculated, final) <= max_edits
+
+
+class _Speculation:
+    # One speculative LLM request, streamed into a buffer on its own thread
+
+    def __init__(self, text, stream_fn, chat_history):
+        self.text = text
+        self.words = transcript_words(text)
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.tokens = []
+        self.done = False
+        self.failed = False
+        self.error = None
+        self.on_replayed = []
+        self.cancelled = threading.Event()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, args=(stream_fn, chat_history), daemon=True)
+        self._thread.start()
+
+    def _run(self, stream_fn, chat_history):
+        _thread_state.speculation = self
+        stream = None
+        try:
+            stream = stream_fn(chat_history)
+            for token in stream:
+                if self.cancelled.is_set():
+                    break
+                with self._condition:
+                    if self.first_token_at is None:
+                        self.first_token_at = time.perf_counter()
+                    self.tokens.append(token)
+                    self._condition.notify_all()
+        except Exception as e:
+            logging.error(f"Speculative response failed: {e}")
+            self.error = e
+            self.failed = True
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close()
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def replay(self, chat_history):
+        # Yields what has been buffered so far, then follows the live stream; a request that
+        # fails raises its error here too, so a cut-off answer is never taken for a whole one
+        index = 0
+        try:
+            while True:
+                with self._condition:
+                    while index >= len(self.tokens) and not self.done:
+                        self._condition.wait()
+                    if index >= len(self.tokens):
+                        if self.error is not None:
+                            raise self.error
+                        break
+                    token = self.tokens[index]
+                index += 1
+                yield token
+            for callback in self.on_replayed:
+                try:
+                    callback(chat_history)
+                except Exception as e:
+                    logging.error(f"Failed to finish committed speculation: {e}")
+        finally:
+            # A consumer that stops early (e.g. on barge-in) also stops the request
+            self.cancel()
+
+
+class SpeculativeResponder:
+    """
+    Start the LLM request from a stable partial transcript before the final one arrives.
+
+    Feed it partial transcripts while the user is speaking, with observe() or
+    watch(). Once a partial has stayed the same for stable_ms and has at least
+    min_words words, a speculative request is started in the background. If the
+    partial later stops being the same request (see same_request), the request is
+    cancelled and reissued from the new partial. commit() takes the final
+    transcript: if it is the same request as the speculated text, the speculative
+    stream is used (tokens that already arrived are replayed at once); otherwise,
+    or if the speculative request has failed, the speculation is cancelled and a
+    fresh request is made. If it fails after being used, the replayed stream
+    raises its error. Use one instance per turn.
+
+    Args:
+    stream_fn (callable): stream_fn(chat_history) -> iterable of text fragments.
+    build_history (callable): build_history(partial_text) -> the chat history to speculate with.
+    stable_ms (int): How long a partial must stay unchanged before speculating.
+    min_words (int): Shortest partial worth speculating on.
+    max_edits (int): Filler-word edits between speculated and final text that still count as a match;
+        numbers, other words and words added at the end never do.
+    """
+
+    def __init__(self, stream_fn, build_history, stable_ms=200, min_words=2, max_edits=0):
+        self.stream_fn = stream_fn
+        self.build_history = build_history
+        self.stable_ms = stable_ms
+        self.min_words = min_words
+        self.max_edits = max_edits
+        self.speculations = 0
+        self.result = None
+        self._current = None
+        self._candidate = None
+        self._candidate_since = None
+        self._committed = threading.Event()
+        self._lock = threading.Lock()
+
+    def observe(self, partial, now=None):
+        """
+        Report the latest partial transcript.
+
+        Args:
+        partial (str): The partial transcript.
+        now (float): time.perf_counter() of the observation; defaults to now.
+        """
+        now = time.perf_counter() if now is None else now
+        words = transcript_words(partial or "")
+        with self._lock:
+            if self._committed.is_set():
+                return
+            if words != self._candidate:
+                self._candidate = words
+                self._candidate_since = now
+                return
+            if len(words) < self.min_words or (now - self._candidate_since) * 1000 < self.stable_ms:
+                return
+            current = self._current
+            if current is not None and same_request(current.words, words, self.max_edits):
+                return
+            if current is not None:
+                current.cancel()
+            try:
+                chat_history = self.build_history(partial)
+            except Exception as e:
+                logging.error(f"Failed to build speculative request: {e}")
+                return
+            self._current = _Speculation(partial, self.stream_fn, chat_history)
+            self.speculations += 1
+
+    def watch(self, partial_fn, interval=0.05):
+        """
+        Poll partial_fn() on a background thread and observe its result until commit().
+
+        Args:
+        partial_fn (callable): partial_fn() -> str, e.g. StreamingTranscriber.partial.
+        interval (float): Seconds between polls.
+        """
+        def poll():
+            while not self._committed.wait(interval):
+                try:
+                    self.observe(partial_fn())
+                except Exception as e:
+                    logging.error(f"Failed to read partial transcript: {e}")
+                    return
+
+        threading.Thread(target=poll, name='speculation-watch', daemon=True).start()
+
+    def commit(self, final_text, chat_history):
+        """
+        Settle the turn on the final transcript.
+
+        Args:
+        final_text (str): The final transcript.
+        chat_history (list): The chat history for the final transcript, used if the speculation missed.
+
+        Returns:
+        iterable: The response text fragments.
+        """
+        committed_at = time.perf_counter()
+        with self._lock:
+            self._committed.set()
+            current = self._current
+        final_words = transcript_words(final_text)
+        distance = word_edit_distance(current.words, final_words) if current else None
+        hit = (current is not None and same_request(current.words, final_words, self.max_edits)
+               and not current.cancelled.is_set() and not current.failed)
+        self.result = {
+            "speculations": self.speculations,
+            "hit": hit,
+            "edits": distance,
+            "speculated": current.text if current else None,
+            # How far ahead of the final transcript the committed request was started
+            "head_start": committed_at - current.started_at if hit else 0.0,
+        }
+        if hit:
+            return current.replay(chat_history)
+        if current is not None:
+            current.cancel()
+        return self.stream_fn(chat_history)
+
+    def abandon(self):
+        """Cancel any speculation, e.g. when the utterance is discarded."""
+        with self._lock:
+            self._committed.set()
+            if self._current is not None:
+                self._current.cancel()
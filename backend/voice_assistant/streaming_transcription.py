@@ -0,0 +1,241 @@
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.voice_assistant.utils import pcm_to_wav
+
+_WORD = re.compile(r"[\w']+")
+
+
+def merge_overlap(left, right, max_words=12):
+    """
+    Join two transcripts of overlapping audio, dropping the words they share.
+
+    Finds the longest run of up to max_words words that ends the left text and
+    starts the right text (ignoring case and punctuation) and keeps it once.
+
+    Args:
+    left (str): Transcript of the earlier segment.
+    right (str): Transcript of the later segment.
+    max_words (int): Longest overlap considered.
+
+    Returns:
+    str: The joined transcript.
+    """
+    left_words = left.split()
+    right_words = right.split()
+    if not left_words:
+        return right.strip()
+    if not right_words:
+        return left.strip()
+
+    def normalize(words):
+        return [" ".join(_WORD.findall(word.lower())) for word in words]
+
+    left_norm = normalize(left_words[-max_words:])
+    right_norm = normalize(right_words[:max_words])
+    for size in range(min(len(left_norm), len(right_norm)), 0, -1):
+        if left_norm[-size:] == right_norm[:size]:
+            return " ".join(left_words + right_words[size:])
+    return " ".join(left_words + right_words)
+
+
+class StreamingTranscriber:
+    """
+    Interface for transcribers that accept audio while the user is still speaking.
+
+    feed() may be called from the recording thread with PCM chunks of any size;
+    partial() returns the best transcript so far; finish() ends the utterance and
+    returns the final transcript. close() releases resources without a result.
+    """
+
+    def feed(self, pcm_bytes):
+        raise NotImplementedError
+
+    def partial(self):
+        raise NotImplementedError
+
+    def finish(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ChunkedTranscriber(StreamingTranscriber):
+    """
+    Streaming fallback for Whisper-style backends that only transcribe whole files.
+
+    As audio arrives it is cut into segments of segment_ms that overlap by
+    overlap_ms, and each segment is uploaded on a thread pool as soon as it is
+    complete. Segment transcripts are stitched with merge_overlap. When speech
+    ends only the remaining tail has to be transcribed, so the final transcript
+    arrives roughly one short request after the end of speech instead of one
+    whole-utterance request. Use one instance per utterance.
+
+    Args:
+    transcribe (callable): transcribe(wav_bytes) -> str.
+    sample_rate (int): Sample rate of the PCM audio.
+    sample_width (int): Bytes per PCM sample.
+    segment_ms (int): Length of each uploaded segment.
+    overlap_ms (int): Audio shared by consecutive segments, so words cut at a boundary are heard whole once.
+    executor (Executor): Pool for the uploads; a private one is created if None.
+    """
+
+    def __init__(self, transcribe, sample_rate=16000, sample_width=2, segment_ms=4000, overlap_ms=800,
+                 executor=None):
+        if overlap_ms >= segment_ms:
+            raise ValueError("overlap_ms must be shorter than segment_ms")
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        bytes_per_ms = sample_rate * sample_width / 1000
+        self.segment_bytes = int(segment_ms * bytes_per_ms) // sample_width * sample_width
+        self.step_bytes = int((segment_ms - overlap_ms) * bytes_per_ms) // sample_width * sample_width
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=4, thread_name_prefix='stt-segment')
+        self._audio = bytearray()
+        self._next_start = 0
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def feed(self, pcm_bytes):
+        with self._lock:
+            self._audio.extend(pcm_bytes)
+            while self._next_start + self.segment_bytes <= len(self._audio):
+                self._submit(self._next_start, self._next_start + self.segment_bytes)
+                self._next_start += self.step_bytes
+
+    def _submit(self, start, end):
+        wav_bytes = pcm_to_wav(bytes(self._audio[start:end]), self.sample_rate, self.sample_width)
+        self._futures.append(self.executor.submit(self.transcribe, wav_bytes))
+
+    def _stitch(self, texts):
+        transcript = ""
+        for text in texts:
+            transcript = merge_overlap(transcript, text or "")
+        return transcript
+
+    def partial(self):
+        with self._lock:
+            futures = list(self._futures)
+        texts = []
+        for future in futures:
+            if not future.done():
+                break
+            texts.append(future.result())
+        return self._stitch(texts)
+
+    def finish(self):
+        with self._lock:
+            # The tail starts where the next segment would have, so it overlaps the last one
+            if len(self._audio) > self._next_start or not self._futures:
+                self._submit(self._next_start, len(self._audio))
+            futures = self._futures
+            self._futures = []
+            self._audio = bytearray()
+            self._next_start = 0
+        transcript = self._stitch(future.result() for future in futures)
+        self.close()
+        return transcript
+
+    def close(self):
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+
+class DeepgramStreamingTranscriber(StreamingTranscriber):
+    """
+    Streaming transcription over a Deepgram live websocket.
+
+    Audio is forwarded as it is fed; Deepgram returns interim and final results,
+    so the final transcript is ready almost as soon as the stream is closed.
+
+    Args:
+    api_key (str): The Deepgram API key.
+    sample_rate (int): Sample rate of the PCM audio.
+    model (str): The Deepgram model.
+    """
+
+    def __init__(self, api_key, sample_rate=16000, model="nova-2"):
+        from deepgram import LiveOptions, LiveTranscriptionEvents
+        from backend.voice_assistant.clients import get_client
+
+        self._finals = []
+        self._interim = ""
+        self._lock = threading.Lock()
+        self._connection = get_client('deepgram', api_key).listen.live.v("1")
+        self._connection.on(LiveTranscriptionEvents.Transcript, self._on_transcript)
+        self._connection.on(LiveTranscriptionEvents.Error, self._on_error)
+        options = LiveOptions(
+            model=model,
+            encoding="linear16",
+            sample_rate=sample_rate,
+            channels=1,
+            punctuate=True,
+            interim_results=True
+        )
+        if not self._connection.start(options):
+            raise RuntimeError("Failed to open Deepgram live connection")
+
+    def _on_transcript(self, connection, result, **kwargs):
+        text = result.channel.alternatives[0].transcript
+        with self._lock:
+            if result.is_final:
+                if text:
+                    self._finals.append(text)
+                self._interim = ""
+            else:
+                self._interim = text
+
+    def _on_error(self, connection, error, **kwargs):
+        logging.error(f"Deepgram live transcription error: {error}")
+
+    def feed(self, pcm_bytes):
+        self._connection.send(pcm_bytes)
+
+    def partial(self):
+        with self._lock:
+            return " ".join(self._finals + ([self._interim] if self._interim else []))
+
+    def finish(self):
+        # finish() flushes the stream and waits for the remaining results
+        self._connection.finish()
+        with self._lock:
+            return " ".join(self._finals + ([self._interim] if self._interim else []))
+
+    def close(self):
+        self._connection.finish()
+
+
+def create_streaming_transcriber(model, api_key, sample_rate=16000, local_model_path=None, executor=None,
+                                 segment_ms=4000, overlap_ms=800, transcribe=None):
+    """
+    Create a streaming transcriber for the given transcription model.
+
+    Args:
+    model (str): The transcription model ('openai', 'groq', 'deepgram', 'local').
+    api_key (str): The API key for the transcription service.
+    sample_rate (int): Sample rate of the PCM audio that will be fed.
+    local_model_path (str): The path to the local model (if applicable).
+    executor (Executor): Pool for chunked uploads.
+    segment_ms (int): Segment length for chunked transcription.
+    overlap_ms (int): Segment overlap for chunked transcription.
+    transcribe (callable): Optional transcribe(wav_bytes) -> str for chunked transcription, e.g. the
+        routed Providers.transcribe; defaults to calling the model directly.
+
+    Returns:
+    StreamingTranscriber: The transcriber.
+    """
+    if model == 'deepgram':
+        return DeepgramStreamingTranscriber(api_key, sample_rate)
+
+    if transcribe is None:
+        from backend.voice_assistant.transcription import transcribe_audio_bytes
+
+        def transcribe(wav_bytes):
+            return transcribe_audio_bytes(model, api_key, wav_bytes, local_model_path)
+
+    return ChunkedTranscriber(transcribe, sample_rate, executor=executor, segment_ms=segment_ms,
+                              overlap_ms=overlap_ms)
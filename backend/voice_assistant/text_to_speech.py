@@ -1,53 +1,159 @@
+import time
 import logging
 
-from openai import OpenAI
-from deepgram import DeepgramClient, SpeakOptions
+from backend.voice_assistant.backends import get_backend_registry
+from backend.voice_assistant.tts_cache import cache_key, get_tts_cache
 
+# Everything besides the text that determines the audio each provider returns
+OPENAI_TTS_OPTIONS = {"model": "tts-1", "voice": "fable", "response_format": "mp3"}
+DEEPGRAM_TTS_OPTIONS = {"model": "aura-angus-en", "encoding": "linear16", "container": "wav"}  # Change voice if needed
 
-def text_to_speech(model, api_key, text, output_file_path, local_model_path=None):
+# Quality tiers for adaptive TTS (see tts_quality.py), cheapest first; 'bitrate' is a guess at
+# bits per second of audio until response sizes are measured. The default options are the top tier.
+TTS_QUALITY_TIERS = {
+    'deepgram': [
+        {"name": "low", "options": {"model": "aura-angus-en", "encoding": "mp3", "bit_rate": 32000},
+         "format": "mp3", "bitrate": 32000},
+        {"name": "medium", "options": {"model": "aura-angus-en", "encoding": "mp3", "bit_rate": 48000},
+         "format": "mp3", "bitrate": 48000},
+        {"name": "high", "options": DEEPGRAM_TTS_OPTIONS, "format": "wav", "bitrate": 384000},
+    ],
+    'openai': [
+        # OpenAI has no bitrate control for MP3; the tiers differ in model
+        {"name": "medium", "options": OPENAI_TTS_OPTIONS, "format": "mp3", "bitrate": 64000},
+        {"name": "high", "options": dict(OPENAI_TTS_OPTIONS, model="tts-1-hd"), "format": "mp3", "bitrate": 64000},
+    ],
+}
+
+
+def tts_audio_format(model):
     """
-    Convert text to speech using the specified model.
+    Return the audio format produced by a TTS model.
+
+    Args:
+    model (str): The TTS backend ('openai', 'deepgram', 'local', or a registered plugin).
+
+    Returns:
+    str: The audio format ('mp3' or 'wav'), or None if the backend does not declare one.
+    """
+    return get_backend_registry().spec('tts', model).audio_format
+
+
+def tts_cache_options(model, local_model_path=None):
+    """
+    Return the options that, together with the text, identify the audio a TTS model produces.
 
     Args:
-    model (str): The model to use for TTS ('openai', 'deepgram', 'local').
+    model (str): The TTS backend ('openai', 'deepgram', 'local', or a registered plugin).
+    local_model_path (str): The path to the local model (if applicable).
+
+    Returns:
+    dict: The cache key options.
+    """
+    if model == 'openai':
+        return OPENAI_TTS_OPTIONS
+    if model == 'deepgram':
+        return DEEPGRAM_TTS_OPTIONS
+    if model == 'local':
+        from backend.voice_assistant.local_models import get_local_models
+        return {"voice": get_local_models(local_model_path).paths.get('tts')}
+    return {}
+
+
+def synthesize_speech(model, api_key, text, local_model_path=None, cache=None, strict=False, quality=None):
+    """
+    Convert text to speech using the specified model and return the audio in memory.
+
+    Results are cached by provider, voice options and normalized text, so a phrase
+    that has been spoken before is returned without calling the provider again.
+    With a quality controller, the request options come from the tier it picks,
+    and the time and size of every uncached request are reported back to it.
+
+    Args:
+    model (str): The TTS backend ('openai', 'deepgram', 'local', or a registered plugin).
     api_key (str): The API key for the TTS service.
     text (str): The text to convert to speech.
-    output_file_path (str): The path to save the generated speech audio file.
     local_model_path (str): The path to the local model (if applicable).
+    cache (TTSCache): The cache to use; defaults to the shared cache from get_settings().
+    strict (bool): Raise on failure instead of returning None.
+    quality (TTSQualityController): Optional controller for the model's TTS_QUALITY_TIERS.
+
+    Returns:
+    bytes: The encoded speech audio (see tts_audio_format; with a quality controller, any of its
+        formats), or None on failure.
     """
+    tier = quality.choose(text) if quality is not None else None
+    options = tier["options"] if tier is not None else None
+    cache = cache if cache is not None else get_tts_cache()
+    key = None
+    if cache is not None:
+        key = cache_key(model, options or tts_cache_options(model, local_model_path), text)
+        audio_bytes = cache.get(key)
+        if audio_bytes is not None:
+            return audio_bytes
+
+    start = time.perf_counter()
+    audio_bytes = _synthesize_uncached(model, api_key, text, local_model_path, strict, options)
+    if audio_bytes and tier is not None:
+        quality.observe(tier, text, len(audio_bytes), time.perf_counter() - start)
+    if audio_bytes and key is not None:
+        cache.put(key, audio_bytes)
+    return audio_bytes
+
+
+def _synthesize_uncached(model, api_key, text, local_model_path=None, strict=False, options=None):
     try:
-        if model == 'openai':
-            client = OpenAI(api_key=api_key)
-            speech_response = client.audio.speech.create(
-                model="tts-1",
-                voice="fable",
-                input=text,
-                response_format="mp3"
-            )
-            logging.info(f"OpenAI filepath: {output_file_path}")
-            speech_response.stream_to_file(output_file_path)
-            with open(output_file_path, "wb") as audio_file:
-                # Ensure this correctly accesses the binary content
-                audio_file.write(speech_response['data'])
-
-        elif model == 'deepgram':
-            client = DeepgramClient(api_key=api_key)
-            options = SpeakOptions(
-                model="aura-angus-en",  # Change voice if needed
-                encoding="linear16",
-                container="wav"
-            )
-            SPEAK_OPTIONS = {"text": text}
-            response = client.speak.v("1").save(
-                output_file_path, SPEAK_OPTIONS, options)
-            logging.info(f"Deepgram response: {response}")
-
-        elif model == 'local':
-            # Placeholder for local TTS model
-            with open(output_file_path, "wb") as f:
-                f.write(b"Local TTS audio data")
-        else:
-            raise ValueError("Unsupported TTS model")
+        backend = get_backend_registry().get('tts', model)
+        if options is not None:
+            return backend(api_key, text, local_model_path, options)
+        return backend(api_key, text, local_model_path)
     except Exception as e:
         logging.error(f"Failed to convert text to speech: {e}")
-        return None
\ No newline at end of file
+        if strict:
+            raise
+        return None
+
+
+def text_to_speech(model, api_key, text, output_file_path, local_model_path=None):
+    """
+    Convert text to speech using the specified model.
+
+    Args:
+    model (str): The TTS backend ('openai', 'deepgram', 'local', or a registered plugin).
+    api_key (str): The API key for the TTS service.
+    text (str): The text to convert to speech.
+    output_file_path (str): The path to save the generated speech audio file.
+    local_model_path (str): The path to the local model (if applicable).
+    """
+    audio_bytes = synthesize_speech(model, api_key, text, local_model_path)
+    if audio_bytes is None:
+        return None
+    logging.info(f"{model} TTS filepath: {output_file_path}")
+    with open(output_file_path, "wb") as audio_file:
+        audio_file.write(audio_bytes)
+
+
+# Backends, imported through the registry in backends.py when first selected
+
+def _synthesize_openai(api_key, text, local_model_path, options=None):
+    from backend.voice_assistant.clients import get_client
+    client = get_client('openai', api_key)
+    speech_response = client.audio.speech.create(input=text, **(options or OPENAI_TTS_OPTIONS))
+    return speech_response.content
+
+
+def _synthesize_deepgram(api_key, text, local_model_path, options=None):
+    from deepgram import SpeakOptions
+    from backend.voice_assistant.clients import get_client
+    client = get_client('deepgram', api_key)
+    options = SpeakOptions(**(options or DEEPGRAM_TTS_OPTIONS))
+    SPEAK_OPTIONS = {"text": text}
+    response = client.speak.v("1").stream(SPEAK_OPTIONS, options)
+    audio_bytes = response.stream.getvalue()
+    logging.info(f"Deepgram response: {len(audio_bytes)} bytes")
+    return audio_bytes
+
+
+def _synthesize_local(api_key, text, local_model_path):
+    from backend.voice_assistant.local_models import get_local_models
+    return get_local_models(local_model_path).synthesize(text)
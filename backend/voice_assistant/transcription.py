@@ -1,8 +1,6 @@
 import logging
 
-from groq import Groq
-from openai import OpenAI
-from deepgram import Deepgram
+from backend.voice_assistant.backends import get_backend
 
 
 def transcribe_audio(model, api_key, audio_file_path, local_model_path=None):
@@ -10,7 +8,7 @@ def transcribe_audio(model, api_key, audio_file_path, local_model_path=None):
     Transcribe an audio file using the specified model.
 
     Args:
-    model (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'local').
+    model (str): The transcription backend ('openai', 'groq', 'deepgram', 'local', or a registered plugin).
     api_key (str): The API key for the transcription service.
     audio_file_path (str): The path to the audio file to transcribe.
     local_model_path (str): The path to the local model (if applicable).
@@ -19,34 +17,70 @@ def transcribe_audio(model, api_key, audio_file_path, local_model_path=None):
     str: The transcribed text.
     """
     try:
-        if model == 'openai':
-            client = OpenAI(api_key=api_key)
-            with open(audio_file_path, "rb") as audio_file:
-                transcription = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file
-                )
-            return transcription.text
-        elif model == 'groq':
-            client = Groq(api_key=api_key)
-            with open(audio_file_path, "rb") as audio_file:
-                transcription = client.audio.transcriptions.create(
-                    model="whisper-large-v3",
-                    file=audio_file
-                )
-            return transcription.text
-        elif model == 'deepgram':
-            # Placeholder for Deepgram STT model transcription
-            pass
-            # client = Deepgram(api_key=api_key)
-            # with open(audio_file_path, "rb") as audio_file:
-            #     transcription = client.transcription.pre_recorded(audio_file, {'punctuate': True, 'model': "whisper"})
-            # return transcription['results']['channels'][0]['alternatives'][0]['transcript']
-        elif model == 'local':
-            # Placeholder for local STT model transcription
-            return "Transcribed text from local model"
-        else:
-            raise ValueError("Unsupported transcription model")
+        with open(audio_file_path, "rb") as audio_file:
+            audio_bytes = audio_file.read()
+    except OSError as e:
+        logging.error(f"Failed to transcribe audio: {e}")
+        return "Error in transcribing audio"
+    return transcribe_audio_bytes(model, api_key, audio_bytes, local_model_path)
+
+
+def transcribe_audio_bytes(model, api_key, audio_bytes, local_model_path=None, file_name="audio.wav", strict=False):
+    """
+    Transcribe in-memory audio data using the specified model.
+
+    Args:
+    model (str): The transcription backend ('openai', 'groq', 'deepgram', 'local', or a registered plugin).
+    api_key (str): The API key for the transcription service.
+    audio_bytes (bytes): The encoded audio (e.g. WAV data) to transcribe.
+    local_model_path (str): The path to the local model (if applicable).
+    file_name (str): The file name sent with the upload; its extension tells the service the format.
+    strict (bool): Raise on failure instead of returning an error message as the transcript.
+
+    Returns:
+    str: The transcribed text.
+    """
+    try:
+        return get_backend('stt', model)(api_key, audio_bytes, local_model_path, file_name)
     except Exception as e:
         logging.error(f"Failed to transcribe audio: {e}")
+        if strict:
+            raise
         return "Error in transcribing audio"
+
+
+# Backends, imported through the registry in backends.py when first selected
+
+def _transcribe_openai(api_key, audio_bytes, local_model_path, file_name):
+    from backend.voice_assistant.clients import get_client
+    client = get_client('openai', api_key)
+    transcription = client.audio.transcriptions.create(
+        model="whisper-1",
+        file=(file_name, audio_bytes)
+    )
+    return transcription.text
+
+
+def _transcribe_groq(api_key, audio_bytes, local_model_path, file_name):
+    from backend.voice_assistant.clients import get_client
+    client = get_client('groq', api_key)
+    transcription = client.audio.transcriptions.create(
+        model="whisper-large-v3",
+        file=(file_name, audio_bytes)
+    )
+    return transcription.text
+
+
+def _transcribe_deepgram(api_key, audio_bytes, local_model_path, file_name):
+    from deepgram import PrerecordedOptions
+    from backend.voice_assistant.clients import get_client
+    client = get_client('deepgram', api_key)
+    options = PrerecordedOptions(model="nova-2", punctuate=True)
+    transcription = client.listen.prerecorded.v("1").transcribe_file(
+        {"buffer": audio_bytes}, options)
+    return transcription.results.channels[0].alternatives[0].transcript
+
+
+def _transcribe_local(api_key, audio_bytes, local_model_path, file_name):
+    from backend.voice_assistant.local_models import get_local_models
+    return get_local_models(local_model_path).transcribe(audio_bytes)
@@ -0,0 +1,191 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """
+    Normalize text so trivially different spellings of a phrase share a cache entry.
+
+    Args:
+    text (str): The text to speak.
+
+    Returns:
+    str: The text in NFKC form, lower-cased, with whitespace collapsed.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def cache_key(provider, options, text):
+    """
+    Build the content address of a synthesized phrase.
+
+    Args:
+    provider (str): The TTS provider.
+    options (dict): Everything else that changes the audio (model, voice, encoding...).
+    text (str): The text to speak.
+
+    Returns:
+    str: A hex SHA-256 digest.
+    """
+    payload = json.dumps([provider, options, normalize_text(text)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech with byte-bounded LRU eviction.
+
+    Entries live in memory and, if disk_dir is set, also in a second, larger tier
+    on disk that survives restarts. A disk hit is promoted back into memory.
+
+    Args:
+    max_bytes (int): Memory tier budget.
+    disk_dir (str): Directory for the disk tier; None disables it.
+    disk_max_bytes (int): Disk tier budget.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, disk_dir=None, disk_max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".audio"):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime, name[:-len(".audio")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.audio")
+
+    def get(self, key):
+        """
+        Look up a phrase.
+
+        Args:
+        key (str): The key from cache_key.
+
+        Returns:
+        bytes: The cached audio, or None on a miss.
+        """
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+            if key in self._disk:
+                try:
+                    with open(self._disk_path(key), "rb") as audio_file:
+                        audio = audio_file.read()
+                    os.utime(self._disk_path(key))
+                    self._disk.move_to_end(key)
+                    self._store_memory(key, audio)
+                    self.disk_hits += 1
+                    return audio
+                except OSError as e:
+                    logging.warning(f"Dropping unreadable TTS cache entry {key}: {e}")
+                    self._disk_bytes -= self._disk.pop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, audio):
+        """
+        Store a phrase.
+
+        Args:
+        key (str): The key from cache_key.
+        audio (bytes): The synthesized audio.
+        """
+        with self._lock:
+            self._store_memory(key, audio)
+            if self.disk_dir and key not in self._disk and len(audio) <= self.disk_max_bytes:
+                try:
+                    # Write then rename, so a crash never leaves a truncated entry
+                    tmp_path = self._disk_path(key) + ".tmp"
+                    with open(tmp_path, "wb") as audio_file:
+                        audio_file.write(audio)
+                    os.replace(tmp_path, self._disk_path(key))
+                    self._disk[key] = len(audio)
+                    self._disk_bytes += len(audio)
+                    while self._disk_bytes > self.disk_max_bytes:
+                        old_key, size = self._disk.popitem(last=False)
+                        self._disk_bytes -= size
+                        os.remove(self._disk_path(old_key))
+                except OSError as e:
+                    logging.warning(f"Failed to write TTS cache entry {key}: {e}")
+
+    def _store_memory(self, key, audio):
+        if len(audio) > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def stats(self):
+        """
+        Report hit/miss counters and tier sizes.
+
+        Returns:
+        dict: Counters, hit rate and the bytes and entries held in each tier.
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache():
+    """
+    Return the process-wide TTS cache configured from get_settings(), or None if caching is disabled.
+
+    Returns:
+    TTSCache: The shared cache.
+    """
+    global _cache
+    from backend.voice_assistant.config import get_settings
+
+    settings = get_settings()
+    if not settings.TTS_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache(settings.TTS_CACHE_MAX_BYTES, settings.TTS_CACHE_DIR, settings.TTS_CACHE_DISK_MAX_BYTES)
+        return _cache
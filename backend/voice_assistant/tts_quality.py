@@ -0,0 +1,162 @@
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+QUALITY_TIERS = ('low', 'medium', 'high')
+# Speaking rate used to guess how much audio a text makes, ~15 characters a second
+SECONDS_PER_CHAR = 1 / 15
+
+
+class TTSQualityController:
+    """
+    Picks the quality tier of each TTS request from recent latency and bandwidth.
+
+    Every uncached request is measured. Over the recent window, request time is
+    fitted as a fixed overhead plus response bytes over bandwidth, so the
+    bandwidth is known whichever tier was used. Each tier also keeps the bytes
+    it returns per character and how much slower than the fit it runs, e.g.
+    for a slower model. The controller then predicts the time each tier would
+    take for the next text and picks the best tier predicted to finish within
+    target_seconds. The prediction includes a margin from the 90th percentile
+    of recent misfits, so congestion moves requests to smaller encodings
+    before the tail grows. It steps up one tier at a time, and only with room
+    to spare, so it does not flap. Measurements older than max_age are
+    dropped, so an idle network is noticed once congestion clears.
+
+    Args:
+    tiers (list): The provider's tiers, cheapest first: dicts with 'name' (one of QUALITY_TIERS),
+        'options' (the request options), 'format' ('mp3', 'wav') and 'bitrate' (bits per second of
+        audio, a guess at response sizes until they are measured).
+    min_tier (str): Lowest tier that may be used.
+    max_tier (str): Highest tier that may be used. If the provider has no tier within the bounds,
+        its tier nearest to them is the only one used.
+    target_seconds (float): Time a request should take at most.
+    window (int): Recent requests the estimates are made from.
+    max_age (float): Seconds after which a measurement is no longer used.
+    start_tier (str): Tier used before anything is measured; defaults to the middle of the bounds.
+    step_up_ratio (float): A higher tier is chosen only if predicted to take under this share of
+        target_seconds.
+    clock (callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, tiers, min_tier='low', max_tier='high', target_seconds=1.0, window=20, max_age=60.0,
+                 start_tier=None, step_up_ratio=0.8, clock=time.monotonic):
+        low, high = QUALITY_TIERS.index(min_tier), QUALITY_TIERS.index(max_tier)
+        self.tiers = [tier for tier in tiers if low <= QUALITY_TIERS.index(tier['name']) <= high]
+        if not self.tiers:
+            # The provider has nothing within the bounds, e.g. no 'low' tier; use its nearest tier
+            self.tiers = [min(tiers, key=lambda tier: min(abs(QUALITY_TIERS.index(tier['name']) - low),
+                                                          abs(QUALITY_TIERS.index(tier['name']) - high)))]
+        self.target_seconds = target_seconds
+        self.max_age = max_age
+        self.step_up_ratio = step_up_ratio
+        self.clock = clock
+        names = [tier['name'] for tier in self.tiers]
+        self._current = names.index(start_tier) if start_tier in names else (len(self.tiers) - 1) // 2
+        self._bytes_per_char = [tier['bitrate'] / 8 * SECONDS_PER_CHAR for tier in self.tiers]
+        self._samples = deque(maxlen=window)
+        self._counts = [0] * len(self.tiers)
+        self._lock = threading.Lock()
+
+    @property
+    def formats(self):
+        """
+        The audio formats the allowed tiers return.
+        """
+        return {tier['format'] for tier in self.tiers}
+
+    def _recent(self):
+        cutoff = self.clock() - self.max_age
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return list(self._samples)
+
+    def _fit(self, samples):
+        sizes = np.array([sample[3] for sample in samples], dtype=float)
+        seconds = np.array([sample[4] for sample in samples])
+        per_byte, overhead = 0.0, -1.0
+        if len(samples) >= 3 and sizes.std() > 0.1 * sizes.mean():
+            per_byte, overhead = np.polyfit(sizes, seconds, 1)
+        if per_byte <= 0 or not 0 <= overhead <= seconds.min():
+            # Sizes too alike, or too noisy, to tell overhead from bandwidth; blaming bandwidth is the cautious choice
+            overhead = 0.0
+            per_byte = float(np.mean(seconds / np.maximum(sizes, 1.0)))
+        misfits = seconds - (overhead + per_byte * sizes)
+        return overhead, per_byte, misfits
+
+    def estimate(self):
+        """
+        Return the current network estimates.
+
+        Returns:
+        dict: 'overhead' seconds per request and 'bandwidth' in bytes per second (None until
+            measured; inf if response size makes no difference), and the number of 'samples'.
+        """
+        with self._lock:
+            samples = self._recent()
+            if not samples:
+                return {"overhead": None, "bandwidth": None, "samples": 0}
+            overhead, per_byte, _ = self._fit(samples)
+        return {"overhead": overhead, "bandwidth": 1 / per_byte if per_byte > 0 else float('inf'),
+                "samples": len(samples)}
+
+    def choose(self, text):
+        """
+        Pick the tier for a request.
+
+        Args:
+        text (str): The text to synthesize.
+
+        Returns:
+        dict: The tier, one of the tiers given.
+        """
+        with self._lock:
+            samples = self._recent()
+            if not samples:
+                return self.tiers[self._current]
+            overhead, per_byte, misfits = self._fit(samples)
+            used = np.array([sample[1] for sample in samples])
+            offsets = [float(np.median(misfits[used == index])) if (used == index).any() else 0.0
+                       for index in range(len(self.tiers))]
+            # How much slower than its tier's typical request a request may be, for the tail
+            margin = max(float(np.quantile(misfits - np.take(offsets, used), 0.9)), 0.0)
+            chosen = 0
+            for index in range(len(self.tiers) - 1, -1, -1):
+                predicted = overhead + per_byte * self._bytes_per_char[index] * len(text) + offsets[index] + margin
+                limit = self.target_seconds * (self.step_up_ratio if index > self._current else 1.0)
+                if predicted <= limit:
+                    chosen = index
+                    break
+            self._current = min(chosen, self._current + 1)
+            return self.tiers[self._current]
+
+    def observe(self, tier, text, size, seconds):
+        """
+        Record how an uncached request went.
+
+        Args:
+        tier (dict): The tier it used, as returned by choose().
+        text (str): The text synthesized.
+        size (int): Bytes of audio returned.
+        seconds (float): Time the request took.
+        """
+        index = next(index for index, candidate in enumerate(self.tiers) if candidate is tier)
+        with self._lock:
+            if text:
+                self._bytes_per_char[index] += 0.3 * (size / len(text) - self._bytes_per_char[index])
+            self._samples.append((self.clock(), index, len(text), size, seconds))
+            self._counts[index] += 1
+
+    def stats(self):
+        """
+        Return the requests made per tier and the current tier.
+
+        Returns:
+        dict: Requests per tier name, and 'current' tier name.
+        """
+        with self._lock:
+            stats = {tier['name']: count for tier, count in zip(self.tiers, self._counts)}
+            stats['current'] = self.tiers[self._current]['name']
+        return stats
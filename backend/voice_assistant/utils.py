@@ -1,4 +1,6 @@
+import io
 import os
+import wave
 import logging
 
 
@@ -19,3 +21,25 @@ def delete_file(file_path):
             f"Permission denied when trying to delete file: {file_path}")
     except OSError as e:
         logging.error(f"Error deleting file {file_path}: {e}")
+
+
+def pcm_to_wav(pcm_bytes, sample_rate=16000, sample_width=2, channels=1):
+    """
+    Wrap raw PCM data in a WAV container, in memory.
+
+    Args:
+    pcm_bytes (bytes): Raw little-endian PCM data.
+    sample_rate (int): Sample rate of the audio.
+    sample_width (int): Bytes per sample.
+    channels (int): Number of interleaved channels.
+
+    Returns:
+    bytes: The WAV data.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm_bytes)
+    return buffer.getvalue()
@@ -0,0 +1,259 @@
+import io
+import wave
+import numpy as np
+
+
+def pcm_to_float(pcm_bytes, sample_width=2):
+    """
+    Convert little-endian signed PCM bytes to float samples in [-1, 1].
+
+    Args:
+    pcm_bytes (bytes): Raw mono PCM data.
+    sample_width (int): Bytes per sample (1, 2 or 4).
+
+    Returns:
+    np.ndarray: float32 samples.
+    """
+    if sample_width == 1:
+        # 8-bit WAV is unsigned
+        return (np.frombuffer(pcm_bytes, dtype=np.uint8).astype(np.float32) - 128) / 128
+    dtype = {2: np.int16, 4: np.int32}[sample_width]
+    return np.frombuffer(pcm_bytes, dtype=dtype).astype(np.float32) / float(np.iinfo(dtype).max)
+
+
+def frame_features(samples, frame_length):
+    """
+    Compute per-frame energy and zero-crossing rate for whole frames of a signal.
+
+    Args:
+    samples (np.ndarray): float samples; a trailing partial frame is ignored.
+    frame_length (int): Samples per frame.
+
+    Returns:
+    tuple: (energy in dBFS, zero-crossing rate in crossings per sample), one value per frame.
+    """
+    n_frames = len(samples) // frame_length
+    frames = samples[:n_frames * frame_length].reshape(n_frames, frame_length)
+    energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_length
+    return energy_db, zcr
+
+
+class EnergyVAD:
+    """
+    Frame-level voice activity detector based on energy and zero-crossing rate.
+
+    A frame counts as speech when its energy is threshold_db above a running
+    noise-floor estimate (and above min_energy_db), and its zero-crossing rate is
+    below max_zcr, which rejects broadband hiss that is loud but not voiced.
+    The noise floor follows quiet frames quickly downwards and slowly upwards.
+
+    Any object with a frame_length attribute and a classify(samples) method
+    returning one boolean per frame can be used in its place by Endpointer.
+
+    Args:
+    sample_rate (int): Sample rate of the audio.
+    frame_ms (int): Frame length in milliseconds.
+    threshold_db (float): Margin above the noise floor for a speech frame.
+    min_energy_db (float): Absolute energy below which a frame is never speech.
+    max_zcr (float): Zero-crossing rate above which a frame is never speech.
+    noise_adapt (float): How fast the noise floor rises towards quiet-frame energy (0-1).
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, threshold_db=12.0, min_energy_db=-50.0, max_zcr=0.45,
+                 noise_adapt=0.05):
+        self.sample_rate = sample_rate
+        self.frame_length = sample_rate * frame_ms // 1000
+        self.threshold_db = threshold_db
+        self.min_energy_db = min_energy_db
+        self.max_zcr = max_zcr
+        self.noise_adapt = noise_adapt
+        self.noise_floor_db = None
+
+    def reset(self):
+        self.noise_floor_db = None
+
+    def classify(self, samples):
+        """
+        Classify whole frames of a signal as speech or non-speech.
+
+        Args:
+        samples (np.ndarray): float samples; a trailing partial frame is ignored.
+
+        Returns:
+        np.ndarray: One boolean per frame.
+        """
+        energy_db, zcr = frame_features(samples, self.frame_length)
+        if not len(energy_db):
+            return np.zeros(0, dtype=bool)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = float(np.percentile(energy_db, 10))
+
+        threshold = max(self.noise_floor_db + self.threshold_db, self.min_energy_db)
+        speech = (energy_db > threshold) & (zcr < self.max_zcr)
+
+        quiet = energy_db[~speech]
+        if len(quiet):
+            level = float(np.mean(quiet))
+            if level < self.noise_floor_db:
+                self.noise_floor_db = level
+            else:
+                self.noise_floor_db += self.noise_adapt * (level - self.noise_floor_db)
+        return speech
+
+
+class Endpointer:
+    """
+    Streaming endpointer that cuts utterances out of a stream of PCM chunks.
+
+    An utterance starts after min_speech_ms of consecutive speech frames and ends
+    once hangover_ms of non-speech follows it, so a short pause inside a sentence
+    does not end it but the utterance is emitted as soon as the hangover expires.
+    pre_roll_ms of audio before the detected start is kept so soft onsets are not
+    clipped.
+
+    Args:
+    vad (EnergyVAD): The frame classifier.
+    sample_width (int): Bytes per PCM sample.
+    hangover_ms (int): Trailing non-speech that ends an utterance.
+    min_speech_ms (int): Consecutive speech needed to start an utterance.
+    pre_roll_ms (int): Audio kept from before the start of speech.
+    max_utterance_ms (int): Utterances are cut at this length.
+    on_audio (callable): Optional on_audio(pcm_bytes), called with the audio of the current
+        utterance as it grows (pre-roll included), e.g. to feed a streaming transcriber.
+    """
+
+    def __init__(self, vad, sample_width=2, hangover_ms=300, min_speech_ms=120, pre_roll_ms=200,
+                 max_utterance_ms=30000, on_audio=None):
+        self.vad = vad
+        self.on_audio = on_audio
+        self.sample_width = sample_width
+        frame_ms = 1000 * vad.frame_length / vad.sample_rate
+        self.frame_bytes = vad.frame_length * sample_width
+        self.hangover_frames = max(1, round(hangover_ms / frame_ms))
+        self.min_speech_frames = max(1, round(min_speech_ms / frame_ms))
+        self.pre_roll_frames = round(pre_roll_ms / frame_ms)
+        self.max_utterance_frames = round(max_utterance_ms / frame_ms)
+        self.reset()
+
+    def reset(self):
+        self._pending = b""
+        self._frames = []
+        self._in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self.frames_seen = 0
+        self.speech_started_frame = None
+
+    @property
+    def in_speech(self):
+        return self._in_speech
+
+    def feed(self, pcm_bytes):
+        """
+        Process a chunk of PCM audio.
+
+        Args:
+        pcm_bytes (bytes): Raw mono PCM data of any length.
+
+        Returns:
+        list: The utterances (PCM bytes) that ended within this chunk, usually zero or one.
+        """
+        data = self._pending + pcm_bytes
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        if not usable:
+            return []
+
+        speech = self.vad.classify(pcm_to_float(data[:usable], self.sample_width))
+        utterances = []
+        for index, is_speech in enumerate(speech):
+            start = index * self.frame_bytes
+            frame = data[start:start + self.frame_bytes]
+            utterance = self._step(frame, bool(is_speech))
+            if utterance is not None:
+                utterances.append(utterance)
+        return utterances
+
+    def flush(self):
+        """
+        End the stream, returning any utterance still in progress.
+
+        Returns:
+        bytes: The unfinished utterance, or None.
+        """
+        utterance = b"".join(self._frames) if self._in_speech else None
+        self.reset()
+        return utterance
+
+    def _step(self, frame, is_speech):
+        self.frames_seen += 1
+        self._frames.append(frame)
+
+        if not self._in_speech:
+            self._speech_run = self._speech_run + 1 if is_speech else 0
+            if self._speech_run >= self.min_speech_frames:
+                self._in_speech = True
+                self._silence_run = 0
+                self.speech_started_frame = self.frames_seen - self._speech_run
+                if self.on_audio is not None:
+                    self.on_audio(b"".join(self._frames))
+            else:
+                # Only keep the pre-roll plus the current run of speech frames
+                keep = self.pre_roll_frames + self._speech_run
+                if len(self._frames) > keep:
+                    del self._frames[:len(self._frames) - keep]
+            return None
+
+        if self.on_audio is not None:
+            self.on_audio(frame)
+        self._silence_run = 0 if is_speech else self._silence_run + 1
+        if self._silence_run >= self.hangover_frames or len(self._frames) >= self.max_utterance_frames:
+            utterance = b"".join(self._frames)
+            self._frames = []
+            self._in_speech = False
+            self._speech_run = 0
+            return utterance
+        return None
+
+
+def read_wav(source):
+    """
+    Read a mono WAV file or in-memory WAV data.
+
+    Args:
+    source (str or bytes): A file path or WAV bytes.
+
+    Returns:
+    tuple: (PCM bytes, sample rate, sample width).
+    """
+    with wave.open(io.BytesIO(source) if isinstance(source, bytes) else source, "rb") as wav_file:
+        if wav_file.getnchannels() != 1:
+            raise ValueError("Endpointing expects mono audio")
+        return wav_file.readframes(wav_file.getnframes()), wav_file.getframerate(), wav_file.getsampwidth()
+
+
+def endpoint_wav(source, chunk_ms=20, **endpointer_options):
+    """
+    Run the endpointer over a WAV file offline, as if it were streamed live.
+
+    Args:
+    source (str or bytes): A mono WAV file path or WAV bytes.
+    chunk_ms (int): Size of the chunks fed to the endpointer, like microphone reads.
+    **endpointer_options: Passed to Endpointer.
+
+    Returns:
+    list: (utterance PCM bytes, time in seconds at which it was emitted) per utterance.
+    """
+    pcm, sample_rate, sample_width = read_wav(source)
+    endpointer = Endpointer(EnergyVAD(sample_rate), sample_width, **endpointer_options)
+    chunk_bytes = sample_rate * chunk_ms // 1000 * sample_width
+    results = []
+    for offset in range(0, len(pcm), chunk_bytes):
+        for utterance in endpointer.feed(pcm[offset:offset + chunk_bytes]):
+            results.append((utterance, min(offset + chunk_bytes, len(pcm)) / sample_width / sample_rate))
+    tail = endpointer.flush()
+    if tail:
+        results.append((tail, len(pcm) / sample_width / sample_rate))
+    return results
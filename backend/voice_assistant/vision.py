@@ -0,0 +1,138 @@
+import re
+import json
+import base64
+
+# Response models that accept image parts in user messages
+VISION_MODELS = ('openai',)
+
+IMAGE_PLACEHOLDER = "[webcam image from an earlier turn omitted]"
+
+# Words that suggest a question is about what the camera sees; erring towards too many is safe
+_VISUAL_REFERENCE = re.compile(
+    r"\b(?:this|that|these|those|here|there|it|its|i|i'm|me|my|mine|am|you|see|seeing|look|looks|looking|"
+    r"show|showing|hold|holding|wearing|picture|photo|image|camera|screen|page|read|color|colour|"
+    r"front|behind|left|right|table|desk|wall|room|hand|hands)\b")
+
+
+def supports_vision(model):
+    """
+    Check whether a response model accepts images.
+
+    Args:
+    model (str): The response generation model ('openai', 'groq', 'local').
+
+    Returns:
+    bool: True if images can be attached for this model.
+    """
+    return model in VISION_MODELS
+
+
+def build_user_message(text, image_jpeg=None, detail='low'):
+    """
+    Build a user chat message, attaching a JPEG image if one is given.
+
+    Args:
+    text (str): The user's transcribed input.
+    image_jpeg (bytes): JPEG data to attach, or None for a text-only message.
+    detail (str): The image detail level requested from the model ('low', 'high', 'auto').
+
+    Returns:
+    dict: The chat message.
+    """
+    if image_jpeg is None:
+        return {"role": "user", "content": text}
+    data_url = "data:image/jpeg;base64," + base64.b64encode(image_jpeg).decode('ascii')
+    return {
+        "role": "user",
+        "content": [
+            {"type": "text", "text": text},
+            {"type": "image_url", "image_url": {"url": data_url, "detail": detail}}
+        ]
+    }
+
+
+def has_image(message):
+    """
+    Check whether a chat message carries an image part.
+
+    Args:
+    message (dict): The chat message.
+
+    Returns:
+    bool: True if the message content contains an image.
+    """
+    content = message.get("content")
+    return isinstance(content, list) and any(part.get("type") == "image_url" for part in content)
+
+
+def message_text(message):
+    """
+    Return the text of a chat message, joining text parts of multi-part content.
+
+    Args:
+    message (dict): The chat message.
+
+    Returns:
+    str: The message text.
+    """
+    content = message.get("content")
+    if isinstance(content, list):
+        return " ".join(part["text"] for part in content if part.get("type") == "text")
+    return content or ""
+
+
+def evict_images(chat_history, keep_last=1, placeholder=IMAGE_PLACEHOLDER):
+    """
+    Replace images in all but the most recent messages with a text placeholder.
+
+    Args:
+    chat_history (list): The chat history, modified in place.
+    keep_last (int): Number of most recent image-bearing messages left untouched.
+    placeholder (str): Text that stands in for an evicted image.
+
+    Returns:
+    int: The number of messages whose image was removed.
+    """
+    seen = 0
+    evicted = 0
+    for index in range(len(chat_history) - 1, -1, -1):
+        message = chat_history[index]
+        if not has_image(message):
+            continue
+        seen += 1
+        if seen <= keep_last:
+            continue
+        text = message_text(message)
+        chat_history[index] = dict(message, content=f"{text} {placeholder}".strip())
+        evicted += 1
+    return evicted
+
+
+def refers_to_image(text):
+    """
+    Check whether a question may be about the attached image, e.g. "what am I holding?".
+
+    A heuristic on the words used: questions such as "what is photosynthesis?"
+    are answered the same whatever the camera sees, while anything that points
+    at the scene, the user or the assistant counts as referring to the image.
+
+    Args:
+    text (str): The question.
+
+    Returns:
+    bool: True if the answer may depend on the image.
+    """
+    return bool(_VISUAL_REFERENCE.search(text.lower()))
+
+
+def payload_bytes(chat_history):
+    """
+    Return the approximate size of the chat history as sent in a request body.
+
+    Args:
+    chat_history (list): The chat history.
+
+    Returns:
+    int: The size of the JSON-encoded messages in bytes.
+    """
+    return len(json.dumps(chat_history).encode())
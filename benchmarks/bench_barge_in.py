@@ -0,0 +1,109 @@
+"""
+How quickly the assistant goes quiet when the user talks over it.
+
+Each run replays a scripted microphone fixture (background noise, then the user
+starting to speak at a known time) through a DuplexListener while the streaming
+pipeline speaks a long stubbed answer into a real-time NullSink. It reports the
+delay from the user's speech onset to playback being cut, and how much of the
+answer the user would otherwise have had to sit through.
+
+Run from the repository root:
+    python -m benchmarks.bench_barge_in
+"""
+import io
+import time
+import wave
+import argparse
+import threading
+import statistics
+
+import numpy as np
+
+from backend.voice_assistant.duplex import DuplexListener, WavFileSource
+from backend.voice_assistant.pipeline import StreamingPipeline
+from backend.voice_assistant.playback import AudioPlayer, NullSink
+from benchmarks.bench_streaming_pipeline import StubProviders
+from benchmarks.bench_vad_endpointing import SAMPLE_RATE, synth_speech
+
+# Seconds of spoken audio per character of response text
+SPEECH_SECONDS_PER_CHAR = 0.06
+
+
+def microphone_fixture(onset, speech_seconds, rng, noise_db=-45):
+    signal = np.concatenate([
+        np.zeros(int(onset * SAMPLE_RATE)),
+        synth_speech(speech_seconds, rng),
+        np.zeros(int(1.0 * SAMPLE_RATE)),
+    ])
+    signal += rng.normal(0, 10 ** (noise_db / 20), len(signal))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes((np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def speech_audio(text):
+    return b"\0\0" * int(len(text) * SPEECH_SECONDS_PER_CHAR * SAMPLE_RATE)
+
+
+def run_once(fixture, onset, barge_in_ms, stub):
+    player = AudioPlayer(NullSink(realtime=True))
+    source = WavFileSource(fixture)
+    listener = DuplexListener(source, barge_in_ms=barge_in_ms).start()
+
+    pipeline = StreamingPipeline(stub.stream, lambda text: (stub.tts(text), speech_audio(text))[1],
+                                 lambda audio: player.enqueue(audio, 'pcm', sample_rate=SAMPLE_RATE))
+    cancel = threading.Event()
+    cancelled_at = []
+
+    def barge_in():
+        cancelled_at.append(time.perf_counter())
+        cancel.set()
+        player.cancel()
+
+    with listener.speaking(barge_in):
+        text = pipeline.run([], cancel=cancel)
+        player.wait()
+    stopped = time.perf_counter()
+    utterance = listener.next_utterance(timeout=5)
+    listener.stop()
+    player.close()
+
+    speech_onset = source.started_at + onset
+    full_answer = len(stub.generate([])) * SPEECH_SECONDS_PER_CHAR
+    heard = stopped - (source.started_at + pipeline.last_timings.get('first_audio', 0))
+    return {
+        "cut_delay": stopped - speech_onset if cancelled_at else None,
+        "remaining": full_answer - heard,
+        "spoken_chars": len(text),
+        "utterance": utterance is not None and utterance.barged_in,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--onset", type=float, default=2.5, help="seconds into the turn the user starts talking")
+    parser.add_argument("--barge-in-ms", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    stub = StubProviders(stt_latency=0.0, tts_seconds_per_char=0.0, tts_latency=0.1)
+    results = [run_once(microphone_fixture(args.onset, 1.0, rng), args.onset, args.barge_in_ms, stub)
+               for _ in range(args.runs)]
+
+    cut = [r["cut_delay"] for r in results if r["cut_delay"] is not None]
+    print(f"{args.runs} runs, user speaks {args.onset:.1f}s into the answer, barge-in after {args.barge_in_ms} ms")
+    print(f"  interrupted           {len(cut)}/{args.runs} (utterance kept for next turn: "
+          f"{sum(r['utterance'] for r in results)}/{args.runs})")
+    if cut:
+        print(f"  onset -> silence      median={statistics.median(cut) * 1000:6.0f} ms max={max(cut) * 1000:6.0f} ms")
+    print(f"  answer not spoken     median={statistics.median(r['remaining'] for r in results):6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Throughput of batch transcription in recordings per minute against a stub provider.
+
+Writes corpora of synthetic session recordings (16 kHz mono WAV with spoken
+turns separated by pauses), one of many short recordings and one of a few
+long ones, to a temporary directory and transcribes them with
+transcribe_batch through the OpenAI client. The stub answers after a fixed
+latency and reads uploads at a limited bandwidth, so a request takes longer
+the more audio it carries, as with a real provider. Setups:
+
+    whole files xN   each recording in one request, N recordings at a time
+    segmented xN     recordings split at pauses into --max-segment second segments,
+                     N requests in flight
+
+A final run over the short corpus with an earlier run's output shows that
+recordings already transcribed are skipped by content hash.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_transcription
+"""
+import io
+import os
+import time
+import wave
+import argparse
+import tempfile
+
+import numpy as np
+from openai import OpenAI
+
+from benchmarks.stub_server import StubServer
+from backend.voice_assistant.batch_transcription import iter_audio_files, load_done_hashes, transcribe_batch
+
+SAMPLE_RATE = 16000
+
+
+def synth_recording(path, seconds, rng):
+    parts = []
+    total = 0
+    while total < seconds * SAMPLE_RATE:
+        t = np.arange(int(rng.uniform(2, 8) * SAMPLE_RATE)) / SAMPLE_RATE
+        f0 = rng.uniform(110, 220)
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        parts.append(0.25 * voiced * (0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t)))
+        parts.append(np.zeros(int(rng.uniform(0.4, 1.5) * SAMPLE_RATE)))
+        total += len(parts[-2]) + len(parts[-1])
+    signal = np.concatenate(parts)
+    signal += rng.normal(0, 10 ** (-55 / 20), len(signal))
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes((np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes())
+
+
+def run(paths, transcribe, server, args):
+    setups = [(f"whole files x{concurrency}", concurrency, 1e9) for concurrency in (1, 8)]
+    setups += [(f"segmented x{concurrency}", concurrency, args.max_segment) for concurrency in (1, 8, 16)]
+    for name, concurrency, max_segment in setups:
+        server.reset_counters()
+        start = time.perf_counter()
+        stats = transcribe_batch(paths, transcribe, io.StringIO(), concurrency, max_segment, args.codec)
+        elapsed = time.perf_counter() - start
+        print(f"    {name:<15} {len(paths) / elapsed * 60:7.1f} recordings/min  "
+              f"{stats['audio_seconds'] / elapsed:6.1f}x real time  requests={server.requests:4d}  "
+              f"failed={stats['failed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recordings", type=int, default=12, help="size of the corpus of short recordings")
+    parser.add_argument("--minutes", type=float, nargs=2, default=[0.5, 2.0], help="their length range")
+    parser.add_argument("--long-recordings", type=int, default=2, help="size of the corpus of long recordings")
+    parser.add_argument("--long-minutes", type=float, nargs=2, default=[8.0, 12.0], help="their length range")
+    parser.add_argument("--max-segment", type=float, default=30.0, help="longest segment in seconds")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub seconds per request")
+    parser.add_argument("--bandwidth", type=float, default=2_000_000, help="stub bytes per second per upload")
+    parser.add_argument("--codec", default="wav")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"stub {args.latency * 1000:.0f} ms + {args.bandwidth / 1000:.0f} kB/s per request, {args.codec} uploads, "
+          f"{args.max_segment:.0f} s segments")
+    with StubServer(latency=args.latency, upload_bandwidth=args.bandwidth) as server:
+        client = OpenAI(api_key="stub", base_url=f"{server.url}/v1", max_retries=0)
+
+        def transcribe(upload, file_name):
+            return client.audio.transcriptions.create(model="whisper-1", file=(file_name, upload)).text
+
+        corpora = [("short", args.recordings, args.minutes), ("long", args.long_recordings, args.long_minutes)]
+        for name, count, (low, high) in corpora:
+            with tempfile.TemporaryDirectory() as directory:
+                for index in range(count):
+                    synth_recording(os.path.join(directory, f"session_{index:03d}.wav"),
+                                    rng.uniform(low, high) * 60, rng)
+                paths = list(iter_audio_files(directory))
+                print(f"  {count} {name} recordings of {low:g}-{high:g} min")
+                run(paths, transcribe, server, args)
+
+                if name == "short":
+                    output_path = os.path.join(directory, "transcripts.jsonl")
+                    with open(output_path, "a", encoding="utf-8") as output_file:
+                        transcribe_batch(paths, transcribe, output_file, 8, args.max_segment, args.codec)
+                    server.reset_counters()
+                    with open(output_path, "a", encoding="utf-8") as output_file:
+                        stats = transcribe_batch(paths, transcribe, output_file, 8, args.max_segment, args.codec,
+                                                 load_done_hashes(output_path))
+                    print(f"    rerun with the earlier output: skipped={stats['skipped']} requests={server.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Per-turn overhead of constructing provider clients on every call versus reusing
+pooled clients from the ClientRegistry.
+
+Each simulated turn makes the three requests a real turn makes (transcription,
+chat completion, speech) against a local stub server that charges a fixed delay
+per new connection to stand in for the TCP + TLS handshake.
+
+Run from the repository root:
+    python -m benchmarks.bench_client_pool
+"""
+import time
+import argparse
+import statistics
+
+from openai import OpenAI
+
+from benchmarks.stub_server import StubServer
+from backend.voice_assistant.clients import ClientRegistry
+
+
+def run_turn(get_client):
+    get_client().audio.transcriptions.create(
+        model="whisper-1", file=("turn.wav", b"\0" * 16000))
+    get_client().chat.completions.create(
+        model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}])
+    get_client().audio.speech.create(model="tts-1", voice="fable", input="hello").read()
+
+
+def measure(get_client, server, turns):
+    server.reset_counters()
+    samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        run_turn(get_client)
+        samples.append(time.perf_counter() - start)
+    return samples, server.connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--handshake-delay", type=float, default=0.05,
+                        help="seconds charged per new connection")
+    args = parser.parse_args()
+
+    with StubServer(handshake_delay=args.handshake_delay) as server:
+        base_url = f"{server.url}/v1"
+        registry = ClientRegistry()
+
+        def fresh_client():
+            # The per-call construction the provider modules used to do
+            return OpenAI(api_key="stub", base_url=base_url)
+
+        def pooled_client():
+            return registry.get("openai", "stub", base_url)
+
+        results = {
+            "per-call": measure(fresh_client, server, args.turns),
+            "pooled": measure(pooled_client, server, args.turns),
+        }
+        registry.close()
+
+    print(f"{args.turns} turns, {args.handshake_delay * 1000:.0f} ms per handshake")
+    for name, (samples, connections) in results.items():
+        print(f"  {name:<9} mean={statistics.mean(samples) * 1000:7.1f} ms/turn "
+              f"p95={statistics.quantiles(samples, n=20)[-1] * 1000:7.1f} ms "
+              f"connections={connections}")
+
+
+if __name__ == "__main__":
+    main()
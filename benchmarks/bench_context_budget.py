@@ -0,0 +1,73 @@
+"""
+Per-turn request size over a long session, unbounded list versus ChatContext.
+
+Simulates a session of tutoring turns with varied message lengths and reports
+the size of the messages sent on selected turns, plus the bookkeeping cost of
+appending to the context.
+
+Run from the repository root:
+    python -m benchmarks.bench_context_budget --turns 500
+"""
+import time
+import random
+import argparse
+
+from backend.voice_assistant.vision import payload_bytes
+from backend.voice_assistant.context import ChatContext, estimate_tokens
+
+SYSTEM_PROMPT = "You are a helpful Assistant. Keep your answers short and concise."
+WORDS = "the a photosynthesis equation energy number prime fraction angle force velocity cell".split()
+
+
+def sentence(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))) + "."
+
+
+def stub_summarizer(previous_summary, messages):
+    # Stands in for an LLM summary: a bounded digest of what was dropped
+    return f"{len(messages)} earlier messages about {messages[0]['content'][:80]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--max-tokens", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    turns = [(sentence(rng, 5, 30), sentence(rng, 20, 80)) for _ in range(args.turns)]
+    checkpoints = sorted({1, 10, 50, 100, 250, args.turns} & set(range(1, args.turns + 1)))
+
+    history = [{"role": "system", "content": SYSTEM_PROMPT}]
+    context = ChatContext(SYSTEM_PROMPT, max_tokens=args.max_tokens, summarizer=stub_summarizer)
+    unbounded, bounded, append_seconds = {}, {}, 0.0
+    for turn, (question, answer) in enumerate(turns, start=1):
+        history.append({"role": "user", "content": question})
+        start = time.perf_counter()
+        context.append({"role": "user", "content": question})
+        append_seconds += time.perf_counter() - start
+
+        if turn in checkpoints:
+            messages = context.messages()
+            unbounded[turn] = (payload_bytes(history), sum(map(estimate_tokens, history)))
+            bounded[turn] = (payload_bytes(messages), context.tokens)
+
+        history.append({"role": "assistant", "content": answer})
+        start = time.perf_counter()
+        context.append({"role": "assistant", "content": answer})
+        append_seconds += time.perf_counter() - start
+
+    print(f"request size per turn, budget {args.max_tokens} tokens")
+    print(f"  {'turn':>5} {'unbounded':>20} {'ChatContext':>20}")
+    for turn in checkpoints:
+        print(f"  {turn:>5} {unbounded[turn][0] / 1024:>9.1f}KB {unbounded[turn][1]:>6} tok "
+              f"{bounded[turn][0] / 1024:>9.1f}KB {bounded[turn][1]:>6} tok")
+    usage = context.usage()
+    print(f"  final usage {usage['tokens']}/{usage['max_tokens']} tokens ({usage['fraction']:.0%}), "
+          f"{usage['trimmed_messages']} messages trimmed")
+    print(f"  mean append cost {append_seconds / (2 * args.turns) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
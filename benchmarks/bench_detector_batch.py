@@ -0,0 +1,90 @@
+"""
+Throughput of batch AI content detection against a rate-limited stub server.
+
+The stub answers the detect API after a fixed latency, charges a handshake
+delay per new connection and accepts only --server-rate requests per second,
+answering the rest with 429 and Retry-After. The same texts are screened:
+
+    per-request    one at a time with a new session per request, as the script used to
+    pooled x1      one worker over the pooled session
+    pooled xN      N workers, relying on 429s to slow down
+    pooled xN paced  N workers, paced just under the server's rate
+
+Then a run is interrupted half-way and resumed from its output file, to show
+that only the remaining texts are sent again.
+
+Run from the repository root:
+    python -m benchmarks.bench_detector_batch
+"""
+import io
+import os
+import time
+import argparse
+import tempfile
+
+from benchmarks.stub_server import StubServer
+from backend.ai_content_detector import create_retry_session, detect_batch, load_checkpoint, post_request
+
+HEADERS = {"Content-Type": "application/json"}
+
+
+def texts(count):
+    return [(str(index), f"Tutor answer number {index}: photosynthesis turns light into sugar.")
+            for index in range(count)]
+
+
+def per_request(url, items):
+    for _, text in items:
+        post_request(url, HEADERS, {"input_text": text}, session=create_retry_session())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per request")
+    parser.add_argument("--handshake-delay", type=float, default=0.03, help="seconds per new connection")
+    parser.add_argument("--server-rate", type=int, default=150, help="requests per second the stub accepts")
+    args = parser.parse_args()
+
+    items = texts(args.texts)
+    print(f"{args.texts} texts; stub {args.latency * 1000:.0f} ms per request, "
+          f"{args.handshake_delay * 1000:.0f} ms per connection, {args.server_rate} requests/s allowed")
+    with StubServer(latency=args.latency, handshake_delay=args.handshake_delay,
+                    rate_limit=args.server_rate) as server:
+        url = f"{server.url}/api/detect/detectText"
+        setups = [
+            ("per-request", None),
+            ("pooled x1", {"concurrency": 1}),
+            (f"pooled x{args.concurrency}", {"concurrency": args.concurrency}),
+            (f"pooled x{args.concurrency} paced", {"concurrency": args.concurrency, "rate": args.server_rate * 0.9}),
+        ]
+        for name, options in setups:
+            server.reset_counters()
+            start = time.perf_counter()
+            if options is None:
+                # Too slow to run over every text
+                sample = items[:min(len(items), 100)]
+                per_request(url, sample)
+                stats = {"ok": len(sample), "failed": 0}
+            else:
+                sample = items
+                stats = detect_batch(sample, url, HEADERS, io.StringIO(), **options)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:<20} {len(sample) / elapsed:6.1f} texts/s  failed={stats['failed']:3d}  "
+                  f"connections={server.connections:3d}  429s={server.throttled:4d}")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.jsonl")
+            with open(path, "a", encoding="utf-8") as output_file:
+                detect_batch(items[:len(items) // 2], url, HEADERS, output_file, args.concurrency)
+            server.reset_counters()
+            done = load_checkpoint(path)
+            with open(path, "a", encoding="utf-8") as output_file:
+                stats = detect_batch(items, url, HEADERS, output_file, args.concurrency, done=done)
+            print(f"  resumed after half the texts: skipped={stats['skipped']} screened={stats['ok']} "
+                  f"requests={server.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Per-stage latency of the local CPU backends.
+
+Loads the STT, LLM and TTS models found under LOCAL_MODEL_PATH (or given
+explicitly), reports load and warm-up time, then runs each stage several times
+and reports median latency; for the LLM also time to first token. Stages
+without a model are skipped; if no model is found at all, it exits with an
+error naming the models it looked for.
+
+Requires the 'local' extras (faster-whisper, llama-cpp-python, piper-tts).
+
+Run from the repository root:
+    python -m benchmarks.bench_local_backends --model-dir path/to/models --threads 4
+"""
+import time
+import argparse
+import statistics
+
+from backend.voice_assistant.config import Config
+from backend.voice_assistant.local_models import LocalModels, resolve_local_model_paths
+
+# What each stage's model is looked up as, for the error when none is found
+MODEL_FILES = {'stt': "a Whisper model in 'whisper/' (or --stt-model)", 'llm': "a '*.gguf' file (or --llm-model)",
+               'tts': "a Piper '*.onnx' voice (or --tts-model)"}
+
+PROMPT = [
+    {"role": "system", "content": "You are a helpful Assistant. Keep your answers short and concise."},
+    {"role": "user", "content": "Why is the sky blue?"},
+]
+SENTENCE = "The sky looks blue because air scatters short blue wavelengths of sunlight more than red ones."
+
+
+def timed(fn, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model-dir", help="directory of the local models; defaults to LOCAL_MODEL_PATH")
+    parser.add_argument("--stt-model")
+    parser.add_argument("--llm-model")
+    parser.add_argument("--tts-model")
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    model_dir = args.model_dir or Config.LOCAL_MODEL_PATH
+    paths = resolve_local_model_paths(model_dir, args.stt_model, args.llm_model, args.tts_model)
+    stages = [stage for stage in ('tts', 'stt', 'llm') if paths[stage]]
+    if not stages:
+        where = repr(model_dir) if model_dir else "LOCAL_MODEL_PATH, which is not set"
+        parser.error(f"no local models found in {where}; expected "
+                     + ", ".join(MODEL_FILES[stage] for stage in ('stt', 'llm', 'tts')))
+    for stage in ('stt', 'llm', 'tts'):
+        if stage not in stages:
+            print(f"  skipping {stage}: {MODEL_FILES[stage]} not found")
+    models = LocalModels(paths, num_threads=args.threads)
+
+    start = time.perf_counter()
+    models.warm_up(stages)
+    print(f"threads={args.threads or 'default'}; load + warm-up {time.perf_counter() - start:.2f}s")
+    for stage in stages:
+        print(f"  load {stage}: {models.load_seconds[stage]:.2f}s ({paths[stage]})")
+
+    audio = models.synthesize(SENTENCE) if 'tts' in stages else None
+    if 'tts' in stages:
+        samples, _ = timed(lambda: models.synthesize(SENTENCE), args.runs)
+        print(f"  tts  median={statistics.median(samples) * 1000:.0f} ms for {len(SENTENCE)} chars")
+    if 'stt' in stages and audio:
+        samples, text = timed(lambda: models.transcribe(audio), args.runs)
+        print(f"  stt  median={statistics.median(samples) * 1000:.0f} ms -> {text!r}")
+    if 'llm' in stages:
+        first_token, totals = [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            for index, _ in enumerate(models.stream_chat(PROMPT)):
+                if index == 0:
+                    first_token.append(time.perf_counter() - start)
+            totals.append(time.perf_counter() - start)
+        print(f"  llm  first token median={statistics.median(first_token) * 1000:.0f} ms, "
+              f"total median={statistics.median(totals) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
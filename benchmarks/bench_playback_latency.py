@@ -0,0 +1,101 @@
+"""
+Enqueue-to-first-sample latency and end-of-playback detection of the AudioPlayer
+engine versus the old per-clip pygame.mixer init/load/poll/quit path.
+
+Both run headless: the engine writes to a real-time NullSink and pygame uses SDL's
+dummy audio driver. "Detection slack" is how long after the audio actually ended
+the blocking play call returned; for pygame the end is timestamped by a watcher
+thread polling get_busy() every millisecond. Mixer start-up on a real sound card
+costs considerably more than on the dummy driver, so the pygame start-up numbers
+are a lower bound.
+
+Run from the repository root:
+    python -m benchmarks.bench_playback_latency
+"""
+import io
+import os
+import time
+import wave
+import argparse
+import threading
+import statistics
+
+from backend.voice_assistant.playback import AudioPlayer, NullSink
+
+
+def make_clip(seconds, sample_rate=24000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b"\1\0" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+def bench_engine(clip, seconds, runs):
+    first_sample = []
+    sink = NullSink(realtime=True)
+    player = AudioPlayer(sink, on_first_sample=first_sample.append)
+    slack = []
+    for _ in range(runs):
+        player.play(clip, 'wav')
+        # The sink knows exactly when its last sample is played
+        slack.append(time.perf_counter() - sink.play_until)
+    player.close()
+    return first_sample, slack
+
+
+def bench_pygame(clip, seconds, runs, check_interval=0.1):
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+
+    first_sample = []
+    slack = []
+    for _ in range(runs):
+        # The removed play_audio_bytes: init, load, play, poll get_busy(), quit
+        start = time.perf_counter()
+        pygame.mixer.init()
+        pygame.mixer.music.load(io.BytesIO(clip), "wav")
+        pygame.mixer.music.play()
+        first_sample.append(time.perf_counter() - start)
+
+        ended = []
+
+        def watch():
+            while pygame.mixer.music.get_busy():
+                time.sleep(0.001)
+            ended.append(time.perf_counter())
+
+        watcher = threading.Thread(target=watch)
+        watcher.start()
+        while pygame.mixer.music.get_busy():
+            time.sleep(check_interval)
+        pygame.mixer.quit()
+        returned = time.perf_counter()
+        watcher.join()
+        slack.append(returned - ended[0])
+    return first_sample, slack
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--clip-seconds", type=float, default=0.75)
+    args = parser.parse_args()
+
+    clip = make_clip(args.clip_seconds)
+    results = {
+        "pygame": bench_pygame(clip, args.clip_seconds, args.runs),
+        "engine": bench_engine(clip, args.clip_seconds, args.runs),
+    }
+
+    print(f"{args.runs} clips of {args.clip_seconds:.2f}s (milliseconds)")
+    for name, (first_sample, slack) in results.items():
+        print(f"  {name:<7} enqueue->first sample median={statistics.median(first_sample) * 1000:6.2f} "
+              f"max={max(first_sample) * 1000:6.2f}   "
+              f"detection slack median={statistics.median(slack) * 1000:6.1f} max={max(slack) * 1000:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Tail latency and availability of provider routing against stub servers.
+
+Two local stub servers stand in for two transcription providers. The primary
+is usually fast but has a heavy latency tail and occasional 500s, and it
+suffers an outage (every request fails) in the middle of the run; the
+secondary is slower but steady. The same request sequence is sent with three
+setups:
+
+    single     the primary alone, as with a static Config.TRANSCRIPTION_MODEL
+    failover   primary then secondary, with a timeout and circuit breaker
+    hedged     failover plus a hedged request to the secondary at the primary's p95
+
+and the latency percentiles, failed requests, requests per server and
+breaker trips are reported.
+
+Run from the repository root:
+    python -m benchmarks.bench_provider_router
+"""
+import time
+import random
+import logging
+import argparse
+import statistics
+
+from openai import OpenAI
+
+from benchmarks.stub_server import StubServer
+from backend.voice_assistant.router import CircuitBreaker, ProviderRoute, StageRouter
+
+
+def latency_profile(base, jitter, tail_rate, tail_latency, seed):
+    rng = random.Random(seed)
+
+    def latency():
+        if rng.random() < tail_rate:
+            return tail_latency
+        return base + rng.random() * jitter
+
+    return latency
+
+
+def transcriber(server):
+    # SDK retries would hide failures from the router and delay failover
+    client = OpenAI(api_key="stub", base_url=f"{server.url}/v1", max_retries=0)
+
+    def transcribe(audio_bytes):
+        return client.audio.transcriptions.create(model="whisper-1", file=("turn.wav", audio_bytes)).text
+
+    return transcribe
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(mode, args):
+    primary = StubServer(latency=latency_profile(args.base_latency, args.jitter, args.tail_rate,
+                                                 args.tail_latency, args.seed),
+                         failure_rate=args.failure_rate, seed=args.seed).start()
+    secondary = StubServer(latency=latency_profile(args.base_latency * 1.5, args.jitter, 0.0, 0.0,
+                                                   args.seed + 1)).start()
+    routes = [ProviderRoute("primary", transcriber(primary), args.timeout,
+                            CircuitBreaker(cooldown=args.cooldown))]
+    if mode != 'single':
+        routes.append(ProviderRoute("secondary", transcriber(secondary), args.timeout,
+                                    CircuitBreaker(cooldown=args.cooldown)))
+    router = StageRouter('stt', routes, hedge=mode == 'hedged')
+    call = routes[0].call if mode == 'single' else router.call
+
+    audio = b"\0" * 16000
+    outage = range(int(args.requests * 0.4), int(args.requests * 0.6))
+    samples = []
+    errors = 0
+    for index in range(args.requests):
+        primary.failure_rate = 1.0 if index in outage else args.failure_rate
+        start = time.perf_counter()
+        try:
+            call(audio)
+        except Exception:
+            errors += 1
+        samples.append(time.perf_counter() - start)
+
+    # Let abandoned attempts finish before counting server requests
+    time.sleep(args.tail_latency)
+    primary.stop()
+    secondary.stop()
+    return {
+        "samples": samples,
+        "errors": errors,
+        "requests": (primary.requests, secondary.requests),
+        "trips": routes[0].breaker.trips,
+        "hedges": sum(route.hedges for route in routes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--base-latency", type=float, default=0.06, help="primary's usual latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.03)
+    parser.add_argument("--tail-rate", type=float, default=0.02, help="share of primary requests that stall")
+    parser.add_argument("--tail-latency", type=float, default=2.0)
+    parser.add_argument("--failure-rate", type=float, default=0.03, help="primary's 500 rate outside the outage")
+    parser.add_argument("--timeout", type=float, default=1.0, help="per-provider timeout in seconds")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="circuit breaker cooldown in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Every injected failure is logged by the router; keep the output to the report
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{args.requests} requests; primary {args.base_latency * 1000:.0f} ms, {args.tail_rate:.0%} stall "
+          f"{args.tail_latency:.1f}s, {args.failure_rate:.0%} errors, outage for the middle 20%")
+    for mode in ('single', 'failover', 'hedged'):
+        result = run(mode, args)
+        samples = result["samples"]
+        print(f"  {mode:<9} p50={statistics.median(samples) * 1000:6.0f} ms "
+              f"p95={percentile(samples, 0.95) * 1000:6.0f} ms p99={percentile(samples, 0.99) * 1000:6.0f} ms "
+              f"max={max(samples) * 1000:6.0f} ms  failed={result['errors']:3d}  "
+              f"requests primary/secondary={result['requests'][0]}/{result['requests'][1]}  "
+              f"breaker trips={result['trips']} hedges={result['hedges']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Hit rate, wrong answers and time saved by the response cache on a tutoring session.
+
+Replays a session of student questions in which the same questions come back,
+sometimes word for word, sometimes as a transcript variant or paraphrase,
+mixed with new questions that look alike but need different answers
+("capital of France" / "capital of Spain", "7 times 8" / "7 times 9"). Every
+question is labelled with the intent it belongs to, so a cache hit that
+returns the answer to another intent is counted as wrong. The stub LLM
+answers after a fixed time to first token.
+
+Run from the repository root:
+    python -m benchmarks.bench_response_cache
+"""
+import time
+import random
+import argparse
+import statistics
+
+from backend.voice_assistant.response_cache import ResponseCache, cached_stream
+
+# (intent, phrasings as a student might say them)
+QUESTIONS = [
+    ("photosynthesis", ["How does photosynthesis work?", "how does photosynthesis works",
+                        "How does photosynthesis work again?"]),
+    ("newton2", ["Can you explain Newton's second law?", "can you explain newtons second law",
+                 "Can you explain Newton's second law please?"]),
+    ("prime", ["What is a prime number?", "what is a prime number again", "What's a prime number?"]),
+    ("water", ["Explain the water cycle.", "explain the water cycle please", "Explain the water cycle again."]),
+    ("quadratic", ["How do I solve quadratic equations?", "how do you solve quadratic equations"]),
+    ("seasons", ["What causes the seasons?", "what causes seasons"]),
+    ("france", ["What is the capital of France?", "what's the capital of france"]),
+    ("spain", ["What is the capital of Spain?"]),
+    ("mitosis", ["What is mitosis?", "what is mitosis exactly"]),
+    ("meiosis", ["What is meiosis?"]),
+    ("7x8", ["What is 7 times 8?", "what is seven times eight"]),
+    ("7x9", ["What is 7 times 9?"]),
+    ("adjective", ["What is an adjective?"]),
+    ("adverb", ["What is an adverb?"]),
+    ("velocity", ["Define velocity."]),
+    ("acceleration", ["Define acceleration."]),
+]
+
+SYSTEM_PROMPT = "You are a patient tutor. Keep your answers short."
+
+
+def session(turns, seed):
+    rng = random.Random(seed)
+    # A few questions come up again and again; the rest now and then
+    weights = [1 / (rank + 1) for rank in range(len(QUESTIONS))]
+    return [(intent, rng.choice(phrasings))
+            for intent, phrasings in rng.choices(QUESTIONS, weights, k=turns)]
+
+
+class StubLLM:
+    def __init__(self, ttft):
+        self.ttft = ttft
+        self.requests = 0
+
+    def stream(self, chat_history):
+        self.requests += 1
+        time.sleep(self.ttft)
+        # The answer names the intent, so a wrong cache hit can be recognised
+        yield f"answer:{chat_history[-1]['intent']}"
+
+
+def run(turns, cache, llm):
+    stream = cached_stream(llm.stream, cache) if cache is not None else llm.stream
+    latencies = []
+    wrong = 0
+    for intent, text in turns:
+        chat_history = [{"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": text, "intent": intent}]
+        start = time.perf_counter()
+        answer = "".join(stream(chat_history))
+        latencies.append(time.perf_counter() - start)
+        if answer != f"answer:{intent}":
+            wrong += 1
+    return latencies, wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--llm-ttft", type=float, default=0.05, help="stub LLM seconds per request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    turns = session(args.turns, args.seed)
+    print(f"{args.turns} questions over {len(QUESTIONS)} intents, stub LLM {args.llm_ttft * 1000:.0f} ms per answer")
+    setups = [("no cache", None), ("exact", {"similarity": "exact"})]
+    setups += [(f"ngram {threshold}", {"similarity": "ngram", "threshold": threshold})
+               for threshold in (0.75, 0.8, 0.85, 0.9)]
+    for name, options in setups:
+        cache = ResponseCache(**options) if options is not None else None
+        llm = StubLLM(args.llm_ttft)
+        latencies, wrong = run(turns, cache, llm)
+        stats = cache.stats() if cache is not None else {"hit_rate": 0.0, "similar_hits": 0}
+        print(f"  {name:<11} hit rate={stats['hit_rate']:4.0%} (similar {stats['similar_hits']:3d})  "
+              f"wrong answers={wrong:3d}  LLM requests={llm.requests:3d}  "
+              f"mean latency={statistics.mean(latencies) * 1000:5.1f} ms")
+
+    # Cost of a lookup that has to scan a full cache for near-duplicates
+    cache = ResponseCache(max_entries=512)
+    for index in range(512):
+        topic = chr(97 + index % 26) + chr(97 + index // 26)
+        cache.put([{"role": "user", "content": f"tell me more about the subject {topic} please"}], "answer")
+    probe = [{"role": "user", "content": "a question nobody asked before"}]
+    start = time.perf_counter()
+    for _ in range(100):
+        cache.get(probe)
+    print(f"  near-duplicate lookup in a full 512-entry cache: {(time.perf_counter() - start) * 10:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+End-to-end turn latency and throughput from a recorded session, offline.
+
+With --session, a session recorded by the assistant (SESSION_RECORD_DIR) is
+replayed. Otherwise a session is first recorded from stub providers: STT
+with a fixed latency, an LLM that streams a tutoring answer token by token
+after a time to first token, and TTS that returns WAV audio as long as the
+sentence would take to say. The session is then replayed twice through the
+streaming pipeline:
+
+    recorded speed   providers answer with their recorded timings and audio plays in
+                     real time, reproducing the session's latency
+    full speed       no waiting, so the time left is the pipeline's own overhead
+
+For each run the time from the end of the user's speech to the first audio
+and the turn time are reported, and the replayed answers are checked against
+the recorded ones.
+
+Run from the repository root:
+    python -m benchmarks.bench_session_replay
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+from backend.voice_assistant.providers import Providers
+from backend.voice_assistant.utils import pcm_to_wav
+from backend.voice_assistant.vision import message_text
+from backend.voice_assistant.session_replay import (
+    RecordedTurn, SessionRecorder, load_session, replay_session, run_session
+)
+
+QUESTIONS = [
+    "What is photosynthesis?", "Why is the sky blue?", "How do vaccines work?",
+    "What is a prime number?", "Explain Newton's second law.", "What causes the seasons?",
+]
+ANSWER = "Good question. {topic} is something we can work out step by step. Start with what you know."
+
+
+def stub_providers(args, rng):
+    transcripts = {}
+
+    def transcribe(audio_bytes):
+        time.sleep(args.stt_latency)
+        return transcripts[audio_bytes]
+
+    def stream_response(chat_history):
+        topic = message_text(chat_history[-1]).rstrip("?.")
+        time.sleep(args.llm_ttft)
+        for word in ANSWER.format(topic=topic).split(" "):
+            yield word + " "
+            time.sleep(args.token_delay * rng.uniform(0.5, 1.5))
+
+    def synthesize(text):
+        time.sleep(args.tts_latency)
+        # Roughly 15 characters of speech per second at 16 kHz
+        return pcm_to_wav(b"\0" * (len(text) * 16000 * 2 // 15), 16000)
+
+    return Providers(transcribe, stream_response, synthesize, 'wav',
+                     {'stt': 'stub', 'llm': 'stub', 'tts': 'stub'}), transcripts
+
+
+def record_session(directory, args):
+    rng = random.Random(args.seed)
+    providers, transcripts = stub_providers(args, rng)
+    turns = []
+    for index in range(args.turns):
+        question = QUESTIONS[index % len(QUESTIONS)]
+        # Distinct bytes per turn, standing in for the utterance
+        audio = pcm_to_wav(index.to_bytes(4, "little") * 8000, 16000)
+        transcripts[audio] = question
+        turns.append(RecordedTurn(audio, None, os.urandom(20000), True, None))
+    settings = {"system_prompt": "You are a patient tutor."}
+    recorder = SessionRecorder(directory, **settings)
+    records = run_session(turns, recorder.wrap(providers), settings, realtime=True, recorder=recorder)
+    recorder.close()
+    return records
+
+
+def report(name, records, elapsed, expected=None):
+    first_audio = [record["marks"]["playback_start"] - record["marks"]["vad_end"]
+                   for record in records if "playback_start" in record["marks"]]
+    turn_seconds = [record["seconds"] for record in records]
+    line = (f"  {name:<15} first audio p50={statistics.median(first_audio) * 1000:6.0f} ms "
+            f"max={max(first_audio) * 1000:6.0f} ms  turn p50={statistics.median(turn_seconds) * 1000:6.0f} ms  "
+            f"{len(records) / elapsed:7.1f} turns/s")
+    if expected is not None:
+        same = sum(record["response"] == answer for record, answer in zip(records, expected))
+        line += f"  answers matching the recording={same}/{len(expected)}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--session", help="directory of a recorded session to replay")
+    parser.add_argument("--turns", type=int, default=4, help="turns in the stub session")
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--llm-ttft", type=float, default=0.4)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--tts-latency", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        session_dir = args.session
+        expected = None
+        if session_dir is None:
+            session_dir = directory
+            start = time.perf_counter()
+            recorded = record_session(session_dir, args)
+            report("recording", recorded, time.perf_counter() - start)
+            expected = [record["response"] for record in recorded]
+
+        session = load_session(session_dir)
+        print(f"{len(session.turns)} turns, "
+              f"{sum(len(calls) for calls in session.calls.values())} recorded provider calls")
+        for name, realtime in (("recorded speed", True), ("full speed", False)):
+            start = time.perf_counter()
+            records = replay_session(session, realtime=realtime)
+            report(name, records, time.perf_counter() - start, expected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Hit rate and latency saved by speculative LLM requests on partial transcripts.
+
+Replays recorded partial-transcript timelines (as a live STT stream delivers
+them while the user speaks, followed by the final transcript) against a stub
+LLM, once without speculation and once per aggressiveness level. For each turn
+it measures the time from the final transcript to the first response token,
+and counts the extra LLM requests speculation cost. "Inexact" hits are commits
+where the final transcript differed from the speculated one in filler words
+only (up to max_edits of them); each is listed with the words it was generated
+for. The recorded turns include finals that change a number or add the last
+word after a stable partial, which must not be committed.
+
+Timelines can be loaded from a JSONL file with --transcripts, one object per
+turn: {"partials": [[seconds, "text"], ...], "final_at": seconds, "final": "text"}.
+
+Run from the repository root:
+    python -m benchmarks.bench_speculation
+"""
+import json
+import time
+import argparse
+import threading
+import statistics
+
+from backend.voice_assistant.speculation import SPECULATION_LEVELS, SpeculativeResponder
+
+# Partial transcripts as a streaming recognizer reported them, with seconds since speech start
+RECORDED_TURNS = [
+    {"partials": [[0.3, "what's"], [0.6, "what's the weather"], [0.9, "what's the weather like"],
+                  [1.2, "what's the weather like today"]],
+     "final_at": 1.9, "final": "What's the weather like today?"},
+    {"partials": [[0.3, "set a"], [0.6, "set a timer"], [0.9, "set a timer for"],
+                  [1.6, "set a timer for ten minutes"]],
+     "final_at": 2.3, "final": "Set a timer for ten minutes."},
+    {"partials": [[0.4, "how do i"], [0.8, "how do i make"], [1.1, "how do i make pancakes"]],
+     "final_at": 1.8, "final": "How do I make pancakes?"},
+    {"partials": [[0.3, "tell me"], [0.6, "tell me a joke"], [1.4, "tell me a joke about"],
+                  [1.7, "tell me a joke about cats"]],
+     "final_at": 2.4, "final": "Tell me a joke about cats."},
+    {"partials": [[0.3, "what is"], [0.6, "what is the"], [0.9, "what is the capital"],
+                  [1.2, "what is the capital of france"]],
+     "final_at": 1.9, "final": "What is the capital of France?"},
+    {"partials": [[0.4, "can you"], [0.7, "can you read"], [1.0, "can you read that"]],
+     "final_at": 1.7, "final": "Can you read that sign for me?"},
+    {"partials": [[0.3, "i want to by"], [0.8, "i want to buy a"], [1.1, "i want to buy a ticket"],
+                  [1.9, "i want to buy a ticket to boston"]],
+     "final_at": 2.6, "final": "I want to buy a ticket to Boston."},
+    {"partials": [[0.3, "what time"], [0.6, "what time is it"]],
+     "final_at": 1.3, "final": "What time is it in Tokyo?"},
+    {"partials": [[0.4, "describe what"], [0.7, "describe what you see"]],
+     "final_at": 1.4, "final": "Describe what you see."},
+    {"partials": [[0.3, "play some"], [0.6, "play some music"]],
+     "final_at": 1.3, "final": "Play some jazz music."},
+    {"partials": [[0.3, "turn off"], [0.6, "turn off the lights"], [1.5, "turn off the lights in"],
+                  [1.8, "turn off the lights in the kitchen"]],
+     "final_at": 2.5, "final": "Turn off the lights in the kitchen."},
+    # The recognizer revises a number in the final transcript
+    {"partials": [[0.3, "what is seven"], [0.6, "what is seven times eight"]],
+     "final_at": 1.3, "final": "What is seven times nine?"},
+    # The user pauses before the last word
+    {"partials": [[0.3, "what is seven"], [0.6, "what is seven times"]],
+     "final_at": 1.4, "final": "What is seven times eight?"},
+    # Only a filler word is dropped from the final transcript
+    {"partials": [[0.3, "um how do"], [0.6, "um how do plants make food"]],
+     "final_at": 1.3, "final": "How do plants make food?"},
+]
+
+
+class StubLLM:
+    def __init__(self, ttft, tokens_per_second, tokens=30):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.tokens = tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def stream(self, chat_history):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.ttft)
+        for index in range(self.tokens):
+            if index:
+                time.sleep(1.0 / self.tokens_per_second)
+            yield "word "
+
+
+def run_turn(turn, llm, level, speed):
+    start = time.perf_counter()
+
+    def partial():
+        elapsed = (time.perf_counter() - start) * speed
+        latest = ""
+        for at, text in turn["partials"]:
+            if at <= elapsed:
+                latest = text
+        return latest
+
+    responder = None
+    if level != 'off':
+        responder = SpeculativeResponder(llm.stream, lambda text: [{"role": "user", "content": text}],
+                                         **SPECULATION_LEVELS[level])
+        responder.watch(partial, interval=0.05 / speed)
+
+    time.sleep(max(0.0, turn["final_at"] / speed - (time.perf_counter() - start)))
+    final_at = time.perf_counter()
+    if responder is not None:
+        tokens = responder.commit(turn["final"], [{"role": "user", "content": turn["final"]}])
+    else:
+        tokens = llm.stream([{"role": "user", "content": turn["final"]}])
+    first_token = None
+    for _ in tokens:
+        if first_token is None:
+            first_token = time.perf_counter() - final_at
+    return first_token, responder.result if responder else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transcripts", help="JSONL file of recorded partial-transcript timelines")
+    parser.add_argument("--llm-ttft", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up factor")
+    args = parser.parse_args()
+
+    turns = RECORDED_TURNS
+    if args.transcripts:
+        with open(args.transcripts) as transcripts_file:
+            turns = [json.loads(line) for line in transcripts_file if line.strip()]
+
+    print(f"{len(turns)} turns, stub LLM time to first token {args.llm_ttft * 1000:.0f} ms")
+    baseline = None
+    for level in ['off'] + list(SPECULATION_LEVELS):
+        llm = StubLLM(args.llm_ttft / args.speed, args.tokens_per_second * args.speed)
+        results = [run_turn(turn, llm, level, args.speed) for turn in turns]
+        latencies = [latency * args.speed for latency, _ in results]
+        if baseline is None:
+            baseline = latencies
+        hits = sum(1 for _, result in results if result and result["hit"])
+        inexact = [(result["speculated"], turn["final"]) for turn, (_, result) in zip(turns, results)
+                   if result and result["hit"] and result["edits"]]
+        saved = [base - latency for base, latency in zip(baseline, latencies)]
+        print(f"  {level:<12} first token median={statistics.median(latencies) * 1000:5.0f} ms "
+              f"mean={statistics.mean(latencies) * 1000:5.0f} ms  hit rate={hits / len(turns):4.0%} "
+              f"(inexact {len(inexact)})  "
+              f"saved/turn={statistics.mean(saved) * 1000:5.0f} ms  LLM requests={llm.requests}")
+        for speculated, final in inexact:
+            print(f"    inexact: answered {speculated!r} for {final!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Cold start of the assistant's entry points, from -X importtime reports.
+
+Each scenario runs in a fresh interpreter with python -X importtime, the way a
+container worker starts:
+
+    python               an empty interpreter, for reference
+    import main          import backend.main (the webcam assistant)
+    import server        import backend.server (the async server)
+    import batch         import backend.batch_transcribe
+    providers ready      import the server and build the providers from Config
+    pre-warmed           the same, then import the selected backends and create their clients
+
+For each the wall time, the time spent importing and the packages that took
+longest to import (besides those an empty interpreter imports) are reported.
+Config selects OpenAI for transcription and responses and Deepgram for TTS,
+with placeholder keys; nothing is sent to a provider.
+
+With --tree, the scenarios run against another checkout instead, e.g. an
+earlier commit checked out with git worktree, to compare before and after.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from collections import Counter
+
+SCENARIOS = [
+    ("python", "pass"),
+    ("import main", "import backend.main"),
+    ("import server", "import backend.server"),
+    ("import batch", "import backend.batch_transcribe"),
+    ("providers ready", "import backend.server\n"
+                        "from backend.voice_assistant.providers import get_providers\n"
+                        "get_providers()"),
+    ("pre-warmed", "import backend.server\n"
+                   "from backend.voice_assistant.providers import get_providers, prewarm_providers\n"
+                   "get_providers()\n"
+                   "prewarm_providers()"),
+]
+ENVIRONMENT = {"OPENAI_API_KEY": "stub", "GROQ_API_KEY": "stub", "DEEPGRAM_API_KEY": "stub"}
+
+
+def parse_importtime(stderr):
+    """
+    Return (module, depth, self microseconds, cumulative microseconds) per -X importtime line.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(fields[0]), int(fields[1])))
+    return rows
+
+
+def run_once(code, tree):
+    environment = dict(os.environ, PYTHONPATH=tree, **ENVIRONMENT)
+    # As in a container image with compiled bytecode, rather than compiling on every start
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=tree, env=environment,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        return elapsed, None, result.stderr.strip().splitlines()[-1]
+    return elapsed, parse_importtime(result.stderr), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tree", default=os.getcwd(), help="checkout to measure")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per scenario; medians are reported")
+    parser.add_argument("--top", type=int, default=4, help="slowest packages listed per scenario")
+    args = parser.parse_args()
+
+    print(f"{args.tree}, median of {args.repeat} runs")
+    baseline_modules = set()
+    for name, code in SCENARIOS:
+        # An untimed first run writes any missing bytecode caches
+        walls, imports, packages, error = [], [], Counter(), run_once(code, args.tree)[2]
+        for _ in range(args.repeat if error is None else 0):
+            elapsed, rows, error = run_once(code, args.tree)
+            if rows is None:
+                break
+            walls.append(elapsed)
+            imports.append(sum(row[3] for row in rows if row[1] == 0))
+            for module, _, self_us, _ in rows:
+                if module not in baseline_modules:
+                    packages[module.split(".")[0]] += self_us / args.repeat
+            if name == "python":
+                baseline_modules.update(row[0] for row in rows)
+        if error is not None:
+            print(f"  {name:<16} failed: {error}")
+            continue
+        slowest = ", ".join(f"{package} {us / 1000:.0f}" for package, us in packages.most_common(args.top)
+                            if name != "python")
+        print(f"  {name:<16} wall {statistics.median(walls) * 1000:6.0f} ms  "
+              f"imports {statistics.median(imports) / 1000:6.0f} ms  {slowest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Time-to-first-audio of the sequential turn path versus the streaming pipeline.
+
+Providers are stubbed with sleeps that model typical network latencies, so the
+numbers only reflect how the stages are scheduled, not real provider speed.
+
+Run from the repository root:
+    python -m benchmarks.bench_streaming_pipeline
+"""
+import time
+import argparse
+import statistics
+
+from backend.voice_assistant.pipeline import StreamingPipeline
+
+RESPONSE = (
+    "Photosynthesis is how plants turn light into chemical energy. "
+    "Chlorophyll in the leaves absorbs mostly red and blue light. "
+    "That energy splits water and releases oxygen as a by-product. "
+    "The plant then uses carbon dioxide to build sugars it can store."
+)
+
+
+class StubProviders:
+    """
+    Sleep-based stand-ins for the STT, LLM and TTS providers.
+
+    Args:
+    stt_latency (float): Seconds for a transcription request.
+    llm_ttft (float): Seconds until the first LLM token.
+    tokens_per_second (float): LLM streaming rate after the first token.
+    tts_latency (float): Fixed seconds per TTS request.
+    tts_seconds_per_char (float): Additional TTS seconds per input character.
+    """
+
+    def __init__(self, stt_latency=0.3, llm_ttft=0.25, tokens_per_second=60.0,
+                 tts_latency=0.15, tts_seconds_per_char=0.002):
+        self.stt_latency = stt_latency
+        self.llm_ttft = llm_ttft
+        self.tokens_per_second = tokens_per_second
+        self.tts_latency = tts_latency
+        self.tts_seconds_per_char = tts_seconds_per_char
+
+    def transcribe(self, audio):
+        time.sleep(self.stt_latency)
+        return "How does photosynthesis work?"
+
+    def stream(self, chat_history):
+        time.sleep(self.llm_ttft)
+        for i, word in enumerate(RESPONSE.split(" ")):
+            if i:
+                time.sleep(1.0 / self.tokens_per_second)
+            yield word if i == 0 else " " + word
+
+    def generate(self, chat_history):
+        return "".join(self.stream(chat_history))
+
+    def tts(self, text):
+        time.sleep(self.tts_latency + self.tts_seconds_per_char * len(text))
+        return text.encode()
+
+
+def sequential_turn(providers, on_first_audio):
+    text = providers.transcribe(b"")
+    history = [{"role": "user", "content": text}]
+    response = providers.generate(history)
+    audio = providers.tts(response)
+    on_first_audio(audio)
+
+
+def streaming_turn(providers, on_first_audio):
+    text = providers.transcribe(b"")
+    history = [{"role": "user", "content": text}]
+    first = []
+
+    def play(audio):
+        if not first:
+            first.append(audio)
+            on_first_audio(audio)
+
+    StreamingPipeline(providers.stream, providers.tts, play).run(history)
+
+
+def measure(turn_fn, providers, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        first_audio = []
+        turn_fn(providers, lambda audio: first_audio.append(time.perf_counter() - start))
+        samples.append(first_audio[0])
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    providers = StubProviders()
+    results = {
+        "sequential": measure(sequential_turn, providers, args.runs),
+        "streaming": measure(streaming_turn, providers, args.runs),
+    }
+
+    print(f"time to first audio over {args.runs} runs (seconds)")
+    for name, samples in results.items():
+        print(f"  {name:<10} median={statistics.median(samples):.3f} "
+              f"min={min(samples):.3f} max={max(samples):.3f}")
+    speedup = statistics.median(results["sequential"]) / statistics.median(results["streaming"])
+    print(f"  streaming is {speedup:.1f}x faster to first audio")
+
+
+if __name__ == "__main__":
+    main()
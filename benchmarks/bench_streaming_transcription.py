@@ -0,0 +1,93 @@
+"""
+Delay from end of speech to final transcript: whole-utterance upload versus
+the chunked streaming transcriber.
+
+Audio is fed in real time in 20 ms chunks. The stub Whisper endpoint charges a
+fixed request latency plus time proportional to the audio length and upload
+size, and "recognizes" words that are encoded in the PCM itself (one word per
+250 ms block), so the stitched transcript can be checked for lost or duplicated
+words at segment boundaries.
+
+Run from the repository root:
+    python -m benchmarks.bench_streaming_transcription
+"""
+import io
+import time
+import wave
+import argparse
+
+import numpy as np
+
+from backend.voice_assistant.utils import pcm_to_wav
+from backend.voice_assistant.streaming_transcription import ChunkedTranscriber
+
+SAMPLE_RATE = 16000
+WORD_SAMPLES = SAMPLE_RATE // 4
+
+
+def make_utterance(seconds):
+    words = int(seconds * 4)
+    return np.repeat(np.arange(1, words + 1, dtype=np.int16), WORD_SAMPLES).tobytes(), words
+
+
+class StubWhisper:
+    def __init__(self, base_latency=0.25, seconds_per_audio_second=0.08, uplink_mbps=2.0):
+        self.base_latency = base_latency
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.uplink_mbps = uplink_mbps
+
+    def __call__(self, wav_bytes):
+        with wave.open(io.BytesIO(wav_bytes)) as wav_file:
+            samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+        duration = len(samples) / SAMPLE_RATE
+        time.sleep(self.base_latency + self.seconds_per_audio_second * duration
+                   + len(wav_bytes) * 8 / (self.uplink_mbps * 1e6))
+        # Words whose audio is at least half present in the segment are recognized
+        change = np.flatnonzero(np.diff(samples)) + 1
+        starts = np.concatenate([[0], change])
+        lengths = np.diff(np.concatenate([starts, [len(samples)]]))
+        return " ".join(f"w{samples[s]}" for s, n in zip(starts, lengths) if n >= WORD_SAMPLES // 2)
+
+
+def feed_realtime(pcm, on_chunk, chunk_ms=20):
+    chunk = SAMPLE_RATE * chunk_ms // 1000 * 2
+    start = time.perf_counter()
+    for index, offset in enumerate(range(0, len(pcm), chunk)):
+        on_chunk(pcm[offset:offset + chunk])
+        delay = start + (index + 1) * chunk_ms / 1000 - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lengths", type=float, nargs="+", default=[3, 6, 10])
+    parser.add_argument("--segment-ms", type=int, default=4000)
+    parser.add_argument("--overlap-ms", type=int, default=1000)
+    args = parser.parse_args()
+
+    stub = StubWhisper()
+    print(f"segment {args.segment_ms} ms, overlap {args.overlap_ms} ms")
+    print(f"  {'utterance':>9} {'whole-file':>11} {'streaming':>10} {'transcript':>11}")
+    for seconds in args.lengths:
+        pcm, words = make_utterance(seconds)
+        expected = " ".join(f"w{i}" for i in range(1, words + 1))
+
+        chunks = []
+        feed_realtime(pcm, chunks.append)
+        start = time.perf_counter()
+        stub(pcm_to_wav(b"".join(chunks), SAMPLE_RATE))
+        whole_file = time.perf_counter() - start
+
+        transcriber = ChunkedTranscriber(stub, SAMPLE_RATE, segment_ms=args.segment_ms, overlap_ms=args.overlap_ms)
+        feed_realtime(pcm, transcriber.feed)
+        start = time.perf_counter()
+        transcript = transcriber.finish()
+        streaming = time.perf_counter() - start
+
+        status = "exact" if transcript == expected else "MISMATCH"
+        print(f"  {seconds:>8.1f}s {whole_file * 1000:>9.0f}ms {streaming * 1000:>8.0f}ms {status:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Bytes uploaded and end-to-end transcription time with upload preprocessing.
+
+Synthesizes utterances the way a desktop microphone hands them over, 44.1 kHz
+stereo 16-bit WAV with silence before and after the speech, and sends them
+to a stub transcription server through the OpenAI client. The stub reads
+request bodies at a limited uplink bandwidth, so upload size turns into
+time as it does on a home connection. Each setup prepares the upload with
+prepare_upload and reports the bytes and seconds of audio sent, the
+preprocessing time and the end-to-end time per utterance:
+
+    raw            the recorder's WAV as is
+    16k mono       downmixed and resampled to 16 kHz
+    16k trimmed    also cut of leading and trailing silence
+    flac           trimmed and FLAC-encoded
+
+Run from the repository root:
+    python -m benchmarks.bench_stt_upload
+"""
+import io
+import time
+import wave
+import argparse
+import statistics
+
+import numpy as np
+from openai import OpenAI
+
+from benchmarks.stub_server import StubServer
+from backend.voice_assistant.audio_preprocessing import decode_wav, prepare_upload
+
+SAMPLE_RATE = 44100
+
+
+def synth_utterance(rng, noise_db=-55):
+    def speech(seconds):
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        f0 = rng.uniform(110, 220)
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        return 0.25 * voiced * (0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t))
+
+    parts = [np.zeros(int(rng.uniform(0.5, 1.5) * SAMPLE_RATE)), speech(rng.uniform(1.5, 4.0)),
+             np.zeros(int(rng.uniform(0.8, 1.5) * SAMPLE_RATE))]
+    mono = np.concatenate(parts)
+    # The two channels differ slightly, as with a real stereo microphone
+    stereo = np.stack([mono, mono * 0.9], axis=1) + rng.normal(0, 10 ** (noise_db / 20), (len(mono), 2))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes((np.clip(stereo, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def audio_seconds(upload, file_name):
+    if not file_name.endswith(".wav"):
+        return None
+    samples, rate = decode_wav(upload)
+    return len(samples) / rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=10)
+    parser.add_argument("--uplink-mbps", type=float, default=2.0, help="stub upload bandwidth in Mbit/s")
+    parser.add_argument("--latency", type=float, default=0.1, help="stub processing seconds per request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    utterances = [synth_utterance(rng) for _ in range(args.utterances)]
+    setups = [
+        ("raw", None),
+        ("16k mono", {"trim": False, "codec": "wav"}),
+        ("16k trimmed", {"trim": True, "codec": "wav"}),
+        ("flac", {"trim": True, "codec": "flac"}),
+    ]
+    print(f"{args.utterances} utterances of 44.1 kHz stereo WAV, uplink {args.uplink_mbps} Mbit/s, "
+          f"stub latency {args.latency * 1000:.0f} ms")
+    with StubServer(latency=args.latency, upload_bandwidth=args.uplink_mbps * 1e6 / 8) as server:
+        client = OpenAI(api_key="stub", base_url=f"{server.url}/v1", max_retries=0)
+        for name, options in setups:
+            sizes, seconds, prepare_times, totals = [], [], [], []
+            for wav_bytes in utterances:
+                start = time.perf_counter()
+                upload, file_name = (wav_bytes, "audio.wav") if options is None else prepare_upload(wav_bytes, **options)
+                prepared = time.perf_counter()
+                client.audio.transcriptions.create(model="whisper-1", file=(file_name, upload))
+                totals.append(time.perf_counter() - start)
+                prepare_times.append(prepared - start)
+                sizes.append(len(upload))
+                seconds.append(audio_seconds(upload, file_name))
+            audio = f"{statistics.mean(seconds):4.1f} s" if None not in seconds else "   - "
+            print(f"  {name:<12} upload={statistics.mean(sizes) / 1024:6.0f} KiB  audio={audio}  "
+                  f"preprocess={statistics.mean(prepare_times) * 1000:5.1f} ms  "
+                  f"end-to-end={statistics.mean(totals) * 1000:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Time to audio and provider requests for repeated phrases with and without the TTS cache.
+
+Simulates an assistant whose replies are drawn from a Zipf-like mix of phrases
+(a few greetings and confirmations are very common, most replies are unique),
+synthesized through the OpenAI client against a local stub server.
+
+Run from the repository root:
+    python -m benchmarks.bench_tts_cache
+"""
+import time
+import random
+import argparse
+import statistics
+
+from benchmarks.stub_server import StubServer
+from backend.voice_assistant.clients import ClientRegistry
+from backend.voice_assistant.tts_cache import TTSCache, cache_key
+
+# Same as text_to_speech.OPENAI_TTS_OPTIONS, without importing the provider SDKs
+OPENAI_TTS_OPTIONS = {"model": "tts-1", "voice": "fable", "response_format": "mp3"}
+
+
+def phrase_mix(count, common, seed):
+    rng = random.Random(seed)
+    phrases = [f"Common phrase number {index}." for index in range(common)]
+    weights = [1 / (rank + 1) for rank in range(common)]
+    mix = []
+    for index in range(count):
+        if rng.random() < 0.5:
+            mix.append(rng.choices(phrases, weights)[0])
+        else:
+            mix.append(f"A unique reply, number {index}.")
+    return mix
+
+
+def measure(synthesize, phrases, server):
+    server.reset_counters()
+    samples = []
+    for text in phrases:
+        start = time.perf_counter()
+        synthesize(text)
+        samples.append(time.perf_counter() - start)
+    return samples, server.requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--phrases", type=int, default=200)
+    parser.add_argument("--common", type=int, default=10, help="distinct frequently repeated phrases")
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds per TTS request")
+    parser.add_argument("--cache-kb", type=int, default=1024)
+    args = parser.parse_args()
+
+    phrases = phrase_mix(args.phrases, args.common, seed=0)
+    with StubServer(latency=args.latency) as server:
+        registry = ClientRegistry()
+        client = registry.get("openai", "stub", f"{server.url}/v1")
+        cache = TTSCache(max_bytes=args.cache_kb * 1024)
+
+        def uncached(text):
+            return client.audio.speech.create(input=text, **OPENAI_TTS_OPTIONS).content
+
+        def cached(text):
+            key = cache_key("openai", OPENAI_TTS_OPTIONS, text)
+            audio = cache.get(key)
+            if audio is None:
+                audio = uncached(text)
+                cache.put(key, audio)
+            return audio
+
+        results = {
+            "uncached": measure(uncached, phrases, server),
+            "cached": measure(cached, phrases, server),
+        }
+        registry.close()
+
+    print(f"{args.phrases} phrases, {args.latency * 1000:.0f} ms per TTS request")
+    for name, (samples, requests) in results.items():
+        print(f"  {name:<9} mean={statistics.mean(samples) * 1000:7.1f} ms "
+              f"p50={statistics.median(samples) * 1000:7.1f} ms requests={requests}")
+    print(f"  cache: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
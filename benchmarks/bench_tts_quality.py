@@ -0,0 +1,129 @@
+"""
+Tail latency of TTS requests with adaptive quality, under a simulated network.
+
+Requests for tutoring sentences of varied length are sent over a simulated
+link on a simulated clock, so the run is instant and repeatable. A request
+takes the provider's time to first byte plus the response size over the
+link's bandwidth, with jitter, and a share of requests get an injected delay
+on top. The link goes through phases:
+
+    clear        5 Mbit/s
+    congested    1 Mbit/s
+    degraded     400 kbit/s, with more injected delays
+    recovered    5 Mbit/s
+
+Response sizes follow the Deepgram tiers in text_to_speech.TTS_QUALITY_TIERS
+(WAV at the top, MP3 below), at a speaking rate a little slower than the
+controller first assumes. Each policy gets the same requests and network:
+
+    fixed high   always the top tier, as without adaptive quality
+    fixed low    always the bottom tier
+    adaptive     TTSQualityController between --min-tier and --max-tier
+
+For each the p50, p95 and p99 request time, the share of requests over the
+target, and the tiers used are reported, overall and for the slow phases.
+
+Run from the repository root:
+    python -m benchmarks.bench_tts_quality
+"""
+import random
+import argparse
+from collections import Counter
+
+import numpy as np
+
+from backend.voice_assistant.text_to_speech import TTS_QUALITY_TIERS
+from backend.voice_assistant.tts_quality import TTSQualityController
+
+# (name, seconds, bandwidth in bytes per second, share of requests with an injected delay)
+PHASES = [
+    ("clear", 300, 5e6 / 8, 0.02),
+    ("congested", 300, 1e6 / 8, 0.02),
+    ("degraded", 200, 4e5 / 8, 0.05),
+    ("recovered", 200, 5e6 / 8, 0.02),
+]
+WORDS = ("the energy from sunlight is stored in sugar so the plant can grow and we can check "
+         "each step by asking what changes when one quantity doubles").split()
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_requests(args):
+    """
+    Return (start time, text, phase name, bandwidth, injected delay) per request.
+    """
+    rng = random.Random(args.seed)
+    requests, start = [], 0.0
+    for name, seconds, bandwidth, delay_share in PHASES:
+        end = start + seconds
+        now = start
+        while now < end:
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25))) + "."
+            delay = rng.uniform(0.5, 2.0) if rng.random() < delay_share else 0.0
+            requests.append((now, text, name, bandwidth * rng.uniform(0.8, 1.2), delay))
+            now += rng.uniform(1.0, 4.0)
+        start = end
+    return requests
+
+
+def run(policy, requests, args):
+    rng = random.Random(args.seed + 1)
+    clock = SimulatedClock()
+    tiers = TTS_QUALITY_TIERS['deepgram']
+    controller = TTSQualityController(tiers, args.min_tier, args.max_tier, args.target, args.window,
+                                      clock=clock) if policy == "adaptive" else None
+    results = []
+    for start, text, phase, bandwidth, delay in requests:
+        clock.now = start
+        if controller is not None:
+            tier = controller.choose(text)
+        else:
+            tier = tiers[-1] if policy == "fixed high" else tiers[0]
+        # Speech at 13 characters a second, against the controller's first guess of 15
+        size = int(len(text) / 13 * tier["bitrate"] / 8 * rng.uniform(0.9, 1.1))
+        seconds = args.ttfb * rng.lognormvariate(0, 0.25) + size / bandwidth + delay
+        clock.now = start + seconds
+        if controller is not None:
+            controller.observe(tier, text, size, seconds)
+        results.append((phase, tier["name"], seconds))
+    return results
+
+
+def report(policy, results, target, phases=None):
+    selected = [result for result in results if phases is None or result[0] in phases]
+    seconds = np.array([result[2] for result in selected])
+    p50, p95, p99 = np.quantile(seconds, [0.5, 0.95, 0.99]) * 1000
+    tiers = Counter(result[1] for result in selected)
+    mix = " ".join(f"{name}={tiers[name] / len(selected):.0%}" for name in ("low", "medium", "high") if tiers[name])
+    print(f"  {policy:<11} p50={p50:6.0f} ms p95={p95:6.0f} ms p99={p99:6.0f} ms  "
+          f"over target={np.mean(seconds > target):5.1%}  {mix}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", type=float, default=1.0, help="seconds a request should take at most")
+    parser.add_argument("--min-tier", default="low")
+    parser.add_argument("--max-tier", default="high")
+    parser.add_argument("--window", type=int, default=20, help="recent requests the controller estimates from")
+    parser.add_argument("--ttfb", type=float, default=0.25, help="provider's median time to first byte")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    requests = make_requests(args)
+    runs = {policy: run(policy, requests, args) for policy in ("fixed high", "fixed low", "adaptive")}
+    print(f"{len(requests)} requests, target {args.target * 1000:.0f} ms")
+    for title, phases in (("all phases", None), ("congested and degraded", {"congested", "degraded"}),
+                          ("clear and recovered", {"clear", "recovered"})):
+        print(title)
+        for policy, results in runs.items():
+            report(policy, results, args.target, phases)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Endpointing delay and CPU cost of the frame-level VAD endpointer.
+
+Synthesizes WAV fixtures of voiced, syllable-modulated "speech" with short
+in-sentence pauses over background noise, streams them through endpoint_wav in
+20 ms chunks, and reports how long after the true end of speech each utterance
+was emitted, together with CPU time per second of audio. The same fixtures can
+be kept on disk with --out-dir, and real recordings can be checked with --wav.
+
+Run from the repository root:
+    python -m benchmarks.bench_vad_endpointing
+"""
+import os
+import time
+import wave
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+from backend.voice_assistant.vad import endpoint_wav, read_wav
+
+SAMPLE_RATE = 16000
+# speech_recognition.Recognizer waits this long after speech before returning
+RECOGNIZER_PAUSE_THRESHOLD = 0.8
+
+
+def synth_speech(seconds, rng):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = rng.uniform(110, 220)
+    voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+    syllables = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t)
+    return 0.25 * voiced * syllables
+
+
+def synth_fixture(path, rng, noise_db=-45):
+    """Write a fixture and return the true end time of its speech in seconds."""
+    parts = [np.zeros(int(rng.uniform(0.5, 1.0) * SAMPLE_RATE))]
+    for i in range(rng.integers(2, 4)):
+        if i:
+            parts.append(np.zeros(int(0.15 * SAMPLE_RATE)))  # pause inside the sentence
+        parts.append(synth_speech(rng.uniform(0.4, 1.2), rng))
+    speech_end = sum(map(len, parts)) / SAMPLE_RATE
+    parts.append(np.zeros(int(1.5 * SAMPLE_RATE)))
+    signal = np.concatenate(parts)
+    signal += rng.normal(0, 10 ** (noise_db / 20), len(signal))
+    pcm = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm.tobytes())
+    return speech_end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", type=int, default=20)
+    parser.add_argument("--hangover-ms", type=int, default=300)
+    parser.add_argument("--out-dir", help="keep the generated fixtures here")
+    parser.add_argument("--wav", nargs=2, action="append", metavar=("PATH", "SPEECH_END"),
+                        help="also check a recorded mono WAV whose speech ends at SPEECH_END seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    out_dir = args.out_dir or tempfile.mkdtemp(prefix="vad-fixtures-")
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(args.seed)
+    fixtures = []
+    for index in range(args.fixtures):
+        path = os.path.join(out_dir, f"utterance_{index:03d}.wav")
+        fixtures.append((path, synth_fixture(path, rng)))
+    for path, speech_end in args.wav or []:
+        fixtures.append((path, float(speech_end)))
+
+    delays, audio_seconds, cpu_seconds, split = [], 0.0, 0.0, 0
+    for path, speech_end in fixtures:
+        pcm, sample_rate, sample_width = read_wav(path)
+        audio_seconds += len(pcm) / sample_width / sample_rate
+        start = time.process_time()
+        results = endpoint_wav(path, hangover_ms=args.hangover_ms)
+        cpu_seconds += time.process_time() - start
+        if len(results) != 1:
+            split += 1
+        if results:
+            delays.append(results[-1][1] - speech_end)
+
+    print(f"{len(fixtures)} fixtures, hangover {args.hangover_ms} ms")
+    print(f"  endpointing delay  median={statistics.median(delays) * 1000:.0f} ms "
+          f"max={max(delays) * 1000:.0f} ms "
+          f"(recognizer pause threshold alone: {RECOGNIZER_PAUSE_THRESHOLD * 1000:.0f} ms)")
+    print(f"  fixtures not detected as exactly one utterance: {split}")
+    print(f"  CPU {cpu_seconds / audio_seconds * 1000:.2f} ms per second of audio")
+    if not args.out_dir:
+        for path, _ in fixtures[:args.fixtures]:
+            os.remove(path)
+        os.rmdir(out_dir)
+
+
+if __name__ == "__main__":
+    main()
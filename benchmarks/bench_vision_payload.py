@@ -0,0 +1,79 @@
+"""
+Payload size and added latency of attaching webcam snapshots to user messages.
+
+For each snapshot width and JPEG quality it reports the encoded size, the bytes
+added to the request, the encode time and the upload time at a given uplink
+speed. It then shows how the request grows over a session with and without
+evicting older images.
+
+Run from the repository root:
+    python -m benchmarks.bench_vision_payload
+"""
+import time
+import argparse
+import statistics
+
+import cv2
+import numpy as np
+
+from backend.voice_assistant.camera import encode_jpeg
+from backend.voice_assistant.vision import build_user_message, evict_images, payload_bytes
+
+
+def synthetic_frame(width=1280, height=720, seed=0):
+    # A smooth background with shapes and sensor noise compresses roughly like a webcam frame
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    frame = np.stack([np.broadcast_to(x, (height, width)),
+                      np.broadcast_to(y, (height, width)),
+                      (x + y) / 2], axis=-1)
+    frame = np.clip(frame + rng.normal(0, 6, frame.shape), 0, 255).astype(np.uint8)
+    cv2.circle(frame, (width // 3, height // 2), height // 4, (30, 60, 200), -1)
+    cv2.rectangle(frame, (width // 2, height // 4), (width * 5 // 6, height * 3 // 4), (220, 220, 220), -1)
+    cv2.putText(frame, "x^2 + 3x = 10", (width // 2 + 20, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uplink-mbps", type=float, default=5.0)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    frame = synthetic_frame()
+    text_only = payload_bytes([build_user_message("What is this equation?")])
+
+    print(f"1280x720 frame, {args.uplink_mbps} Mbit/s uplink")
+    print(f"  {'width':>6} {'quality':>7} {'jpeg':>9} {'added':>9} {'encode':>9} {'upload':>9}")
+    for max_width in (None, 1024, 768, 512, 320):
+        for quality in (85, 70, 50):
+            timings = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                jpeg = encode_jpeg(frame, quality, max_width)
+                message = build_user_message("What is this equation?", jpeg)
+                timings.append(time.perf_counter() - start)
+            added = payload_bytes([message]) - text_only
+            upload = added * 8 / (args.uplink_mbps * 1e6)
+            print(f"  {max_width or 1280:>6} {quality:>7} {len(jpeg) / 1024:>7.1f}KB {added / 1024:>7.1f}KB "
+                  f"{statistics.median(timings) * 1000:>7.2f}ms {upload * 1000:>7.1f}ms")
+
+    jpeg = encode_jpeg(frame, 70, 512)
+    print(f"\nrequest size over {args.turns} turns (512px, quality 70)")
+    for keep_last in (None, 1):
+        history = [{"role": "system", "content": "You are a helpful Assistant."}]
+        sizes = []
+        for turn in range(args.turns):
+            history.append(build_user_message(f"Question number {turn}?", jpeg))
+            if keep_last is not None:
+                evict_images(history, keep_last)
+            sizes.append(payload_bytes(history))
+            history.append({"role": "assistant", "content": "A short answer."})
+        label = "keep all images" if keep_last is None else f"keep last {keep_last}"
+        print(f"  {label:<16} first={sizes[0] / 1024:.1f}KB last={sizes[-1] / 1024:.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
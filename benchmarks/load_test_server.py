@@ -0,0 +1,107 @@
+"""
+Load test for the async assistant server with stubbed providers.
+
+Starts an AssistantServer in-process, opens N concurrent sessions that each send
+a number of utterances back to back, and reports turn latency percentiles and
+overall throughput, followed by the server's own per-stage latency breakdown.
+A second run then puts twice as many sessions as --oversubscribed-workers on
+that many provider workers, which must finish within --deadline seconds rather
+than hang with every worker waiting on the others.
+
+Run from the repository root:
+    python -m benchmarks.load_test_server --sessions 50 --turns 5
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+from backend.server import AUDIO, END, AssistantServer, read_frame, write_frame
+from backend.voice_assistant.providers import Providers
+from benchmarks.bench_streaming_pipeline import StubProviders
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_session(port, turns, utterance, latencies, first_audio):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for _ in range(turns):
+            start = time.perf_counter()
+            write_frame(writer, AUDIO, utterance)
+            await writer.drain()
+            seen_audio = False
+            while True:
+                kind, _ = await read_frame(reader)
+                if kind == AUDIO and not seen_audio:
+                    seen_audio = True
+                    first_audio.append(time.perf_counter() - start)
+                if kind == END:
+                    break
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run(args, sessions, max_workers, deadline=None):
+    stub = StubProviders(stt_latency=args.stt_latency, llm_ttft=args.llm_ttft, tts_latency=args.tts_latency)
+    providers = Providers(stub.transcribe, stub.stream, stub.tts, names={'stt': 'stub', 'llm': 'stub', 'tts': 'stub'})
+    server = await AssistantServer(providers, port=0, max_workers=max_workers).start()
+
+    utterance = b"\0" * args.utterance_bytes
+    latencies, first_audio = [], []
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.gather(*(
+            run_session(server.port, args.turns, utterance, latencies, first_audio)
+            for _ in range(sessions)
+        )), deadline)
+    finally:
+        await server.close()
+    elapsed = time.perf_counter() - start
+    return latencies, first_audio, elapsed, server.metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--max-workers", type=int, default=64)
+    parser.add_argument("--utterance-bytes", type=int, default=160000)
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--llm-ttft", type=float, default=0.25)
+    parser.add_argument("--tts-latency", type=float, default=0.15)
+    parser.add_argument("--oversubscribed-workers", type=int, default=4,
+                        help="provider workers of the run with twice as many sessions; 0 skips it")
+    parser.add_argument("--deadline", type=float, default=60.0, help="seconds the oversubscribed run may take")
+    args = parser.parse_args()
+
+    latencies, first_audio, elapsed, metrics = asyncio.run(run(args, args.sessions, args.max_workers))
+
+    print(f"{args.sessions} sessions x {args.turns} turns, {args.max_workers} provider workers")
+    for name, samples in (("turn latency", latencies), ("first audio", first_audio)):
+        print(f"  {name:<13} p50={percentile(samples, 50):.3f}s p95={percentile(samples, 95):.3f}s "
+              f"p99={percentile(samples, 99):.3f}s mean={statistics.mean(samples):.3f}s")
+    print(f"  throughput    {len(latencies) / elapsed:.1f} turns/s over {elapsed:.1f}s")
+    print("server stages")
+    for stage, stats in metrics.summary().items():
+        print(f"  {stage:<17} n={stats['count']:<5} p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s")
+
+    if args.oversubscribed_workers:
+        workers = args.oversubscribed_workers
+        try:
+            latencies, _, elapsed, _ = asyncio.run(run(args, workers * 2, workers, args.deadline))
+        except asyncio.TimeoutError:
+            raise SystemExit(f"oversubscribed: {workers * 2} sessions on {workers} workers did not finish "
+                             f"within {args.deadline:.0f}s")
+        print(f"oversubscribed: {workers * 2} sessions x {args.turns} turns on {workers} workers finished in "
+              f"{elapsed:.1f}s, turn latency p95={percentile(latencies, 95):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+A local HTTP server that mimics the provider endpoints used by the assistant.
+
+It speaks just enough of the OpenAI/Groq chat, transcription and speech APIs,
+the Deepgram speak API and the ZeroGPT detect API for the clients to work
+against it, and can inject latency, per-connection handshake cost, a slow
+uplink, rate limiting and failures.
+"""
+import json
+import time
+import socket
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "This is a stubbed response. It has two sentences."
+DEFAULT_TRANSCRIPT = "This is a stubbed transcript."
+# Seconds a rate-limited client is told to wait
+RETRY_AFTER = 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, Nagle's algorithm
+        # and delayed ACKs add ~40 ms to every keep-alive request.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        stub = self.server.stub
+        with stub.lock:
+            stub.connections += 1
+        # Stands in for the TCP + TLS handshake a real provider would need
+        if stub.handshake_delay:
+            time.sleep(stub.handshake_delay)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode(), "application/json")
+
+    def _send_event_stream(self, reply):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word},
+                             "finish_reason": None}]
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+            if self.server.stub.token_delay:
+                time.sleep(self.server.stub.token_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        # Stands in for the time the client's uplink needs to send the body
+        if stub.upload_bandwidth:
+            time.sleep(len(body) / stub.upload_bandwidth)
+        with stub.lock:
+            stub.requests += 1
+            stub.bytes_received += len(body)
+            fail = stub.random.random() < stub.failure_rate
+            throttle = stub._over_rate_limit()
+        if throttle:
+            self._send(429, json.dumps({"error": {"message": "rate limited", "type": "rate_limit"}}).encode(),
+                       "application/json", {"Retry-After": str(RETRY_AFTER)})
+            return
+        latency = stub.latency() if callable(stub.latency) else stub.latency
+        if latency:
+            time.sleep(latency)
+        if fail:
+            self._send_json(500, {"error": {"message": "injected failure", "type": "server_error"}})
+            return
+
+        if self.path.endswith("/chat/completions"):
+            request = json.loads(body or b"{}")
+            if request.get("stream"):
+                self._send_event_stream(stub.reply)
+                return
+            self._send_json(200, {
+                "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": stub.reply}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            })
+        elif self.path.endswith("/audio/transcriptions"):
+            self._send_json(200, {"text": stub.transcript})
+        elif self.path.endswith("/detectText"):
+            text = json.loads(body or b"{}").get("input_text", "")
+            self._send_json(200, {"success": True, "data": {
+                "isHuman": 100, "fakePercentage": 0.0, "textWords": len(text.split())}})
+        elif self.path.endswith("/audio/speech") or "/speak" in self.path:
+            self._send(200, b"\0" * stub.audio_bytes, "audio/mpeg")
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+
+class StubServer:
+    """
+    Threaded stub provider server bound to localhost on a free port.
+
+    Args:
+    latency (float or callable): Seconds to wait before answering each request, or a
+        callable returning that number per request.
+    handshake_delay (float): Seconds to wait once per new connection.
+    failure_rate (float): Fraction of requests answered with HTTP 500.
+    token_delay (float): Seconds between streamed chat tokens.
+    upload_bandwidth (float): Bytes per second at which request bodies arrive; None is unlimited.
+    rate_limit (int): Requests accepted per second; the rest get HTTP 429 with Retry-After.
+        None is unlimited.
+    audio_bytes (int): Size of the body returned by speech endpoints.
+    seed (int): Seed for failure injection.
+    """
+
+    def __init__(self, latency=0.0, handshake_delay=0.0, failure_rate=0.0, token_delay=0.0,
+                 audio_bytes=32000, reply=DEFAULT_REPLY, transcript=DEFAULT_TRANSCRIPT, seed=0,
+                 upload_bandwidth=None, rate_limit=None):
+        self.latency = latency
+        self.handshake_delay = handshake_delay
+        self.failure_rate = failure_rate
+        self.token_delay = token_delay
+        self.upload_bandwidth = upload_bandwidth
+        self.rate_limit = rate_limit
+        self.audio_bytes = audio_bytes
+        self.reply = reply
+        self.transcript = transcript
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.bytes_received = 0
+        self.throttled = 0
+        self._window_start = 0.0
+        self._window_requests = 0
+        self._server = None
+        self._thread = None
+
+    def _over_rate_limit(self):
+        # Fixed one-second windows; called with the lock held
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1.0:
+            self._window_start, self._window_requests = now, 0
+        self._window_requests += 1
+        if self._window_requests > self.rate_limit:
+            self.throttled += 1
+            return True
+        return False
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset_counters(self):
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+            self.bytes_received = 0
+            self.throttled = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
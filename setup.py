@@ -25,6 +25,13 @@ setup(
         'colorama',
         'requests'
     ],
+    extras_require={
+        'local': [
+            'faster-whisper',
+            'llama-cpp-python',
+            'piper-tts'
+        ]
+    },
     entry_points={
         'console_scripts': [
             'voice-assistant-tutor=run_voice_assistant:main'